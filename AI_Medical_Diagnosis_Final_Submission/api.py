@@ -0,0 +1,202 @@
+# api.py - headless REST inference service (runs beside the Streamlit UI)
+#
+#   uvicorn api:app --host 0.0.0.0 --port 8000
+#
+# Shares the process-wide model registry, the input schemas in schemas.py and
+# the single-call inference layer with app.py. Single-row requests that
+# arrive together for the same model are coalesced into one vectorized call
+# by the shared microbatch coalescer (BATCH_MAX_ROWS / BATCH_MAX_WAIT_MS).
+# With METRICS=1, GET /metrics serves Prometheus text (see metrics.py).
+#
+# In-process testing:
+#   from fastapi.testclient import TestClient
+#   client = TestClient(api.app)
+#   client.post("/predict/diabetes", json={"features": {...}})
+#   client.post("/screen", json={"features": {"Glucose": 130, "Age": 52}})
+# (tests/test_api.py does exactly this.)
+#
+# Loading a model unpickles it, so handlers never touch the registry on the
+# event loop: lookups go through run_in_threadpool.
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+import inference
+import metrics
+import microbatch
+import model_registry
+import schemas
+import screening
+
+MAX_BATCH_ROWS = int(os.environ.get("API_MAX_BATCH_ROWS", "10000"))
+
+app = FastAPI(title="AI Medical Diagnosis API")
+
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    if not metrics.ENABLED:
+        return await call_next(request)
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # route template ("/predict/{disease}") so the label set stays small
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe("http_request_seconds", time.perf_counter() - t0, route=route)
+    metrics.inc("http_requests_total", route=route, status=response.status_code)
+    return response
+
+
+Row = Union[Dict[str, float], List[float]]
+
+
+class PredictRequest(BaseModel):
+    features: Optional[Dict[str, float]] = None   # {"Glucose": 120, ...} - names/aliases from schemas.py
+    values: Optional[List[float]] = None          # or the raw vector in training feature order
+
+
+class ScreenRequest(BaseModel):
+    features: Dict[str, float]   # one shared value set, e.g. OCR output; gaps use schema defaults
+
+
+class BatchRequest(BaseModel):
+    model: str
+    rows: List[Row] = Field(..., max_length=MAX_BATCH_ROWS)   # feature dicts or raw vectors
+
+
+def get_models():
+    models, errors, _, _ = model_registry.serving_models()
+    return models, errors
+
+
+def _load(key):
+    # blocking: may unpickle; call through run_in_threadpool
+    models, errors = get_models()
+    model = models.get(key)
+    return model, errors.get(key)
+
+
+def _load_all():
+    """``(loaded, errors)``: every model that actually loads and passes its schema check."""
+    models, errors = get_models()
+    loaded = {}
+    for key in model_registry.EXPECTED_MODELS:
+        model = models.get(key)
+        if model is not None:
+            loaded[key] = model
+    return loaded, {k: v for k, v in errors.items() if k not in loaded}
+
+
+async def _model_or_404(key):
+    model, error = await run_in_threadpool(_load, key)
+    if model is None:
+        raise HTTPException(404, error or f"Unknown model: {key}")
+    return model
+
+
+def to_matrix(key, rows):
+    """Feature dicts / raw vectors -> validated float matrix (422 on bad input)."""
+    try:
+        X = schemas.to_matrix(key, rows)
+    except schemas.SchemaError as e:
+        raise HTTPException(422, str(e))
+    bad = schemas.out_of_range(key, X)
+    if bad:
+        raise HTTPException(422, f"{key}: values out of range " + ", ".join(
+            f"row {r} {name}={value:g}" for r, name, value in bad[:10]))
+    return X
+
+
+def check_screen(features, keys):
+    """422 if a supplied value is outside the range of any model that reads it."""
+    problems = []
+    for key in keys:
+        supplied = set(schemas.matched(key, features))
+        for _, name, value in schemas.out_of_range(key, schemas.fill(key, features)):
+            if name in supplied:
+                problems.append(f"{key}: {name}={value:g}")
+    if problems:
+        raise HTTPException(422, "values out of range " + ", ".join(problems[:10]))
+
+
+def _result(key, label, score, kind):
+    return {
+        "model": key,
+        "prediction": int(label),
+        "probability": None if score is None else inference.probability(float(score), kind),
+        "margin": None if score is None else inference.margin(float(score), kind),
+        "score_kind": kind,
+    }
+
+
+# ---------------------------
+# Routes
+# ---------------------------
+@app.get("/health")
+async def health():
+    models, errors = await run_in_threadpool(_load_all)
+    return {
+        "status": "ok" if not errors else "degraded",
+        "models": sorted(models),
+        "errors": errors,
+    }
+
+
+@app.post("/predict/batch")
+async def predict_batch(req: BatchRequest):
+    model = await _model_or_404(req.model)
+    if not req.rows:
+        return {"model": req.model, "results": []}
+    X = to_matrix(req.model, req.rows)
+    labels, scores, kind = await asyncio.get_running_loop().run_in_executor(
+        None, inference.predict_batch, model, X)
+    return {
+        "model": req.model,
+        "results": [
+            _result(req.model, labels[i], None if scores is None else scores[i], kind)
+            for i in range(len(X))
+        ],
+    }
+
+
+@app.post("/predict/{disease}")
+async def predict(disease: str, req: PredictRequest):
+    await _model_or_404(disease)
+    row = req.features if req.features is not None else req.values
+    if row is None:
+        raise HTTPException(422, "Provide either 'features' or 'values'.")
+    fut = microbatch.default.submit(disease, to_matrix(disease, [row])[0])
+    label, score, kind = await asyncio.wrap_future(fut)
+    metrics.inc("predictions_total", model=disease, outcome="positive" if int(label) == 1 else "negative")
+    return _result(disease, label, score, kind)
+
+
+@app.post("/screen")
+async def screen(req: ScreenRequest):
+    """Score every loaded model from one value set; one combined risk panel."""
+    models, errors = await run_in_threadpool(_load_all)
+    keys = [k for k in schemas.SCHEMAS if k in models]
+    check_screen(req.features, keys)
+    panel = await asyncio.get_running_loop().run_in_executor(
+        None, screening.risk_panel, req.features, keys)
+    return {
+        "results": [
+            {k: v for k, v in entry.items() if k != "inputs"} for entry in panel
+        ],
+        "unavailable": errors,
+    }
+
+
+@app.get("/metrics/batching")
+async def batching_metrics():
+    return microbatch.default.metrics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,14 +1,28 @@
 # app.py - Final cleaned & corrected with full Parkinson's & Lung pages
+#
+# Only what the sidebar and the Home page need is imported up front. numpy
+# (schemas, microbatch, screening), pandas, PIL and the OCR/batch modules are
+# imported inside the pages that use them, so a cold start does not pay for
+# them. STARTUP_PROFILE=1 reports per-phase
+# startup timings (see startup.py).
+import startup
+startup.begin()
 from urllib.parse import quote_plus
 import streamlit as st
-import pickle
 import os
-import re
-import pandas as pd
-import numpy as np
+import uuid
+import hashlib
 from datetime import datetime
 from streamlit_option_menu import option_menu
-from PIL import Image
+
+import model_registry
+import history_store
+import health_tips
+import metrics
+import session_memory
+# microbatch / schemas / screening pull in numpy: imported by the pages that use them
+
+startup.mark("imports")
 
 # ---------------------------
 # Disease → Specialist Mapping (ADD-ONLY)
@@ -31,6 +45,7 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 
 )
+startup.mark("page_config")
 
 BACKGROUND_URL = "https://www.strategyand.pwc.com/m1/en/strategic-foresight/sector-strategies/healthcare/ai-powered-healthcare-solutions/img01-section1.jpg"
 
@@ -110,35 +125,21 @@ def inject_css(dark_mode=True):
 
 
 inject_css(dark_mode=True)
+startup.mark("css")
 
 # ---------------------------
 # Paths / Models loader (RELATIVE)
 # ---------------------------
-MODELS_DIR = "Models"
-EXPECTED_MODELS = {
-    "diabetes": os.path.join(MODELS_DIR, "diabetes_model.sav"),
-    "heart_disease": os.path.join(MODELS_DIR, "heart_disease_model.sav"),
-    "parkinsons": os.path.join(MODELS_DIR, "parkinsons_model.sav"),
-    "lung_cancer": os.path.join(MODELS_DIR, "lungs_disease_model.sav"),
-    "thyroid": os.path.join(MODELS_DIR, "Thyroid_model.sav"),
-}
-
-def try_load_models(expected):
-    loaded = {}
-    errors = {}
-    for key, rel_path in expected.items():
-        path = os.path.abspath(os.path.join(os.path.dirname(__file__), rel_path))
-        if os.path.exists(path):
-            try:
-                with open(path, "rb") as f:
-                    loaded[key] = pickle.load(f)
-            except Exception as e:
-                errors[key] = f"Failed to load: {e}"
-        else:
-            errors[key] = f"Missing file: {path}"
-    return loaded, errors
+MODELS_DIR = model_registry.MODELS_DIR
+EXPECTED_MODELS = model_registry.EXPECTED_MODELS
 
-models, load_errors = try_load_models(EXPECTED_MODELS)
+# Cached per process in model_registry and loaded lazily: a page only loads
+# the model it scores with. INFERENCE_MODE=compiled swaps the linear models
+# for per-model NumPy scoring; MODEL_FORMAT=artifacts serves the checksummed
+# export from artifacts.py instead of the raw pickles.
+INFERENCE_MODE = model_registry.INFERENCE_MODE
+models, load_errors, load_info, compile_skipped = model_registry.serving_models()
+startup.mark("model_registry")
 
 # ---------------------------
 # Sidebar (menu)
@@ -147,18 +148,33 @@ with st.sidebar:
     st.image("https://cdn-icons-png.flaticon.com/512/2966/2966327.png", width=72)
     st.markdown("### 🧠 AI Medical Diagnosis — Advanced System")
     with st.expander("Model load status ⚠️", expanded=False):
-        if not load_errors:
-            st.success("All expected models loaded")
+        available = list(models)
+        missing = [k for k in EXPECTED_MODELS if k not in available and k not in load_errors]
+        if not load_errors and not missing:
+            st.success("All expected models available (loaded on first use)")
         else:
             st.write("Some models missing or failed to load:")
+            for k in missing:
+                st.write(f"- **{k}**: not found")
             for k, v in load_errors.items():
                 st.write(f"- **{k}**: {v}")
+        for k, info in load_info.items():
+            st.write(f"- **{k}**: loaded in {info['load_seconds'] * 1000:.1f} ms "
+                     f"from {info['format']} (cached, {info['hits']} reuses)")
+        st.caption(f"Inference mode: {INFERENCE_MODE} · model format: {model_registry.MODEL_FORMAT}")
+        for k, reason in compile_skipped.items():
+            st.write(f"- **{k}**: not compiled ({reason})")
+
+    st.text_input("🪪 Patient ID (optional)", key="patient_id",
+                  help="Stored with each prediction so history can be filtered per patient.")
 
     page = option_menu(
         "Main Menu",
         [
             "Home",
             "Upload Report (Image)",
+            "Bulk Report OCR",
+            "Batch Screening",
             "Diabetes Prediction",
             "Heart Disease Prediction",
             "Parkinsons Prediction",
@@ -167,17 +183,19 @@ with st.sidebar:
             "Consult Doctor", 
             "Health Suggestions",
             "Model Info",
+            "Metrics",
             "Prediction History",
             "About"
         ],
         icons=[
-            "house", "upload", "droplet", "heart", "brain",
+            "house", "upload", "files", "table", "droplet", "heart", "brain",
             "lungs", "activity", "patch-question", "info-circle",
-            "clock-history", "people"
+            "speedometer2", "clock-history", "people"
         ],
         default_index=0,
         orientation="vertical",
     )
+startup.mark("sidebar")
 # ---------------------------
 # Home Page
 # ---------------------------
@@ -302,326 +320,6 @@ if page == "Home":
 # ---------------------------
 # Health tips (function)
 # ---------------------------
-def get_health_tips(disease):
-    tips = {}
-
-    # ------------------------ DIABETES ------------------------
-    tips['diabetes'] = {
-        'Precautions': [
-            "Monitor blood sugar regularly.",
-            "Maintain a healthy weight.",
-            "Eat a balanced diet rich in whole grains, fruits, and vegetables.",
-            "Exercise at least 30 minutes daily.",
-            "Take prescribed medications on time."
-        ],
-        'Diet': [
-            "Eat whole grains",
-            "Nuts and seeds",
-            "Leafy vegetables",
-            "Lentils and pulses.",
-            "Include high-fiber fruits like apples, guava, papaya.",
-            "Prefer low-fat dairy and lean proteins."
-        ],
-        'Avoid': [
-            "Sugary foods"
-            "White bread"
-            "Processed snacks.",
-            "Sweetened beverages",
-            "Deep-fried foods and excessive white rice."
-        ],
-        'Yoga_Asanas': [
-            "Dhanurasana (Bow Pose)",
-            "Ardha Matsyendrasana (Half Spinal Twist)",
-            "Paschimottanasana (Seated Forward Bend)",
-            "Kapalabhati Pranayama",
-            "Surya Namaskar (Sun Salutation)"
-        ],
-        'Home_Remedies_daily': [
-            "Bitter gourd (Karela) juice — helps reduce blood sugar.",
-            "Fenugreek (Methi) seeds soaked overnight — improves insulin sensitivity.",
-            "Amla (Indian gooseberry) — rich in vitamin C, supports pancreas function.",
-            "Cinnamon (Dalchini) — may lower fasting blood sugar.",
-            "Drink plenty of water to help flush out excess sugar."
-        ],
-        'Home_Remedies_emergency': [
-            "If Blood Sugar is LOW (Hypoglycemia): give 1 tbsp sugar or honey instantly.",
-            "Offer glucose water or fruit juice if person is awake.",
-            "Raisins or banana help raise sugar naturally.",
-            "Keep patient seated or lying safely until recovery.",
-            "If Blood Sugar is HIGH (Hyperglycemia): drink plenty of water to flush sugar.",
-            "Avoid sweets, do light walking if able, and monitor sugar if possible."
-        ],
-        'Medication_Emergency': [
-            "Glucose (Dextrose) orally or IV for low sugar.",
-            "Glucagon injection if unconscious.",
-            "Insulin (short-acting IV) and IV Normal Saline for high sugar (hospital).",
-            "Potassium correction under monitoring."
-        ],
-        'Emergency_Precautions': [
-            "If blood sugar < 70 mg/dL: take fast-acting sugar immediately.",
-            "If blood sugar > 300 mg/dL with nausea/vomiting/dizziness — seek emergency care.",
-            "Keep glucose source (tablet/juice) and emergency contact handy."
-        ],
-        'Medication_Precautions': [
-            "Never skip or double doses without doctor advice.",
-            "Take insulin/antidiabetic medicines as prescribed and follow timing.",
-            "Store insulin as instructed and check injection technique."
-        ]
-    }
-
-    # ------------------------ HEART DISEASE ------------------------
-    tips['heart'] = {
-        'Precautions': [
-            "Avoid smoking and limit alcohol.",
-            "Maintain a healthy weight.",
-            "Manage stress effectively.",
-            "Keep blood pressure and cholesterol under control.",
-            "Perform regular light-to-moderate physical activity."
-        ],
-        'Diet': [
-            "Eat oats",
-            "Whole grains",
-            "Nuts",
-            "Olive oil",
-            "Green vegetables and legumes.",
-            "Include Omega-3 rich fish like salmon or sardines."
-        ],
-        'Avoid': [
-            "Deep-fried foods.",
-            "Excessive red meat.",
-            "High salt and sugary foods.",
-            "Excessive caffeine or energy drinks."
-        ],
-        'Yoga_Asanas': [
-            "Tadasana (Mountain Pose)",
-            "Vrikshasana (Tree Pose)",
-            "Setu Bandhasana (Bridge Pose)",
-            "Anulom Vilom (Alternate Nostril Breathing)",
-            "Shavasana (Corpse Pose)"
-        ],
-        'Home_Remedies_daily': [
-            "Garlic — helps lower cholesterol.",
-            "Flax seeds — rich in omega-3 fatty acids.",
-            "Green tea — antioxidant and heart-friendly.",
-            "Eat oats & whole grains — reduces bad cholesterol.",
-            "Avoid excess salt & trans fats."
-        ],
-        'Home_Remedies_emergency': [
-            "Sit upright and stay calm; loosen strain on heart.",
-            "Chew 1 aspirin (300 mg) if not allergic.",
-            "Place 1 Sorbitrate / Nitroglycerin tablet under tongue (if prescribed).",
-            "Loosen tight clothing, allow fresh air, avoid lying flat, call emergency help."
-        ],
-        'Medication_Emergency': [
-            "Aspirin 300 mg chewable.",
-            "Nitroglycerin (Sorbitrate / Nitrostat) sublingual tablet.",
-            "Clopidogrel (Plavix) as advised.",
-            "Oxygen therapy if low saturation.",
-            "Morphine (pain relief, hospital).",
-            "Adrenaline / Atropine in cardiac arrest (hospital use)."
-        ],
-        'Emergency_Precautions': [
-            "If severe chest pain, shortness of breath, or fainting — call emergency services immediately.",
-            "If advised and not allergic, chew aspirin while awaiting help.",
-            "Avoid heavy exertion or emotional stress."
-        ],
-        'Medication_Precautions': [
-            "Take BP and cardiac medicines regularly at prescribed times.",
-            "Do not stop anti-hypertensive or anticoagulant therapy suddenly without doctor’s guidance.",
-            "Inform doctor about all supplements to avoid interactions."
-        ]
-    }
-
-    # ------------------------ PARKINSON’S ------------------------
-    tips['parkinsons'] = {
-        'Precautions': [
-            "Adhere to medication schedule strictly.",
-            "Do daily stretching and balance exercises.",
-            "Practice deep breathing and relaxation techniques.",
-            "Keep home safe to prevent falls (remove tripping hazards)."
-        ],
-        'Diet': [
-            "Foods rich in antioxidants (berries, green leafy vegetables).",
-            "Omega-3 fatty acids (fatty fish, flaxseeds).",
-            "Ensure adequate protein and fiber intake.",
-            "Small frequent meals if swallowing is affected."
-        ],
-        'Avoid': [
-            "High-fat fried foods ",
-            "Excessive processed foods.",
-            "Skipping medications or changing doses without advice.",
-            "Alcohol and sedatives that worsen symptoms.",
-            "Changing doses without advice."
-        ],
-        'Yoga_Asanas': [
-            "Tadasana (Mountain Pose)",
-            "Virabhadrasana (Warrior Pose)",
-            "Vrikshasana (Tree Pose)",
-            "Nadi Shodhana (Alternate Nostril Breathing)",
-            "Shavasana (Relaxation Pose)"
-        ],
-        'Home_Remedies_daily': [
-            "Turmeric (Curcumin) — anti-inflammatory and antioxidant.",
-            "Walnuts & almonds — support brain health.",
-            "Green vegetables & berries — rich in antioxidants.",
-            "Ginger tea — reduces stiffness and tremors slightly.",
-            "Vitamin D from sunlight or diet (mushrooms, milk)."
-        ],
-        'Home_Remedies_emergency': [
-            "Stay calm and take deep breaths.",
-            "Massage stiff muscles gently with warm oil.",
-            "Take missed Levodopa dose immediately if due.",
-            "Warm bath or moist towel on muscles to relax stiffness.",
-            "Maintain balanced posture to avoid falls."
-        ],
-        'Medication_Emergency': [
-            "Levodopa + Carbidopa (Syndopa / Sinemet).",
-            "Amantadine for sudden freezing episodes.",
-            "Apomorphine injection for severe 'off' episodes (hospital use)."
-        ],
-        'Emergency_Precautions': [
-            "If sudden loss of balance or fainting, sit or lie down immediately.",
-            "Avoid moving alone outdoors — keep assistance ready.",
-            "Report sudden severe stiffness, slurred speech, or confusion immediately."
-        ],
-        'Medication_Precautions': [
-            "Take Levodopa and related meds at the same time daily.",
-            "Avoid high-protein meals right around Levodopa dosing.",
-            "Do not abruptly stop Parkinson’s medications without medical advice.",
-            "Consult prescriber for changes."
-        ]
-    }
-
-    # ------------------------ LUNG CANCER ------------------------
-    tips['lungs'] = {
-        'Precautions': [
-            "Quit smoking and avoid second-hand smoke.",
-            "Avoid polluted environments when possible.",
-            "Keep up with vaccinations (influenza, pneumococcal) as advised."
-        ],
-        'Diet': [
-            "Protein-rich foods to maintain strength.",
-            "Whole grains, legumes, and green leafy vegetables.",
-            "Fruits high in vitamin C and antioxidants.",
-            "Hydration and small frequent nutritious meals if breathless."
-        ],
-        'Avoid': [
-            "Processed meats",
-            "Excessive alcohol",
-            "Burnt foods",
-            "Exposure to smoke"
-            "Industrial fume"
-            "Strong chemicals"
-        ],
-        'Yoga_Asanas': [
-            "Bhujangasana (Cobra Pose)",
-            "Anulom Vilom (Alternate Nostril Breathing)",
-            "Bhastrika Pranayama (Bellows Breath)",
-            "Matsyasana (Fish Pose)",
-            "Ardha Chakrasana (Half Wheel Pose)"
-        ],
-        'Home_Remedies_daily': [
-            "Ginger tea — relieves nausea and inflammation.",
-            "Tulsi (Holy Basil) — supports respiratory health.",
-            "Turmeric milk — reduces inflammation.",
-            "Steam inhalation with eucalyptus oil — clears airways.",
-            "Green leafy vegetables & fruits — antioxidants for cell protection."
-        ],
-        'Home_Remedies_emergency': [
-            "Sit upright or lean slightly forward; never lie flat.",
-            "Use a fan or open window for fresh air.",
-            "Sip warm water to soothe airways.",
-            "Steam inhalation with eucalyptus oil to clear mucus.",
-            "Avoid smoke or incense; if coughing blood or severe pain, seek emergency help."
-        ],
-        'Medication_Emergency': [
-            "Oxygen therapy for breathlessness.",
-            "Low-dose Morphine for pain (under doctor supervision).",
-            "Bronchodilators (Salbutamol / Ipratropium).",
-            "Broad-spectrum antibiotics if infection.",
-            "Steroids (Dexamethasone) to reduce swelling."
-        ],
-        'Emergency_Precautions': [
-            "If severe breathlessness occurs.",
-            "Bluish lips/fingertips.",
-            "Sudden chest pain — call emergency services immediately.",
-            "Use rescue inhaler/nebulizer promptly if prescribed and trained by clinician."
-        ],
-        'Medication_Precautions': [
-            "Carry and know how to use inhaler or nebulizer",
-            "Rinse mouth after steroid inhalers.",
-            "Do not stop corticosteroids or long-term inhalers abruptly without medical advice."
-        ]
-    }
-
-    # ------------------------ THYROID ------------------------
-    tips['thyroid'] = {
-        'Precautions': [
-            "Take thyroid medication on an empty stomach as prescribed.",
-            "Regularly monitor TSH/T3/T4 levels as advised.",
-            "Avoid excessive raw goitrogenic foods.",
-            "Manage stress and maintain healthy sleep patterns."
-        ],
-        'Diet': [
-            "Selenium-rich foods (eggs, tuna, sunflower seeds).",
-            "Moderate iodine sources (iodized salt, dairy).",
-            "Antioxidant-rich foods (berries, nuts, green tea).",
-            "Omega-3 fatty acids (fatty fish, flaxseeds).",
-            "Balanced diet with whole grains, lean protein and vegetables."
-        ],
-        'Avoid': [
-            "Large amounts of soy, "
-            "Raw cruciferous vegetables (cabbage, broccoli) if advised to limit.",
-            "Excessive iodine (supplements, salt) if not needed.",
-            "Excessive raw goitrogenic foods.",
-            "Excessive caffeine and processed sugary foods."
-        ],
-        'Yoga_Asanas': [
-            "Sarvangasana (Shoulder Stand) – only if safe for patient",
-            "Matsyasana (Fish Pose)",
-            "Halasana (Plow Pose)",
-            "Bhujangasana (Cobra Pose)",
-            "Ujjayi Pranayama (Victorious Breath)."
-        ],
-        'Home_Remedies_daily': [
-            "Coconut oil — supports thyroid function.",
-            "Iodine-rich foods like:"
-            " - seaweed "
-            " - eggs "
-            " - dairy (if needed).",
-            "Ginger & turmeric — anti-inflammatory.",
-            "Avoid excessive raw goitrogenic foods",
-            "Stay hydrated and maintain a high-fiber diet."
-        ],
-        'Home_Remedies_emergency': [
-            "Drink warm water with honey & lemon for mild energy.",
-            "Eat iodine-rich foods (milk, eggs, iodized salt) if allowed.",
-            "Keep body warm with blankets.",
-            "Take thyroid medicine (Levothyroxine) on time daily.",
-            "Avoid lying down immediately after taking the pill."
-        ],
-        'Medication_Emergency': [
-            "IV Levothyroxine (for myxedema coma, hospital use).",
-            "Hydrocortisone injection for adrenal support.",
-            "IV Normal Saline to maintain BP/hydration.",
-            "Oxygen therapy and warming blankets for low body temperature."
-        ],
-        'Emergency_Precautions': [
-            "If sudden severe fatigue, chest pain, fainting, "
-            "Irregular heartbeat — seek emergency help.",
-            "If signs of extreme hypo- or hyperthyroid state (confusion, high fever, dehydration) — urgent care needed."
-        ],
-        'Medication_Precautions': [
-            "Take Levothyroxine early in the morning on empty stomach; "
-            "Avoid iron/calcium within 4 hours.",
-            "Do not switch brands without consulting doctor ",
-            "Check levels after any change."
-        ]
-    }
-
-    return tips.get(disease.lower(), None)
-
-
 def show_nearby_doctors(disease):
     """Display nearby doctors for the given disease/specialist type."""
     specialist = SPECIALIST_MAP.get(disease.lower(), "general practitioner")
@@ -634,56 +332,21 @@ def show_health_tips(disease):
         return
 
     try:
-        info = get_health_tips(disease)
+        sections = health_tips.rendered(disease.lower())
     except Exception as e:
         st.error(f"Failed to load health tips: {e}")
         return
 
-    if not info:
+    if not sections:
         st.warning("No tips available for this disease.")
         return
 
     st.markdown(f"## 🩺 Health Guidance for **{disease.capitalize()}**")
     st.write("---")
 
-    with st.expander("🧘 Yoga Asanas (Recommended)"):
-        for i in info.get('Yoga_Asanas', []):
-            st.write(f"- {i}")
-
-    with st.expander("⚠️ Precautions to Follow"):
-        for i in info.get('Precautions', []):
-            st.write(f"- {i}")
-
-    with st.expander("🥗 Diet Recommendations & 🚫 Foods to Avoid"):
-        if info.get('Diet'):
-            st.markdown("**✅ Recommended Diet:**")
-            for i in info.get('Diet', []):
-                st.write(f"- {i}")
-
-        if info.get('Avoid'):
-            st.markdown("**🚫 Avoid:**")
-            for i in info.get('Avoid', []):
-                st.write(f"- {i}")
-
-    with st.expander("🏠 Daily Home Remedies"):
-        for i in info.get('Home_Remedies_daily', []):
-            st.write(f"- {i}")
-
-    with st.expander("🚨 Emergency Home Remedies"):
-        for i in info.get('Home_Remedies_emergency', []):
-            st.write(f"- {i}")
-
-    with st.expander("💊 Emergency Medicines (For Knowledge Only)"):
-        for i in info.get('Medication_Emergency', []):
-            st.write(f"- {i}")
-
-    with st.expander("🆘 Emergency Precautions"):
-        for i in info.get('Emergency_Precautions', []):
-            st.write(f"- {i}")
-
-    with st.expander("💊 Medication & Treatment Precautions"):
-        for i in info.get('Medication_Precautions', []):
-            st.write(f"- {i}")
+    for title, body in sections:
+        with st.expander(title):
+            st.markdown(body)
 
     st.success("✅ Stay consistent with medication, yoga, and a healthy lifestyle for better health!")
 
@@ -908,15 +571,38 @@ def show_nearby_doctors(disease_key):
 # ---------------------------
 # Prediction history
 # ---------------------------
-if "prediction_history" not in st.session_state:
-    st.session_state["prediction_history"] = []
+# Persisted in SQLite by a background writer (history_store.py); the
+# session only keeps its id so the history page can filter to it. Each
+# insert also updates the per-model/per-patient aggregates in O(1).
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 
-def add_history(record):
-    st.session_state["prediction_history"].append(record)
+# OCR values, previews and export files are held in session_memory rather
+# than st.session_state: they count against a per-session and a global
+# budget, spill to disk when over it, and go away with idle sessions.
+session_memory.default.touch(st.session_state["session_id"])
 
-def export_history_csv():
-    df = pd.DataFrame(st.session_state["prediction_history"])
-    return df.to_csv(index=False).encode("utf-8")
+def session_get(name, default=None):
+    return session_memory.default.get(st.session_state["session_id"], name, default)
+
+def session_put(name, value, **kw):
+    return session_memory.default.put(st.session_state["session_id"], name, value, **kw)
+
+def add_history(record):
+    record.setdefault("session_id", st.session_state["session_id"])
+    record.setdefault("patient_id", st.session_state.get("patient_id", "").strip() or None)
+    history_store.append(record)
+
+def export_history(fmt, **filters):
+    # Built only when asked for, streamed chunk by chunk into a temp file,
+    # then read once for the download button and deleted. Later reruns do
+    # not hold the export in memory; preparing it again rebuilds it.
+    path = history_store.export_to_tempfile(fmt, **filters)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
 
 # ---------------------------
 # Feature importance helpers
@@ -949,6 +635,7 @@ def show_feature_importance_for_pipeline(pipeline):
         clf = pipeline.named_steps["clf"]
         feature_names = extract_feature_names_from_preprocessor(pre)
         importances = clf.feature_importances_
+        import pandas as pd
         imp_df = pd.DataFrame({"feature": feature_names, "importance": importances})
         imp_df = imp_df.sort_values("importance", ascending=False).reset_index(drop=True)
         st.markdown("#### 🔎 Feature importances (from RandomForest)")
@@ -956,91 +643,19 @@ def show_feature_importance_for_pipeline(pipeline):
     except Exception as e:
         st.info("No feature importance available or error: " + str(e))
 
-# ---------------------------
-# OCR helpers (robust)
-# ---------------------------
-ocr_patterns = {
-    "Glucose": r"(?:fasting\s*blood\s*glucose|fasting\s*glucose|glucose|fbg|blood\s*sugar)[:\s\-]*([0-9]+\.?[0-9]*)",
-    "Cholesterol": r"(?:cholesterol|chol)[:\s\-]*([0-9]+\.?[0-9]*)",
-    "TSH": r"(?:tsh|thyroid stimulating hormone|thyroid-stimulating hormone)[:\s\-]*([0-9]+\.?[0-9]*)",
-    "T3": r"(?:t3[, ]*total|t3 total|t3[, ]*serum)[:\s\-]*([0-9]+\.?[0-9]*)",
-    "T4": r"(?:t4[, ]*total|t4 total|t4[, ]*serum|t4[, ]*mcg)[:\s\-]*([0-9]+\.?[0-9]*)"
-}
-
-def safe_float(s):
-    if s is None:
-        raise ValueError("None")
-    s = str(s).strip()
-    s = s.replace(",", ".")
-    s = re.sub(r"[^\d\.\-eE]", "", s)
-    if s in ["", ".", "-", "--", "..."]:
-        raise ValueError("invalid")
-    return float(s)
-
-def extract_numbers_from_text(text):
-    raw = re.findall(r"\d+(?:[\.,]\d+)?", text)
-    cleaned = []
-    for token in raw:
-        tok = token.strip()
-        if tok in ["", ".", ","]:
-            continue
-        cleaned.append(tok)
-    return cleaned
-
-def extract_named_values(text):
-    text_low = text.lower()
-    found = {}
-    for key, pat in ocr_patterns.items():
-        m = re.search(pat, text_low, re.IGNORECASE)
-        if m:
-            try:
-                found[key] = safe_float(m.group(1))
-            except Exception:
-                pass
-    if not all(k in found for k in ("T3", "T4", "TSH", "Glucose", "Cholesterol")):
-        numbers = extract_numbers_from_text(text_low)
-        for key in ["T3", "T4", "TSH", "Glucose", "Cholesterol"]:
-            if key in found:
-                continue
-            idx = text_low.find(key.lower())
-            if idx != -1:
-                tail = text_low[idx:idx+120]
-                nums = extract_numbers_from_text(tail)
-                if nums:
-                    try:
-                        found[key] = safe_float(nums[0])
-                    except Exception:
-                        pass
-        if len(found) < 3 and numbers:
-            fill_order = ["T3", "T4", "TSH", "Glucose", "Cholesterol"]
-            j = 0
-            for k in fill_order:
-                if k in found:
-                    continue
-                if j < len(numbers):
-                    try:
-                        found[k] = safe_float(numbers[j])
-                    except Exception:
-                        pass
-                    j += 1
-    return found
-
 # ---------------------------
 # Prediction helper
 # ---------------------------
 def predict_and_record(key, arr):
+    import microbatch   # numpy
     if key not in models:
         st.error(f"{key} model not available.")
         return None, None
     try:
-        model = models[key]
-        pred = model.predict([arr])[0]
-        prob = None
-        if hasattr(model, "predict_proba"):
-            try:
-                prob = model.predict_proba([arr])[0][1]
-            except Exception:
-                prob = None
+        # coalesced with concurrent sessions' requests for the same model
+        with metrics.timed("predict_seconds", model=key):
+            pred, prob = microbatch.predict(key, arr)
+        metrics.inc("predictions_total", model=key, outcome="positive" if int(pred) == 1 else "negative")
 
         now = datetime.utcnow().isoformat()
         add_history({
@@ -1053,14 +668,84 @@ def predict_and_record(key, arr):
         return int(pred), prob
 
     except Exception as e:
+        metrics.inc("predictions_total", model=key, outcome="error")
         st.error("Prediction error: " + str(e))
         return None, None
 
 
+# (button, model key, tips key, display name) for the OCR page
+OCR_PREDICTIONS = [
+    ("❤️ Predict Heart Disease", "heart_disease", "heart", "Heart Disease"),
+    ("🧬 Predict Thyroid", "thyroid", "thyroid", "Hypothyroid"),
+    ("🩸 Predict Diabetes", "diabetes", "diabetes", "Diabetes"),
+    ("🫁 Predict Lung Cancer", "lung_cancer", "lungs", "Lung Cancer"),
+    ("🧠 Predict Parkinson's", "parkinsons", "parkinsons", "Parkinson's"),
+]
+
+
+def show_risk_panel(values):
+    """Score every loaded model from one value set and show a combined panel."""
+    import screening   # numpy
+    titles = {key: title for _, key, _, title in OCR_PREDICTIONS}
+    keys = [key for _, key, _, _ in OCR_PREDICTIONS if key in models]
+    panel = screening.risk_panel(values, keys)
+
+    now = datetime.utcnow().isoformat()
+    rows = []
+    for entry in panel:
+        if entry["error"] is None:
+            add_history({
+                "time": now,
+                "model": entry["model"],
+                "inputs": entry["inputs"],
+                "prediction": entry["prediction"],
+                "prob": entry["probability"],
+            })
+        prob = entry["probability"]
+        rows.append({
+            "Condition": titles[entry["model"]],
+            "Result": entry["error"] or ("POSITIVE" if entry["prediction"] == 1 else "NEGATIVE"),
+            "Probability": None if prob is None else round(prob, 3),
+            # SVM decision margin: a distance from the boundary, not a probability
+            "Margin": None if entry["margin"] is None else round(entry["margin"], 3),
+            "From report": f"{len(entry['matched'])}/{entry['n_features']} features",
+        })
+
+    st.markdown("### 🩺 Combined Risk Panel")
+    st.dataframe(rows, hide_index=True)
+    st.caption("Features not found in the report use typical defaults; open a condition's "
+               "page to review or complete its inputs.")
+
+
+def schema_inputs(key, auto=None):
+    """Render one input per schema feature (prefilled from OCR); return the vector."""
+    import schemas   # numpy
+    prefill = schemas.fill(key, auto)
+    values = []
+    for f, pre in zip(schemas.SCHEMAS[key], prefill):
+        if f.options:
+            choices = [v for v, _ in f.options]
+            labels = dict(f.options)
+            index = choices.index(int(pre)) if int(pre) in choices else choices.index(f.default)
+            values.append(st.selectbox(f.label, choices, index=index, format_func=labels.get))
+        elif f.dtype == "int":
+            pre = min(max(int(pre), f.lo), f.hi)
+            values.append(st.number_input(f.label, int(f.lo), int(f.hi), pre, step=int(f.step or 1)))
+        else:
+            pre = min(max(float(pre), f.lo), f.hi)
+            fmt = "%.6f" if abs(f.default) < 1 else None
+            values.append(st.number_input(f.label, float(f.lo), float(f.hi), pre,
+                                          step=f.step, format=fmt))
+    return values
+
+
 # ---------------------------
 # BEAUTIFUL Upload Report (OCR) + Direct Predictions Page
 # ---------------------------
 if page == "Upload Report (Image)":
+    import ocr_pages
+    import schemas
+    from ocr_extract import extract_named_values, extract_numbers_from_text
 
     # ===== Page Header =====
     st.markdown("""
@@ -1100,7 +785,7 @@ if page == "Upload Report (Image)":
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">📤 Upload Medical Report</div>', unsafe_allow_html=True)
 
-    uploaded_file = st.file_uploader("Upload image report", type=["png","jpg","jpeg"])
+    uploaded_file = st.file_uploader("Upload report (image, multi-page PDF or TIFF)", type=ocr_pages.UPLOAD_TYPES)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1111,8 +796,17 @@ if page == "Upload Report (Image)":
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.markdown('<div class="section-title">🖼 Uploaded Image</div>', unsafe_allow_html=True)
 
-        img = Image.open(uploaded_file).convert("RGB")
-        st.image(img, use_container_width=True)
+        upload_bytes = uploaded_file.getvalue()
+        upload_digest = hashlib.sha256(upload_bytes).hexdigest()
+        try:
+            # PDFs/TIFFs are rendered once per upload, not on every rerun
+            cached_preview = session_get("preview")
+            if cached_preview is None or cached_preview[0] != upload_digest:
+                cached_preview = session_put(
+                    "preview", (upload_digest, ocr_pages.preview_image(upload_bytes, uploaded_file.name)))
+            st.image(cached_preview[1], use_container_width=True)
+        except Exception as e:
+            st.warning("Preview unavailable: " + str(e))
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1120,17 +814,36 @@ if page == "Upload Report (Image)":
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.markdown('<div class="section-title">📜 Extracted Text (OCR)</div>', unsafe_allow_html=True)
 
+        # Cached by content hash: reruns and other sessions with the same
+        # file skip Tesseract entirely. Pages of PDFs/TIFFs are OCR'd in
+        # parallel and streamed into the placeholder as they finish.
+        ocr_progress = st.empty()
+        ocr_stream = st.empty()
+
+        def show_partial(texts, done, total):
+            ocr_progress.progress(done / total, text=f"OCR page {done}/{total}")
+            ocr_stream.code(ocr_pages.partial_text(texts))
+
         try:
-            import pytesseract
-            text = pytesseract.image_to_string(img)
+            ocr_result, ocr_cached = ocr_pages.ocr_document(
+                upload_bytes, uploaded_file.name, on_page=show_partial)
+            text = ocr_result["text"]
+            named = dict(ocr_result["values"])
+            if ocr_cached:
+                st.caption("♻️ OCR result reused from cache")
+            elif ocr_result.get("timings"):
+                with st.expander("⏱ OCR stage timings (ms)"):
+                    st.json({k: round(v, 1) for k, v in ocr_result["timings"].items()})
         except Exception as e:
             text = ""
+            named = extract_named_values(text)
             st.error("OCR failed: " + str(e))
+        ocr_progress.empty()
+        ocr_stream.empty()
 
         st.text_area("Extracted Text", text, height=260)
 
-        named = extract_named_values(text)
-        st.session_state["ocr_values"] = named
+        session_put("ocr_values", named)
 
         if named:
             st.markdown("### 🧾 Values Recognized")
@@ -1154,117 +867,152 @@ if page == "Upload Report (Image)":
             show_nearby_doctors(st.session_state["last_predicted_disease"])
 
     
-        # ==============================
-        # HEART DISEASE
-        # ==============================
-        if st.button("❤️ Predict Heart Disease"):
-            age = int(named.get("Age", 45))
-            bp = float(named.get("BloodPressure", 120))
-            chol = float(named.get("Cholesterol", 200))
-
-            arr = [age, 1, 0, bp, chol, 0, 0, 140, 0, 1.0, 1, 0, 1]
-            pred, prob = predict_and_record("heart_disease", arr)
+        if st.button("🩺 Screen all conditions", type="primary"):
+            show_risk_panel(named)
+
+        # Unrecognised features fall back to the schema defaults
+        for label, key, tips_key, title in OCR_PREDICTIONS:
+            if st.button(label):
+                arr = schemas.fill(key, named)
+                pred, prob = predict_and_record(key, arr)
+                st.session_state["last_predicted_disease"] = tips_key
+
+                if pred == 1:
+                    st.error(f"{title}: POSITIVE ({prob})")
+                    show_health_tips(tips_key)
+                    show_nearby_doctors(tips_key)
+                else:
+                    st.success(f"{title}: NEGATIVE ({prob})")
+                    show_nearby_doctors(tips_key)
 
-            st.session_state["last_predicted_disease"] = "heart"
+        st.markdown("</div>", unsafe_allow_html=True)
 
-            if pred == 1:
-                st.error(f"Heart Disease: POSITIVE ({prob})")
-                show_health_tips("heart")
-                show_nearby_doctors("heart")
-            else:
-                st.success(f"Heart Disease: NEGATIVE ({prob})")
-                show_nearby_doctors("heart")
-
-        # ==============================
-        # THYROID
-        # ==============================
-        if st.button("🧬 Predict Thyroid"):
-            arr = [
-                int(named.get("Age", 40)), 1, 0,
-                float(named.get("TSH", 3.5)),
-                1,
-                float(named.get("T3", 100)),
-                float(named.get("T4", 8))
-            ]
-
-            pred, prob = predict_and_record("thyroid", arr)
-            st.session_state["last_predicted_disease"] = "thyroid"
+        st.markdown("""
+            <p style="text-align:center; color:#FFEBB0; margin-top:20px;">
+                ⚠ Please verify extracted values before trusting predictions.
+            </p>
+        """, unsafe_allow_html=True)
 
-            if pred == 1:
-                st.error(f"Hypothyroid: POSITIVE ({prob})")
-                show_health_tips("thyroid")
-                show_nearby_doctors("thyroid")
-            else:
-                st.success(f"Hypothyroid: NEGATIVE ({prob})")
-                show_nearby_doctors("thyroid")
+# ---------------------------
+# Bulk Report OCR (background jobs)
+# ---------------------------
+# Many files or a ZIP are OCR'd by ocr_jobs on a worker pool while this
+# page only polls; uploading a different set cancels the previous job.
+if page == "Bulk Report OCR":
+    import time
+    import json
+    import ocr_jobs
+    import ocr_pages
 
-        # ==============================
-        # DIABETES
-        # ==============================
-        if st.button("🩸 Predict Diabetes"):
-            arr = [
-                0,
-                float(named.get("Glucose", 120)),
-                float(named.get("BloodPressure", 70)),
-                20, 80, 26, 0.5,
-                int(named.get("Age", 30))
-            ]
+    st.markdown('<div class="glass">', unsafe_allow_html=True)
+    st.header("🗂 Bulk Report OCR")
+    st.write("Upload several reports, or one ZIP of them. They are OCR'd in the background; "
+             "pick any finished report to prefill the prediction pages.")
+
+    bulk_files = st.file_uploader("Upload reports or a ZIP", type=ocr_pages.UPLOAD_TYPES + ["zip"],
+                                  accept_multiple_files=True)
+    sid = st.session_state["session_id"]
+    if bulk_files:
+        # by content, like the OCR cache: a changed file under the same name is a new job
+        signature = [(f.name, hashlib.sha256(f.getvalue()).hexdigest()) for f in bulk_files]
+        if signature != session_get("bulk_signature"):
+            try:
+                ocr_jobs.submit(sid, [(f.name, f.getvalue()) for f in bulk_files])
+                session_put("bulk_signature", signature)
+            except Exception as e:
+                st.error("Could not start OCR job: " + str(e))
 
-            pred, prob = predict_and_record("diabetes", arr)
-            st.session_state["last_predicted_disease"] = "diabetes"
+    job_id = ocr_jobs.latest(sid)
+    job = ocr_jobs.get(job_id) if job_id else None
+    if job is None:
+        st.info("No OCR job yet.")
+    else:
+        running = job["status"] in (ocr_jobs.QUEUED, ocr_jobs.RUNNING)
+        st.progress(job["finished"] / job["total"],
+                    text=f"{job['finished']}/{job['total']} documents · {job['status']}")
+        if running and st.button("⏹ Cancel job"):
+            ocr_jobs.cancel(job_id)
+            st.rerun()
 
+        st.dataframe([
+            {
+                "Document": d["name"],
+                "Status": d["status"],
+                "Pages": d["pages"],
+                "Seconds": d["seconds"],
+                "Cached": None if d["cached"] is None else bool(d["cached"]),
+                "Values found": len(d["values"] or {}),
+                "Error": d["error"],
+            }
+            for d in job["documents"]
+        ], hide_index=True)
+
+        finished_docs = [d for d in job["documents"] if d["status"] == ocr_jobs.DONE]
+        if finished_docs:
+            chosen = st.selectbox("Report", [d["name"] for d in finished_docs])
+            chosen_values = next(d["values"] for d in finished_docs if d["name"] == chosen)
+            st.json(chosen_values)
+            if st.button("Use these values on the prediction pages"):
+                session_put("ocr_values", dict(chosen_values))
+                st.success("Values loaded — open any prediction page.")
+            st.download_button(
+                "Download all results (JSON)",
+                data=json.dumps({d["name"]: d["values"] for d in finished_docs}, indent=2),
+                file_name="ocr_results.json", mime="application/json",
+            )
 
-            if pred == 1:
-                st.error(f"Diabetes: POSITIVE ({prob})")
-                show_health_tips("diabetes")
-                show_nearby_doctors("diabetes")
-            else:
-                st.success(f"Diabetes: NEGATIVE ({prob})")
-                show_nearby_doctors("diabetes")
+        if running:
+            time.sleep(1.0)   # poll; any interaction interrupts the wait
+            st.rerun()
 
-        # ==============================
-        # LUNG CANCER
-        # ==============================
-        if st.button("🫁 Predict Lung Cancer"):
-            arr = [1, int(named.get("Age", 45)),
-                   0,0,0,0,0,0,0,0,0,0,0,0,0]
+    st.markdown("</div>", unsafe_allow_html=True)
 
-            pred, prob = predict_and_record("lung_cancer", arr)
-            st.session_state["last_predicted_disease"] = "lungs"
+# ---------------------------
+# Batch Screening (CSV / Parquet)
+# ---------------------------
+if page == "Batch Screening":
+    import batch   # pandas
+    import schemas
+    st.markdown('<div class="glass">', unsafe_allow_html=True)
+    st.header("📑 Batch Screening")
+    st.write("Upload a CSV or Parquet file with one patient per row. Columns are matched "
+             "to each model's training features (case, spaces and underscores ignored).")
 
+    batch_file = st.file_uploader("Upload patient table", type=["csv", "parquet", "pq"])
 
-            if pred == 1:
-                st.error(f"Lung Cancer: POSITIVE ({prob})")
-                show_health_tips("lungs")
-                show_nearby_doctors("lungs")
-            else:
-                st.success(f"Lung Cancer: NEGATIVE ({prob})")
-                show_nearby_doctors("lungs")
+    if batch_file:
+        head = next(batch.iter_frames(batch_file, filename=batch_file.name, chunk_size=50))
+        batch_file.seek(0)
+        st.dataframe(head)
 
-        # ==============================
-        # PARKINSON’S
-        # ==============================
-        if st.button("🧠 Predict Parkinson's"):
-            arr = [0] * 22   # placeholder values
+        usable = schemas.applicable_models(head.columns, models)
+        for key in models:
+            if key not in usable:
+                _, missing = schemas.resolve_columns(head.columns, key)
+                st.caption(f"{key}: missing {', '.join(missing)}")
 
-            pred, prob = predict_and_record("parkinsons", arr)
-            st.session_state["last_predicted_disease"] = "parkinsons"
+        selected = st.multiselect("Models to run", usable, default=usable)
+        chunk_size = st.number_input("Rows per chunk", 100, 100000, batch.DEFAULT_CHUNK_SIZE, step=100)
+        out_fmt = st.selectbox("Output format", ["csv", "parquet"])
 
-            if pred == 1:
-                st.error(f"Parkinson's: POSITIVE ({prob})")
-                show_health_tips("parkinsons")
-                show_nearby_doctors("parkinsons")
+        if st.button("▶ Run batch screening", disabled=not selected):
+            progress = st.empty()
+            try:
+                data = batch.screen_to_bytes(
+                    batch_file, models, keys=selected, filename=batch_file.name,
+                    chunk_size=int(chunk_size), fmt=out_fmt,
+                    on_chunk=lambda n: progress.write(f"Scored {n:,} rows…"),
+                )
+            except Exception as e:
+                st.error("Batch screening failed: " + str(e))
             else:
-                st.success(f"Parkinson's: NEGATIVE ({prob})")
-                show_nearby_doctors("parkinsons")
-
-        st.markdown("</div>", unsafe_allow_html=True)
+                st.success("Batch screening complete.")
+                st.download_button(
+                    "Download results", data=data,
+                    file_name=f"screening_results.{out_fmt}",
+                )
 
-        st.markdown("""
-            <p style="text-align:center; color:#FFEBB0; margin-top:20px;">
-                ⚠ Please verify extracted values before trusting predictions.
-            </p>
-        """, unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
 
 # ---------------------------
 # Diabetes Page (FIXED)
@@ -1274,19 +1022,11 @@ if page == "Diabetes Prediction":
     st.header("🩸 Diabetes Prediction")
     st.write("Enter patient features and press Predict")
 
-    auto = st.session_state.get("ocr_values", {}) or {}
+    auto = session_get("ocr_values", {}) or {}
 
-    Pregnancies = st.number_input("Number of Pregnancies", 0, 50, 0)
-    Glucose = st.number_input("Glucose Level", 0.0, 1000.0, float(auto.get("Glucose", 100.0)))
-    BloodPressure = st.number_input("Blood Pressure", 0.0, 300.0, float(auto.get("BloodPressure", 70.0)))
-    SkinThickness = st.number_input("Skin Thickness", 0.0, 100.0, float(auto.get("SkinThickness", 20.0)))
-    Insulin = st.number_input("Insulin Level", 0.0, 2000.0, float(auto.get("Insulin", 80.0)))
-    BMI = st.number_input("BMI", 0.0, 100.0, float(auto.get("BMI", 28.0)))
-    DiabetesPedigreeFunction = st.number_input("Diabetes Pedigree Function", 0.0, 10.0, float(auto.get("DiabetesPedigreeFunction", 0.5)))
-    Age = st.number_input("Age", 0, 120, int(auto.get("Age", 30)))
+    arr = schema_inputs("diabetes", auto)
 
     if st.button("🔍 Predict Diabetes"):
-        arr = [Pregnancies, Glucose, BloodPressure, SkinThickness, Insulin, BMI, DiabetesPedigreeFunction, Age]
         pred, prob = predict_and_record("diabetes", arr)
 
         if pred == 1:
@@ -1308,71 +1048,11 @@ if page == "Heart Disease Prediction":
     st.markdown('<div class="glass">', unsafe_allow_html=True)
     st.header("❤️ Heart Disease Prediction")
 
-    auto = st.session_state.get("ocr_values", {}) or {}
-
-    age = st.number_input("Age", min_value=0, max_value=120, value=int(auto.get("Age", 45)))
+    auto = session_get("ocr_values", {}) or {}
 
-    sex = st.selectbox("Sex (1 = Male, 0 = Female)", [1, 0], index=0)
-
-    cp = st.number_input("Chest Pain Type (0–3)", min_value=0, max_value=3,
-                         value=int(auto.get("cp", 0)))
-
-    trestbps = st.number_input(
-        "Resting Blood Pressure (mm Hg)",
-        min_value=0.0, max_value=300.0,
-        value=float(auto.get("BloodPressure", 120.0)),
-        step=1.0
-    )
-
-    chol = st.number_input(
-        "Serum Cholesterol (mg/dL)",
-        min_value=0.0, max_value=1000.0,
-        value=float(auto.get("Cholesterol", 200.0)),
-        step=1.0
-    )
-
-    fbs = st.selectbox("Fasting Blood Sugar > 120 mg/dL (1 = Yes, 0 = No)", [1, 0], index=1)
-
-    restecg = st.number_input("Resting ECG Results (0–2)", min_value=0, max_value=2, value=0)
-
-    thalach = st.number_input(
-        "Max Heart Rate Achieved",
-        min_value=0, max_value=300,
-        value=int(auto.get("thalach", 140)),
-        step=1
-    )
-
-    exang = st.selectbox("Exercise Induced Angina (1 = Yes, 0 = No)", [1, 0], index=1)
-
-    oldpeak = st.number_input(
-        "ST Depression Induced by Exercise",
-        min_value=0.0, max_value=10.0,
-        value=float(auto.get("oldpeak", 1.0)),
-        step=0.1
-    )
-
-    slope = st.number_input(
-        "Slope of ST Segment (0–2)",
-        min_value=0, max_value=2,
-        value=int(auto.get("slope", 1))
-    )
-
-    ca = st.number_input(
-        "Major Vessels Colored by Fluoroscopy (0–3)",
-        min_value=0, max_value=3,
-        value=int(auto.get("ca", 0))
-    )
-
-    thal = st.number_input(
-        "Thal (0 = Normal, 1 = Fixed Defect, 2 = Reversible Defect)",
-        min_value=0, max_value=3,
-        value=int(auto.get("thal", 1))
-    )
+    arr = schema_inputs("heart_disease", auto)
 
     if st.button("🔍 Predict Heart Disease"):
-        arr = [age, sex, cp, trestbps, chol, fbs, restecg,
-               thalach, exang, oldpeak, slope, ca, thal]
-
         pred, prob = predict_and_record("heart_disease", arr)
 
         if pred == 1:
@@ -1395,52 +1075,12 @@ if page == "Parkinsons Prediction":
 
     st.write("Enter the voice measurement features below:")
 
-    auto = st.session_state.get("ocr_values", {}) or {}
-
-    # Correct feature order
-    parkin_features = [
-        "MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)",
-        "MDVP:Jitter(%)", "MDVP:Jitter(Abs)", "MDVP:RAP",
-        "MDVP:PPQ", "Jitter:DDP", "MDVP:Shimmer",
-        "MDVP:Shimmer(dB)", "Shimmer:APQ3", "Shimmer:APQ5",
-        "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR",
-        "RPDE", "DFA", "spread1", "spread2", "PPE"
-    ]
-
-    # Safe defaults (typical dataset averages)
-    defaults = {
-        "MDVP:Fo(Hz)": 150.0, "MDVP:Fhi(Hz)": 200.0, "MDVP:Flo(Hz)": 100.0,
-        "MDVP:Jitter(%)": 0.005, "MDVP:Jitter(Abs)": 0.00006, "MDVP:RAP": 0.003,
-        "MDVP:PPQ": 0.004, "Jitter:DDP": 0.009, "MDVP:Shimmer": 0.03,
-        "MDVP:Shimmer(dB)": 0.3, "Shimmer:APQ3": 0.02, "Shimmer:APQ5": 0.03,
-        "MDVP:APQ": 0.03, "Shimmer:DDA": 0.09, "NHR": 0.02, "HNR": 20.0,
-        "RPDE": 0.5, "DFA": 0.65, "spread1": -5.0, "spread2": 0.5, "PPE": 0.2
-    }
-
-    parkin_values = []
+    auto = session_get("ocr_values", {}) or {}
 
     st.subheader("Voice Features:")
-    for feat in parkin_features:
-        # allow OCR autofill loosely
-        pre = defaults[feat]
-        for k, v in auto.items():
-            try:
-                if feat.lower().replace(":", "").replace("(", "").replace(")", "").replace("%","").replace("-","") in k.lower().replace(":", ""):
-                    pre = float(v)
-                    break
-            except:
-                pass
-
-        val = st.number_input(feat, value=float(pre), format="%.6f")
-        parkin_values.append(val)
+    arr = schema_inputs("parkinsons", auto)
 
-    # Predict button outside the input loop
     if st.button("🔍 Predict Parkinson's"):
-        # Ensure vector matches model expected length (pad with zeros if needed)
-        while len(parkin_values) < 22:
-            parkin_values.append(0.0)
-
-        arr = parkin_values.copy()
         pred, prob = predict_and_record("parkinsons", arr)
 
         if pred is not None:
@@ -1464,45 +1104,9 @@ if page == "Lung Cancer Prediction":
 
     st.write("Answer the survey-style medical questions:")
 
-    auto = st.session_state.get("ocr_values", {}) or {}
-
-    # Correct feature order
-    lung_features = [
-        "GENDER","AGE","SMOKING","YELLOW_FINGERS","ANXIETY","PEER_PRESSURE",
-        "CHRONIC_DISEASE","FATIGUE","ALLERGY","WHEEZING","ALCOHOL_CONSUMING",
-        "COUGHING","SHORTNESS_OF_BREATH","SWALLOWING_DIFFICULTY","CHEST_PAIN"
-    ]
-
-    gender = st.selectbox("Gender", ["Male", "Female"])
-    age = st.number_input("Age", 0, 120, int(auto.get("Age", 40)))
-
-    def yn_to_num(choice):
-        return 1 if choice == "Yes" else 0
-
-    smoking = st.selectbox("Smoking", ["No", "Yes"])
-    yellow_fingers = st.selectbox("Yellow Fingers", ["No", "Yes"])
-    anxiety = st.selectbox("Anxiety", ["No", "Yes"])
-    peer_pressure = st.selectbox("Peer Pressure", ["No", "Yes"])
-    chronic_disease = st.selectbox("Chronic Disease", ["No", "Yes"])
-    fatigue = st.selectbox("Fatigue", ["No", "Yes"])
-    allergy = st.selectbox("Allergy", ["No", "Yes"])
-    wheezing = st.selectbox("Wheezing", ["No", "Yes"])
-    alcohol = st.selectbox("Alcohol Consumption", ["No", "Yes"])
-    coughing = st.selectbox("Coughing", ["No", "Yes"])
-    shortness = st.selectbox("Shortness of Breath", ["No", "Yes"])
-    swallowing = st.selectbox("Swallowing Difficulty", ["No", "Yes"])
-    chest_pain = st.selectbox("Chest Pain", ["No", "Yes"])
-
-    gender_num = 1 if gender == "Male" else 0
-
-    arr = [
-        gender_num, int(age),
-        yn_to_num(smoking), yn_to_num(yellow_fingers), yn_to_num(anxiety),
-        yn_to_num(peer_pressure), yn_to_num(chronic_disease), yn_to_num(fatigue),
-        yn_to_num(allergy), yn_to_num(wheezing), yn_to_num(alcohol),
-        yn_to_num(coughing), yn_to_num(shortness), yn_to_num(swallowing),
-        yn_to_num(chest_pain)
-    ]
+    auto = session_get("ocr_values", {}) or {}
+
+    arr = schema_inputs("lung_cancer", auto)
 
     if st.button("🔍 Predict Lung Cancer"):
         pred, prob = predict_and_record("lung_cancer", arr)
@@ -1524,44 +1128,11 @@ if page == "Hypo-Thyroid Prediction":
     st.markdown('<div class="glass">', unsafe_allow_html=True)
     st.header("🧬 Hypo-Thyroid Prediction")
 
-    auto = st.session_state.get("ocr_values", {}) or {}
-
-    # ---- Inputs ----
-    age = st.number_input("Age", min_value=0, max_value=120, value=int(auto.get("Age", 40)))
-    sex = st.selectbox("Sex (1 = Male, 0 = Female)", [1, 0], index=0)
-    on_thyroxine = st.selectbox("On Thyroxine", [1, 0], index=1)
-
-    # OCR-supported thyroid values
-    tsh_val = auto.get("TSH", auto.get("tsh", None))
-    t3_val = auto.get("T3", auto.get("t3", None))
-    t4_val = auto.get("T4", auto.get("t4", None))
-
-    tsh = st.number_input(
-        "TSH Level (mU/L)",
-        min_value=0.0, max_value=500.0,
-        value=float(tsh_val) if tsh_val is not None else 0.0,
-        step=0.1
-    )
-
-    t3_measured = st.selectbox("T3 Measured (1 = Yes, 0 = No)", [1, 0], index=1)
+    auto = session_get("ocr_values", {}) or {}
 
-    t3 = st.number_input(
-        "T3 Level (ng/dL)",
-        min_value=0.0, max_value=1000.0,
-        value=float(t3_val) if t3_val is not None else 0.0,
-        step=0.1
-    )
-
-    tt4 = st.number_input(
-        "T4 Level (mcg/dL)",
-        min_value=0.0, max_value=1000.0,
-        value=float(t4_val) if t4_val is not None else 0.0,
-        step=0.1
-    )
+    arr = schema_inputs("thyroid", auto)
 
-    # ---- Prediction ----
     if st.button("🔍 Predict Thyroid"):
-        arr = [age, sex, on_thyroxine, tsh, t3_measured, t3, tt4]
         pred, prob = predict_and_record("thyroid", arr)
 
         if pred == 1:
@@ -1581,9 +1152,8 @@ if page == "Hypo-Thyroid Prediction":
 # ---------------------------
 if page == "Health Suggestions":
     st.header("🩺 Health Suggestions (All Conditions)")
-    for k in ["diabetes", "heart", "parkinsons", "lungs", "thyroid"]:
-        with st.expander(k.capitalize()):
-            show_health_tips(k)
+    k = st.radio("Condition", health_tips.DISEASES, format_func=str.capitalize, horizontal=True)
+    show_health_tips(k)
 
 # ---------------------------
 # Model Info
@@ -1599,17 +1169,170 @@ if page == "Model Info":
     else:
         st.info("No models loaded. Place model files in Models/ folder.")
 
+    import microbatch
+    batching = microbatch.default.metrics()
+    if batching:
+        import pandas as pd
+        with st.expander("⏱ Request batching metrics"):
+            for k, m in batching.items():
+                st.markdown(f"**{k}** — {m['requests']} requests in {m['batches']} batches, "
+                            f"queue depth {m['queue_depth']} (max {m['max_queue_depth']}), "
+                            f"mean wait {m['wait_ms']['mean']:.2f} ms")
+                st.bar_chart(pd.Series(m["batch_size"]["buckets"], name="batches by size"))
+
+# ---------------------------
+# Metrics (admin)
+# ---------------------------
+if page == "Metrics":
+    st.header("📊 Runtime Metrics")
+    enabled = st.checkbox("Collect metrics", value=metrics.ENABLED,
+                        help="Process-wide; also enabled at startup with METRICS=1.")
+    if enabled != metrics.ENABLED:
+        metrics.enable(enabled)
+    snap = metrics.snapshot()
+
+    if snap["histograms"]:
+        st.markdown("#### Latency (recent samples)")
+        st.dataframe([
+            {
+                "metric": h["name"],
+                "labels": ", ".join(f"{k}={v}" for k, v in h["labels"].items()),
+                "count": h["count"],
+                "mean ms": h["mean_ms"],
+                "p50 ms": h["p50_ms"],
+                "p95 ms": h["p95_ms"],
+                "p99 ms": h["p99_ms"],
+            }
+            for h in snap["histograms"]
+        ], hide_index=True)
+    else:
+        st.info("No samples yet." if enabled else "Metrics collection is off.")
+    if snap["counters"]:
+        st.markdown("#### Counters")
+        st.dataframe([
+            {"metric": c["name"], "labels": ", ".join(f"{k}={v}" for k, v in c["labels"].items()),
+             "value": c["value"]}
+            for c in snap["counters"]
+        ], hide_index=True)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.download_button("Download Prometheus text", data=metrics.render_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+    with c2:
+        if st.button("Reset metrics"):
+            metrics.reset()
+            st.rerun()
+    if metrics.FILE:
+        st.caption(f"Also written to {metrics.FILE} every {metrics.FLUSH_SECONDS:g}s.")
+
+    st.markdown("#### 🧠 Session memory")
+    mem = session_memory.default.report()
+    st.caption(f"{len(mem['sessions'])} sessions · {mem['memory_bytes'] / 1e6:.1f} MB in memory "
+               f"(budget {mem['global_budget'] / 1e6:.0f} MB, {mem['session_budget'] / 1e6:.0f} MB per session) · "
+               f"{mem['spilled_bytes'] / 1e6:.1f} MB spilled · {mem['expired']} expired "
+               f"after {mem['idle_seconds'] / 60:.0f} min idle")
+    st.dataframe([
+        {
+            "session": r["session"][:8] + ("  (you)" if r["session"] == st.session_state["session_id"] else ""),
+            "entries": r["entries"],
+            "memory MB": round(r["memory_bytes"] / 1e6, 3),
+            "spilled MB": round(r["spilled_bytes"] / 1e6, 3),
+            "spills": r["spills"],
+            "drops": r["drops"],
+            "idle s": round(r["idle_seconds"]),
+        }
+        for r in mem["sessions"]
+    ], hide_index=True)
+    if st.button("Expire idle sessions now"):
+        session_memory.default.expire_idle()
+        st.rerun()
+
 # ---------------------------
 # Prediction History
 # ---------------------------
 if page == "Prediction History":
     st.header("📈 Prediction History")
-    if st.session_state["prediction_history"]:
-        df = pd.DataFrame(st.session_state["prediction_history"])
-        st.dataframe(df)
-        st.download_button("Export history CSV", data=export_history_csv(), file_name="pred_history.csv")
-        if st.button("Clear history"):
-            st.session_state["prediction_history"] = []
+    history_store.flush()
+
+    # each visitor sees their own session only; HISTORY_ADMIN=1 opens every session's records
+    admin = os.environ.get("HISTORY_ADMIN", "0").lower() in ("1", "true", "yes", "on")
+    sid = st.session_state["session_id"]
+    f1, f2, f3 = st.columns(3)
+    with f1:
+        this_session = st.checkbox("This session only", value=True) if admin else True
+    with f2:
+        hist_model = st.selectbox("Model", ["All"] + list(EXPECTED_MODELS))
+    with f3:
+        hist_patient = st.text_input("Patient ID filter").strip()
+    filters = {
+        "session_id": sid if this_session else None,
+        "model": None if hist_model == "All" else hist_model,
+        "patient_id": hist_patient or None,
+    }
+
+    total = history_store.count(**filters)
+    if total:
+        model_keys = [filters["model"]] if filters["model"] else None
+        if this_session:
+            st.markdown("#### 📊 Trends (this session)")
+            trend_rows = history_store.session_aggregates(sid, "model", model_keys)
+            if hist_patient:
+                trend_rows += [dict(r, key=f"patient {r['key']}")
+                               for r in history_store.session_aggregates(sid, "patient", [hist_patient])]
+        else:
+            st.markdown("#### 📊 Trends (all sessions)")
+            trend_rows = history_store.aggregates("model", model_keys)
+            if hist_patient:
+                trend_rows += [dict(r, key=f"patient {r['key']}")
+                               for r in history_store.aggregates("patient", [hist_patient])]
+        st.dataframe([
+            {
+                "": r["key"],
+                "Predictions": r["count"],
+                "Positive rate": round(r["positive_rate"], 3),
+                "Mean probability": None if r["mean_prob"] is None else round(r["mean_prob"], 3),
+                "Rolling probability": None if r["rolling_prob"] is None else round(r["rolling_prob"], 3),
+                "Last": r["last_time"],
+            }
+            for r in trend_rows
+        ], hide_index=True)
+
+        # LTTB-downsampled per model, so the chart stays small however long the history is
+        points = history_store.series(**filters)
+        if points:
+            import pandas as pd
+            chart = pd.concat([
+                pd.DataFrame({"time": pd.to_datetime(x, unit="s"), "probability": y, "model": key})
+                for key, (x, y) in points.items()
+            ])
+            st.line_chart(chart, x="time", y="probability", color="model")
+
+        page_size = 50
+        pages = (total + page_size - 1) // page_size
+        page_no = st.number_input(f"Page (of {pages})", 1, pages, 1)
+        rows = history_store.query(limit=page_size, offset=(page_no - 1) * page_size, **filters)
+        st.caption(f"{total} records")
+        st.dataframe(rows)
+        e1, e2 = st.columns(2)
+        with e1:
+            export_fmt = st.selectbox("Export format", list(history_store.EXPORT_FORMATS))
+        with e2:
+            prepare = st.button("📦 Prepare export")
+        if prepare:
+            try:
+                data = export_history(export_fmt, **filters)
+            except Exception as e:
+                st.error("Export failed: " + str(e))
+            else:
+                st.download_button(
+                    f"Download history ({export_fmt})", data=data,
+                    file_name=f"pred_history.{export_fmt}",
+                    mime=history_store.EXPORT_FORMATS[export_fmt],
+                )
+                st.caption("The download is offered once; prepare the export again to download it later.")
+        if st.button("Clear this session's history"):
+            history_store.clear(session_id=st.session_state["session_id"])
             st.rerun()
     else:
         st.info("No predictions recorded yet. Make predictions to populate history.")
@@ -1677,3 +1400,5 @@ if page == "Consult Doctor":
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+startup.mark("page")
+startup.finish(page=page, models_loaded=sorted(load_info))
@@ -0,0 +1,196 @@
+# artifacts.py - manifest-checked model artifacts (no pickle for linear models)
+#
+#   python artifacts.py                      # export Models/*.sav -> Models/artifacts/
+#   python artifacts.py --format joblib      # joblib + memory-mapped arrays instead
+#
+# The .sav files are raw pickles: loading one runs arbitrary code and pulls
+# in all of sklearn. Every shipped model is linear, so the default export
+# keeps only coef/intercept/classes in an .npz read with allow_pickle=False.
+# Models that are not binary linear fall back to joblib, loaded with
+# mmap_mode="r". manifest.json lists each artifact with its format, feature
+# list and SHA-256, and a file whose hash does not match is refused.
+#
+# Serve from here with MODEL_FORMAT=artifacts (see model_registry).
+import argparse
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import inference
+import model_registry
+import schemas
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+ARTIFACTS_DIR = os.environ.get(
+    "MODEL_ARTIFACTS_DIR", os.path.join(model_registry.BASE_DIR, model_registry.MODELS_DIR, "artifacts"))
+
+_lock = threading.Lock()
+_manifests = {}   # directory -> (mtime_ns, manifest)
+_loaded = {}      # artifact path -> (mtime_ns, size, model)
+
+
+class LinearModel:
+    """A binary linear classifier rebuilt from its exported coefficients.
+
+    Scores through ``score_batch`` like compiled.CompiledModel, and keeps the
+    sklearn-style attributes/methods that compiled and the parity checks use.
+    """
+
+    def __init__(self, coef, intercept, classes, kind):
+        self.coef_ = np.asarray(coef, dtype=float).reshape(1, -1)
+        self.intercept_ = np.asarray(intercept, dtype=float).reshape(1)
+        self.classes_ = np.asarray(classes)
+        self.kind = str(kind)
+        self.n_features_in_ = self.coef_.shape[1]
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef_[0] + self.intercept_[0]
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+    def predict_proba(self, X):
+        p = inference.sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
+
+    def score_batch(self, X):
+        margin = self.decision_function(X)
+        return self.classes_[(margin > 0).astype(int)], inference.linear_scores(margin, self.kind), self.kind
+
+    def __repr__(self):
+        return f"LinearModel(n_features={self.n_features_in_}, kind={self.kind!r})"
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def _export_linear(model, path):
+    import compiled
+
+    linear = compiled.extract_linear(model)
+    if linear is None:
+        return False
+    coef, intercept, classes, kind = linear
+    with open(path, "wb") as f:
+        np.savez(f, coef=coef, intercept=np.array([intercept]), classes=classes, kind=np.array(kind))
+    return True
+
+
+def _export_joblib(model, path):
+    import joblib
+
+    joblib.dump(model, path, compress=0)   # uncompressed so arrays can be mmapped
+
+
+def export(models, out_dir=ARTIFACTS_DIR, fmt="linear", sources=None):
+    """Write ``models`` into ``out_dir`` plus a manifest; return the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    entries = {}
+    for key, model in models.items():
+        chosen = fmt
+        path = os.path.join(out_dir, f"{key}.npz")
+        if fmt != "linear" or not _export_linear(model, path):
+            chosen = "joblib"
+            path = os.path.join(out_dir, f"{key}.joblib")
+            _export_joblib(model, path)
+        entries[key] = {
+            "file": os.path.basename(path),
+            "format": chosen,
+            "sha256": model_registry.file_sha256(path),
+            "bytes": os.path.getsize(path),
+            "n_features": int(getattr(model, "n_features_in_", 0)) or None,
+            "features": schemas.FEATURES.get(key),
+            "source_sha256": (sources or {}).get(key),
+        }
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "exported_at": datetime.utcnow().isoformat(),
+        "models": entries,
+    }
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+# ---------------------------
+# Load
+# ---------------------------
+def load_manifest(directory=ARTIFACTS_DIR):
+    """The directory's manifest (re-read only when the file changes), or None."""
+    path = os.path.join(directory, MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _lock:
+        cached = _manifests.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format_version {manifest.get('format_version')}")
+    with _lock:
+        _manifests[directory] = (mtime, manifest)
+    return manifest
+
+
+def load(key, directory=ARTIFACTS_DIR):
+    """Load one model listed in the manifest; return ``(model, entry)``.
+
+    The SHA-256 is checked on first load and whenever the file changes.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None or key not in manifest["models"]:
+        raise FileNotFoundError(f"{key} is not in {os.path.join(directory, MANIFEST)}")
+    entry = manifest["models"][key]
+    path = os.path.join(directory, entry["file"])
+    stat = os.stat(path)
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2], entry
+
+    if model_registry.file_sha256(path) != entry["sha256"]:
+        raise ValueError(f"Checksum mismatch for {path}")
+    if entry["format"] == "linear":
+        with np.load(path, allow_pickle=False) as z:
+            model = LinearModel(z["coef"], z["intercept"], z["classes"], z["kind"].item())
+    elif entry["format"] == "joblib":
+        import joblib
+
+        model = joblib.load(path, mmap_mode="r")
+    else:
+        raise ValueError(f"Unknown artifact format {entry['format']!r}")
+
+    with _lock:
+        _loaded[path] = (stat.st_mtime_ns, stat.st_size, model)
+    return model, entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Models/*.sav as manifest-checked artifacts")
+    parser.add_argument("--out", default=ARTIFACTS_DIR)
+    parser.add_argument("--format", choices=["linear", "joblib"], default="linear")
+    args = parser.parse_args()
+
+    models, errors, info = model_registry.load_models()
+    for key, err in errors.items():
+        print(f"skipped {key}: {err}")
+    manifest = export(models, args.out, args.format,
+                      sources={k: v["sha256"] for k, v in info.items()})
+    for key, entry in manifest["models"].items():
+        print(f"{key:<15}{entry['format']:<8}{entry['bytes']:>10,} bytes  {entry['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# batch.py - vectorized screening of many patients at once
+#
+# The prediction pages score one hand-entered row per click. This module is
+# the bulk path: read a CSV/Parquet of patients in chunks, map its columns to
+# each model's training feature order and score every chunk with a single
+# inference call per model.
+import io
+import numpy as np
+import pandas as pd
+
+import inference
+import schemas
+
+DEFAULT_CHUNK_SIZE = 5000
+
+MODEL_FEATURES = schemas.FEATURES
+
+
+def _is_parquet(filename):
+    return str(filename or "").lower().endswith((".parquet", ".pq"))
+
+
+def iter_frames(source, filename=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks of ``source`` (path or file-like)."""
+    name = filename or (source if isinstance(source, str) else getattr(source, "name", ""))
+    if _is_parquet(name):
+        df = pd.read_parquet(source)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        for chunk in pd.read_csv(source, chunksize=chunk_size):
+            yield chunk
+
+
+def screen(source, models, keys=None, filename=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score every row of ``source`` with each model in ``keys``.
+
+    Yields one result DataFrame per chunk: the input columns followed by
+    ``<key>_prediction`` and ``<key>_prob`` for every model (NaN for
+    margin-only models, which also get ``<key>_margin``). Raises
+    ValueError if a requested model's features are missing from the header.
+    """
+    mappings = None
+    for chunk in iter_frames(source, filename=filename, chunk_size=chunk_size):
+        if mappings is None:
+            if keys is None:
+                keys = schemas.applicable_models(chunk.columns, models)
+            mappings = {}
+            for key in keys:
+                if key not in models:
+                    raise ValueError(f"{key} model not available.")
+                mapping, missing = schemas.resolve_columns(chunk.columns, key)
+                if missing:
+                    raise ValueError(f"{key}: missing columns {missing}")
+                mappings[key] = [mapping[f] for f in MODEL_FEATURES[key]]
+            if not keys:
+                raise ValueError("No model's feature columns were found in the file.")
+
+        out = chunk.copy()
+        for key in keys:
+            X = chunk[mappings[key]].to_numpy(dtype=float)
+            labels, scores, kind = inference.predict_batch(models[key], X)
+            out[f"{key}_prediction"] = labels.astype(int)
+            out[f"{key}_prob"] = scores if kind == inference.KIND_PROBA else np.nan
+            if kind == inference.KIND_DECISION:
+                out[f"{key}_margin"] = scores
+        yield out
+
+
+def iter_csv_bytes(frames):
+    """Encode result frames as a CSV byte stream (header written once)."""
+    first = True
+    for df in frames:
+        yield df.to_csv(index=False, header=first).encode("utf-8")
+        first = False
+
+
+def write_parquet(frames, fileobj):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for df in frames:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fileobj, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def screen_to_bytes(source, models, keys=None, filename=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, fmt="csv", on_chunk=None):
+    """Run ``screen`` and return the encoded result file as bytes.
+
+    ``on_chunk(rows_done)`` is called after every chunk so callers can
+    report progress.
+    """
+    rows = [0]
+
+    def tracked():
+        for df in screen(source, models, keys=keys, filename=filename, chunk_size=chunk_size):
+            rows[0] += len(df)
+            if on_chunk is not None:
+                on_chunk(rows[0])
+            yield df
+
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        write_parquet(tracked(), buf)
+    else:
+        for part in iter_csv_bytes(tracked()):
+            buf.write(part)
+    return buf.getvalue()
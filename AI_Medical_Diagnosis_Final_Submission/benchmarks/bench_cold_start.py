@@ -0,0 +1,123 @@
+# bench_cold_start.py - cold start to first paint of app.py
+#
+#   python benchmarks/bench_cold_start.py [--runs 5] [--budget-ms 3000] [--json out.json]
+#   python benchmarks/bench_cold_start.py --importtime     # slowest top-level imports
+#
+# Each run is a fresh Python process that imports streamlit and executes
+# app.py once through streamlit.testing (the Home page, as a new session
+# sees it) with STARTUP_PROFILE pointing at a scratch file. Reported per run:
+#   streamlit ms  - importing streamlit itself
+#   first paint   - app.py start to end of its first run (startup.py phases)
+#   wall ms       - process start to end of the first run
+# plus the median of each phase and which heavy modules were loaded by then.
+# Exits non-zero if the median first paint exceeds --budget-ms.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(profile_path):
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_s = time.perf_counter() - t0
+
+    at = AppTest.from_file(os.path.join(BASE, "app.py"), default_timeout=120)
+    at.run()
+    wall_s = time.perf_counter() - t0
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.loads(f.readline())
+    profile["streamlit_ms"] = streamlit_s * 1000.0
+    profile["wall_ms"] = wall_s * 1000.0
+    profile["exceptions"] = [str(e.value) for e in at.exception]
+    print(json.dumps(profile))
+
+
+def run_once(extra_args=()):
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = os.path.join(tmp, "startup.jsonl")
+        env = dict(os.environ, STARTUP_PROFILE=profile, HISTORY_DB=os.path.join(tmp, "history.sqlite3"))
+        out = subprocess.run(
+            [sys.executable, *extra_args, os.path.abspath(__file__), "--child", profile],
+            env=env, capture_output=True, text=True, cwd=BASE)
+        if out.returncode:
+            sys.exit(out.stderr)
+        return json.loads(out.stdout.strip().splitlines()[-1]), out.stderr
+
+
+def importtime(top):
+    """Slowest top-level imports of one cold start, from python -X importtime."""
+    _, stderr = run_once(["-X", "importtime"])
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):      # nested imports are indented further
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    print(f"{'module':<40}{'cumulative ms':>15}")
+    for us, name in rows[:top]:
+        print(f"{name:<40}{us / 1000.0:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail above this median first paint")
+    parser.add_argument("--json", help="also write the results here")
+    parser.add_argument("--importtime", action="store_true", help="show the slowest imports instead")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, BASE)
+        child(args.child)
+        return
+    if args.importtime:
+        importtime(args.top)
+        return
+
+    runs = [run_once()[0] for _ in range(args.runs)]
+    for r in runs:
+        if r["exceptions"]:
+            print("app raised:", r["exceptions"])
+
+    def median(get):
+        return statistics.median(get(r) for r in runs)
+
+    summary = {
+        "runs": args.runs,
+        "streamlit_ms": median(lambda r: r["streamlit_ms"]),
+        "first_paint_ms": median(lambda r: r["total_ms"]),
+        "wall_ms": median(lambda r: r["wall_ms"]),
+        "phases_ms": {p: median(lambda r: r["phases_ms"].get(p, 0.0)) for p in runs[0]["phases_ms"]},
+        "heavy_modules": runs[0]["heavy_modules"],
+        "page": runs[0].get("page"),
+    }
+
+    print(f"{args.runs} cold starts of app.py ({summary['page']} page), medians:")
+    print(f"{'streamlit import':<20}{summary['streamlit_ms']:>10.1f} ms")
+    for phase, ms in summary["phases_ms"].items():
+        print(f"  {phase:<18}{ms:>10.1f} ms")
+    print(f"{'first paint':<20}{summary['first_paint_ms']:>10.1f} ms")
+    print(f"{'process wall':<20}{summary['wall_ms']:>10.1f} ms")
+    print("heavy modules loaded:", ", ".join(summary["heavy_modules"]) or "none")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+    if args.budget_ms is not None and summary["first_paint_ms"] > args.budget_ms:
+        print(f"FAIL: first paint {summary['first_paint_ms']:.1f} ms > budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
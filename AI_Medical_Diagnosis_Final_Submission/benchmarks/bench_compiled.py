@@ -0,0 +1,77 @@
+# bench_compiled.py - parity + throughput of compiled vs sklearn scoring
+#
+#   python benchmarks/bench_compiled.py [--rows 100000]
+#
+# Scores each model's own dataset (Datasets/) with sklearn and with its
+# compiled.CompiledModel, checks that labels, decision_function margins and
+# predict_proba agree, then times both paths on a batch tiled to --rows.
+# Exits non-zero if any model fails the parity check.
+import argparse
+import os
+import sys
+import time
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+import pandas as pd
+
+import compiled
+import inference
+import model_registry
+import schemas
+
+DATASETS = {
+    "diabetes": "diabetes_data.csv",
+    "heart_disease": "heart_disease_data.csv",
+    "parkinsons": "parkinson_data.csv",
+    "lung_cancer": "prepocessed_lungs_data.csv",
+    "thyroid": "prepocessed_hypothyroid.csv",
+}
+
+
+def dataset_matrix(key):
+    return schemas.frame_matrix(key, pd.read_csv(os.path.join(BASE, "Datasets", DATASETS[key])))
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled vs sklearn scoring")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    models, errors, _ = model_registry.load_models()
+    for key, err in errors.items():
+        print(f"skip {key}: {err}")
+    fast, skipped = compiled.compile_models(models)
+
+    failures = 0
+    print(f"{'model':<15}{'parity':<8}{'sklearn (ms)':>14}{'compiled (ms)':>15}{'speed-up':>10}")
+    for key, model in models.items():
+        if key in skipped:
+            print(f"{key:<15}{'-':<8} not compiled: {skipped[key]}")
+            continue
+        X = dataset_matrix(key)
+        ok = compiled.check_parity(model, fast[key], X)
+        failures += not ok
+
+        big = np.tile(X, (args.rows // len(X) + 1, 1))[:args.rows]
+        slow_t = best_of(lambda: inference.predict_batch(model, big))
+        fast_t = best_of(lambda: inference.predict_batch(fast[key], big))
+        print(f"{key:<15}{'ok' if ok else 'FAIL':<8}{slow_t * 1e3:>14.2f}{fast_t * 1e3:>15.2f}"
+              f"{slow_t / fast_t:>9.1f}x")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench_history_export.py - memory ceiling for streaming history export
+#
+#   python benchmarks/bench_history_export.py [--records 1000000] [--budget-mb 64]
+#
+# tests/test_history_store.py runs this script at 100k records by default
+# (HISTORY_EXPORT_RSS_RECORDS for the full 1M) and checks it passes.
+#
+# Fills a scratch SQLite history with synthetic records, then exports it in
+# each format from a fresh child process and checks that the child's peak
+# RSS growth during the export stays under --budget-mb. Exits non-zero if any
+# format exceeds the budget.
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODELS = ["diabetes", "heart_disease", "parkinsons", "lung_cancer", "thyroid"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def populate(path, n):
+    import history_store
+
+    conn = history_store.connect(path)
+    rng = random.Random(0)
+
+    def rows():
+        for i in range(n):
+            yield (
+                f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:{i % 59:02d}",
+                MODELS[i % 5], f"P{i % 5000:05d}", f"s{i % 200}",
+                "[" + ", ".join(f"{rng.random() * 200:.3f}" for _ in range(8)) + "]",
+                i % 2, rng.random(),
+            )
+
+    with conn:
+        conn.executemany(
+            f"INSERT INTO predictions ({', '.join(history_store.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows())
+
+
+def child_export(path, fmt):
+    import history_store
+
+    conn = history_store.connect(path)
+    before = peak_rss_mb()
+    t0 = time.perf_counter()
+    with tempfile.TemporaryFile() as out:
+        history_store.export(out, fmt, conn=conn)
+        size = out.tell()
+    print(f"{peak_rss_mb() - before:.1f} {time.perf_counter() - t0:.2f} {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History export memory ceiling")
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--budget-mb", type=float, default=64.0)
+    parser.add_argument("--formats", default="csv.gz,csv,parquet")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "FMT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_export(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "history.sqlite3")
+        t0 = time.perf_counter()
+        populate(db, args.records)
+        print(f"populated {args.records:,} records in {time.perf_counter() - t0:.1f}s")
+
+        failed = False
+        print(f"{'format':<9}{'peak RSS +MB':>14}{'seconds':>9}{'size MB':>9}  budget {args.budget_mb:.0f} MB")
+        for fmt in args.formats.split(","):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", db, fmt],
+                capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{fmt:<9} skipped: {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            rss, secs, size = proc.stdout.split()
+            over = float(rss) > args.budget_mb
+            failed |= over
+            print(f"{fmt:<9}{float(rss):>14.1f}{float(secs):>9.2f}{int(size) / 1e6:>9.1f}"
+                  f"  {'OVER BUDGET' if over else 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# bench_history_trends.py - cost of the history page's summary and chart
+#
+#   python benchmarks/bench_history_trends.py [--sizes 100,10000,100000] [--points 500]
+#
+# For each history size, fills a scratch SQLite history through the normal
+# insert path (so the aggregate triggers run) and times:
+#   insert us    - per record, including the trigger upserts
+#   scan ms      - the GROUP BY the page would need without the aggregates
+#   agg ms       - reading the maintained aggregates instead
+#   series ms    - fetching + LTTB-downsampling the chart series (cold, then cached)
+#   points       - points handed to the chart
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store
+
+MODELS = ["diabetes", "heart_disease", "parkinsons", "lung_cancer", "thyroid"]
+
+
+def populate(conn, n):
+    rng = random.Random(0)
+    rows = [
+        (f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:{i % 59:02d}",
+         MODELS[i % 5], f"P{i % 500:03d}", f"s{i % 20}", "[]", int(rng.random() < 0.3), rng.random())
+        for i in range(n)
+    ]
+    t0 = time.perf_counter()
+    with conn:
+        conn.executemany(
+            f"INSERT INTO predictions ({', '.join(history_store.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def ms(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History trends benchmark")
+    parser.add_argument("--sizes", default="100,10000,100000")
+    parser.add_argument("--points", type=int, default=history_store.CHART_POINTS)
+    args = parser.parse_args()
+
+    print(f"{'records':>9}{'insert us':>11}{'scan ms':>9}{'agg ms':>8}{'series ms':>11}{'cached ms':>11}{'points':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.sqlite3")
+            conn = history_store.connect(path)
+            insert_us = populate(conn, n)
+            scan = ms(lambda: conn.execute(
+                "SELECT model, COUNT(*), SUM(prediction = 1), AVG(prob) FROM predictions GROUP BY model").fetchall())
+            agg = ms(lambda: history_store.aggregates("model", conn=conn))
+            result = {}
+            cold = ms(lambda: result.update(history_store.series(args.points, conn=conn)))
+            warm = ms(lambda: history_store.series(args.points, conn=conn))
+            points = sum(len(x) for x, _ in result.values())
+            print(f"{n:>9,}{insert_us:>11.1f}{scan:>9.2f}{agg:>8.2f}{cold:>11.1f}{warm:>11.2f}{points:>8}")
+            conn.close()
+            history_store._local.conns.clear()
+
+
+if __name__ == "__main__":
+    main()
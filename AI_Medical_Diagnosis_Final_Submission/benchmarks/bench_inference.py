@@ -0,0 +1,57 @@
+# bench_inference.py - per-call latency of the old vs unified prediction path
+#
+#   python benchmarks/bench_inference.py [--repeat 2000]
+#
+# "before" is what predict_and_record used to do (predict + predict_proba on
+# the same row); "after" is inference.predict_one.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import inference
+import model_registry
+
+
+def old_path(model, arr):
+    pred = model.predict([arr])[0]
+    prob = None
+    if hasattr(model, "predict_proba"):
+        try:
+            prob = model.predict_proba([arr])[0][1]
+        except Exception:
+            prob = None
+    return pred, prob
+
+
+def per_call_us(fn, model, arr, repeat):
+    fn(model, arr)   # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(model, arr)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call prediction latency")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    models, errors, _ = model_registry.load_models()
+    for key, err in errors.items():
+        print(f"skip {key}: {err}")
+
+    print(f"{'model':<15}{'kind':<10}{'before (us)':>14}{'after (us)':>14}{'speed-up':>10}")
+    for key, model in models.items():
+        arr = list(np.zeros(getattr(model, "n_features_in_", 1)))
+        before = per_call_us(old_path, model, arr, args.repeat)
+        after = per_call_us(inference.predict_one, model, arr, args.repeat)
+        print(f"{key:<15}{inference.score_kind(model):<10}{before:>14.1f}{after:>14.1f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench_model_formats.py - cold-start cost of each model artifact format
+#
+#   python benchmarks/bench_model_formats.py [--runs 5] [--model diabetes]
+#
+# Exports the current Models/*.sav as joblib and as coefficient-only .npz
+# artifacts into a scratch directory, then for each format starts fresh
+# Python processes and times:
+#   first model  - import model_registry + load the one model a page needs
+#   all models   - then touch the remaining ones
+# "pickle (eager)" is the old behaviour: unpickle every .sav at startup.
+# Also reports whether sklearn had to be imported at all, and artifact sizes.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+
+def child(mode, first):
+    t0 = time.perf_counter()
+    import model_registry
+
+    if mode == "eager":
+        model_registry.load_models()
+        first_s = time.perf_counter() - t0
+    else:
+        models, _, _, _ = model_registry.serving_models()
+        models[first]
+        first_s = time.perf_counter() - t0
+        for key in list(models):
+            models[key]
+    all_s = time.perf_counter() - t0
+    print(json.dumps({"first": first_s, "all": all_s, "sklearn": "sklearn" in sys.modules}))
+
+
+def run(mode, env, first, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--model", first],
+            env=dict(os.environ, **env), capture_output=True, text=True, check=True, cwd=BASE)
+        samples.append(json.loads(out.stdout))
+    return {
+        "first": statistics.median(s["first"] for s in samples),
+        "all": statistics.median(s["all"] for s in samples),
+        "sklearn": samples[0]["sklearn"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model artifact cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model", default="diabetes", help="model the first page needs")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.model)
+        return
+
+    import artifacts
+    import model_registry
+
+    models, errors, _ = model_registry.load_models()
+    if errors:
+        print("skipped:", errors)
+    sav_bytes = sum(os.path.getsize(os.path.join(BASE, model_registry.EXPECTED_MODELS[k])) for k in models)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {fmt: os.path.join(tmp, fmt) for fmt in ("joblib", "linear")}
+        sizes = {"pickle": sav_bytes}
+        for fmt, d in dirs.items():
+            manifest = artifacts.export(models, d, fmt)
+            sizes[fmt] = sum(e["bytes"] for e in manifest["models"].values())
+
+        cases = [
+            ("pickle (eager)", "eager", {"MODEL_FORMAT": "pickle"}, "pickle"),
+            ("pickle (lazy)", "lazy", {"MODEL_FORMAT": "pickle"}, "pickle"),
+            ("joblib mmap", "lazy", {"MODEL_FORMAT": "artifacts", "MODEL_ARTIFACTS_DIR": dirs["joblib"]}, "joblib"),
+            ("linear npz", "lazy", {"MODEL_FORMAT": "artifacts", "MODEL_ARTIFACTS_DIR": dirs["linear"]}, "linear"),
+        ]
+        print(f"{args.runs} cold starts each, first model = {args.model}")
+        print(f"{'format':<16}{'first ms':>10}{'all ms':>10}{'sklearn':>9}{'bytes':>10}")
+        for label, mode, env, size_key in cases:
+            r = run(mode, env, args.model, args.runs)
+            print(f"{label:<16}{r['first'] * 1000:>10.1f}{r['all'] * 1000:>10.1f}"
+                  f"{'yes' if r['sklearn'] else 'no':>9}{sizes[size_key]:>10,}")
+
+
+if __name__ == "__main__":
+    main()
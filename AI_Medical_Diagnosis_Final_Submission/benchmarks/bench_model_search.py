@@ -0,0 +1,142 @@
+# bench_model_search.py - cross-validated model search + serving cost per disease
+#
+#   python benchmarks/bench_model_search.py [heart_disease ...] [--quick] [--json out.json]
+#
+# For every dataset, each candidate family below gets a grid search with
+# stratified 5-fold CV (all cores, refit on ROC AUC) on the notebook's
+# training split. The winner of each family is then measured on the held-out
+# split for accuracy/AUC, and for what it costs to serve: single-row and
+# 1000-row inference latency, pickled size and unpickle time. The shipped
+# notebook estimator is included as "baseline" for reference.
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+import inference
+import train
+
+BATCH_ROWS = 1000
+
+
+def candidates(quick=False):
+    """name -> (estimator, param grid)."""
+    c = [0.1, 1.0, 10.0] if quick else [0.01, 0.1, 1.0, 10.0, 100.0]
+    return {
+        "logistic": (make_pipeline(StandardScaler(), LogisticRegression(max_iter=5000)),
+                     {"logisticregression__C": c}),
+        "linear_svc": (make_pipeline(StandardScaler(), SVC(kernel="linear")),
+                       {"svc__C": c}),
+        "rbf_svc": (make_pipeline(StandardScaler(), SVC(kernel="rbf")),
+                    {"svc__C": c, "svc__gamma": ["scale", 0.01, 0.1]}),
+        "knn": (make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                {"kneighborsclassifier__n_neighbors": [5, 15] if quick else [3, 5, 9, 15, 25]}),
+        "random_forest": (RandomForestClassifier(random_state=0),
+                          {"n_estimators": [100] if quick else [100, 300],
+                           "max_depth": [None, 8]}),
+        "hist_gb": (HistGradientBoostingClassifier(random_state=0),
+                    {"learning_rate": [0.05, 0.1], "max_leaf_nodes": [15, 31]}),
+    }
+
+
+def _best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(times)
+
+
+def serving_cost(model, X):
+    blob = pickle.dumps(model)
+    row = X[:1]
+    batch = np.resize(X, (BATCH_ROWS, X.shape[1]))
+    return {
+        "row_ms": _best_ms(lambda: inference.predict_batch(model, row), 200),
+        "batch_ms": _best_ms(lambda: inference.predict_batch(model, batch), 20),
+        "size_kb": len(blob) / 1024.0,
+        "load_ms": _best_ms(lambda: pickle.loads(blob), 20),
+    }
+
+
+def holdout(model, X_test, y_test):
+    labels, scores, _ = inference.predict_batch(model, X_test)
+    out = {"accuracy": float(accuracy_score(y_test, labels))}
+    if hasattr(model, "decision_function"):
+        out["auc"] = float(roc_auc_score(y_test, model.decision_function(X_test)))
+    elif scores is not None:
+        out["auc"] = float(roc_auc_score(y_test, scores))
+    return out
+
+
+def search(key, quick=False):
+    X_train, X_test, y_train, y_test = train.load_split(key)
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=0)
+    results = []
+
+    baseline = train.SPECS[key][2]()
+    t0 = time.perf_counter()
+    baseline.fit(X_train, y_train)
+    results.append(dict(family="baseline", params={}, cv_auc=None,
+                        search_s=time.perf_counter() - t0,
+                        **holdout(baseline, X_test, y_test), **serving_cost(baseline, X_test)))
+
+    for family, (estimator, grid) in candidates(quick).items():
+        gs = GridSearchCV(estimator, grid, cv=cv, n_jobs=-1,
+                          scoring={"auc": "roc_auc", "accuracy": "accuracy"}, refit="auc")
+        t0 = time.perf_counter()
+        gs.fit(X_train, y_train)
+        elapsed = time.perf_counter() - t0
+        best = gs.best_estimator_
+        results.append(dict(family=family, params=gs.best_params_, cv_auc=float(gs.best_score_),
+                            search_s=elapsed,
+                            **holdout(best, X_test, y_test), **serving_cost(best, X_test)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model family search + serving cost")
+    parser.add_argument("models", nargs="*", metavar="MODEL", help="default: all")
+    parser.add_argument("--quick", action="store_true", help="smaller grids")
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+    keys = args.models or list(train.SPECS)
+    unknown = [k for k in keys if k not in train.SPECS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+
+    report = {}
+    for key in keys:
+        report[key] = rows = search(key, args.quick)
+        print(f"\n== {key}")
+        print(f"{'family':<15}{'cv auc':>8}{'test acc':>10}{'test auc':>10}{'row ms':>9}"
+              f"{'1k ms':>8}{'size KB':>9}{'load ms':>9}{'search s':>10}")
+        for r in sorted(rows, key=lambda r: -r.get("auc", r["accuracy"])):
+            cv_auc = "-" if r["cv_auc"] is None else f"{r['cv_auc']:.3f}"
+            print(f"{r['family']:<15}{cv_auc:>8}{r['accuracy']:>10.3f}{r.get('auc', float('nan')):>10.3f}"
+                  f"{r['row_ms']:>9.3f}{r['batch_ms']:>8.2f}{r['size_kb']:>9.1f}{r['load_ms']:>9.3f}"
+                  f"{r['search_s']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_ocr_engine.py - images/second for each Tesseract backend, serial and pooled
+#
+#   python benchmarks/bench_ocr_engine.py [--images 40] [--workers N] [--backends cli,tesserocr] [--lines 14]
+#
+# Fixtures are small, clean lab-report images (one report page from
+# bench_ocr_extract's corpus rendered at ~300 DPI), the case where process
+# start-up and language-model loading dominate. Each backend from ocr_engine
+# is run
+#   serial  - one after another in this process
+#   thread  - one after another, each on a new thread, as single-page uploads
+#             run on Streamlit's per-rerun script thread
+#   pool    - over a ProcessPoolExecutor of --workers processes (default: CPU
+#             count) initialised with ocr_engine.warm, as ocr_pages runs pages
+# and reported as images/second. "pytesseract" is the old per-call subprocess +
+# temp file path. Backends that are not installed are skipped.
+import argparse
+import io
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+import ocr_engine
+from bench_ocr_extract import make_report
+from bench_ocr_preprocess import _font
+
+
+def render(text, max_lines=14):
+    font = _font(28)
+    lines = text.splitlines()[:max_lines]
+    page = Image.new("L", (1400, 40 + 40 * len(lines)), 255)
+    draw = ImageDraw.Draw(page)
+    for i, line in enumerate(lines):
+        draw.text((40, 20 + 40 * i), line, fill=0, font=font)
+    buf = io.BytesIO()
+    page.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def fixtures(n, max_lines=14, seed=5):
+    rng = random.Random(seed)
+    return [render(make_report(rng, 1)[0], max_lines) for _ in range(n)]
+
+
+def _ocr(data, backend):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return ocr_engine.image_to_string(img, "eng", "", backend)
+
+
+def _warm(backend):
+    ocr_engine.BACKEND = backend
+    ocr_engine.warm()
+
+
+def _on_new_thread(data, backend):
+    t = threading.Thread(target=_ocr, args=(data, backend))
+    t.start()
+    t.join()
+
+
+def available(backend):
+    try:
+        _ocr(render("GLUCOSE 100"), backend)
+        return True
+    except Exception as e:
+        print(f"{backend:<12} skipped: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tesseract backend throughput")
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backends", default="pytesseract,cli,tesserocr")
+    parser.add_argument("--lines", type=int, default=14, help="text lines per image (1 = a single value row)")
+    args = parser.parse_args()
+
+    images = fixtures(args.images, args.lines)
+    backends = [b for b in args.backends.split(",") if available(b)]
+    print(f"{len(images)} images, {args.workers} pool workers")
+    print(f"{'backend':<12}{'serial img/s':>14}{'thread img/s':>14}{'pool img/s':>12}{'same text':>11}")
+
+    reference = None
+    for backend in backends:
+        t0 = time.perf_counter()
+        texts = [_ocr(d, backend) for d in images]
+        serial = len(images) / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for d in images:
+            _on_new_thread(d, backend)
+        threaded = len(images) / (time.perf_counter() - t0)
+
+        with ProcessPoolExecutor(args.workers, initializer=_warm, initargs=(backend,)) as pool:
+            list(pool.map(_ocr, images[:args.workers], [backend] * args.workers))   # start workers
+            t0 = time.perf_counter()
+            list(pool.map(_ocr, images, [backend] * len(images)))
+            pooled = len(images) / (time.perf_counter() - t0)
+
+        reference = reference or texts
+        same = sum(a.split() == b.split() for a, b in zip(texts, reference))
+        print(f"{backend:<12}{serial:>14.1f}{threaded:>14.1f}{pooled:>12.1f}{same:>7}/{len(images)}")
+
+
+if __name__ == "__main__":
+    main()
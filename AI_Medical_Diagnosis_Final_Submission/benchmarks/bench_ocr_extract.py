@@ -0,0 +1,206 @@
+# bench_ocr_extract.py - extraction speed and recall on synthetic lab reports
+#
+#   python benchmarks/bench_ocr_extract.py [--reports 200] [--pages 5] [--dump DIR]
+#
+# Builds a deterministic corpus of multi-page report texts (OCR-style noise:
+# mixed case, odd spacing, reference ranges, units) with known analyte
+# values, then compares the legacy extractor, a per-key search over the full
+# analyte dictionary and the single-pass one in ocr_extract.py, and shows how
+# each scales as the dictionary grows. --dump writes the corpus to DIR.
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr_extract
+
+# (label as printed, key, low, high, decimals, unit, reference range)
+ROWS = [
+    ("Fasting Blood Glucose", "Glucose", 70, 250, 0, "mg/dL", "(70-110)"),
+    ("HbA1c", "HbA1c", 4.5, 11, 1, "%", "(4.0-5.6)"),
+    ("Total Cholesterol", "Cholesterol", 120, 320, 0, "mg/dL", "(<200)"),
+    ("LDL Cholesterol", "LDL", 50, 220, 0, "mg/dL", "(<100)"),
+    ("HDL Cholesterol", "HDL", 25, 90, 0, "mg/dL", "(>40)"),
+    ("Triglycerides", "Triglycerides", 60, 400, 0, "mg/dL", "(<150)"),
+    ("T3, Total", "T3", 0.5, 2.5, 2, "ng/mL", "(0.8-2.0)"),
+    ("T4, Total", "T4", 4, 14, 1, "ug/dL", "(5.1-14.1)"),
+    ("TSH", "TSH", 0.2, 12, 2, "uIU/mL", "(0.27-4.2)"),
+    ("Free T4", "FT4", 0.6, 2.2, 2, "ng/dL", "(0.9-1.7)"),
+    ("Free T3", "FT3", 1.8, 5.0, 2, "pg/mL", "(2.0-4.4)"),
+    ("Serum Creatinine", "Creatinine", 0.5, 2.5, 2, "mg/dL", "(0.7-1.3)"),
+    ("Haemoglobin", "Hemoglobin", 9, 17, 1, "g/dL", "(13-17)"),
+]
+FILLER = [
+    "Sample collected at 08:{:02d} AM. Method: enzymatic.",
+    "Lab No. {:06d}   Ref. by Dr. Sharma",
+    "Page {} of 5 -- This is an electronically generated report.",
+    "Remarks: kindly correlate clinically. Batch {}",
+]
+
+LEGACY_PATTERNS = {
+    "Glucose": r"(?:fasting\s*blood\s*glucose|fasting\s*glucose|glucose|fbg|blood\s*sugar)[:\s\-]*([0-9]+\.?[0-9]*)",
+    "Cholesterol": r"(?:cholesterol|chol)[:\s\-]*([0-9]+\.?[0-9]*)",
+    "TSH": r"(?:tsh|thyroid stimulating hormone|thyroid-stimulating hormone)[:\s\-]*([0-9]+\.?[0-9]*)",
+    "T3": r"(?:t3[, ]*total|t3 total|t3[, ]*serum)[:\s\-]*([0-9]+\.?[0-9]*)",
+    "T4": r"(?:t4[, ]*total|t4 total|t4[, ]*serum|t4[, ]*mcg)[:\s\-]*([0-9]+\.?[0-9]*)",
+}
+
+
+def legacy_extract(text):
+    # the pre-ocr_extract implementation from app.py, kept for comparison
+    text_low = text.lower()
+    found = {}
+    for key, pat in LEGACY_PATTERNS.items():
+        m = re.search(pat, text_low, re.IGNORECASE)
+        if m:
+            try:
+                found[key] = ocr_extract.safe_float(m.group(1))
+            except Exception:
+                pass
+    if not all(k in found for k in ("T3", "T4", "TSH", "Glucose", "Cholesterol")):
+        numbers = ocr_extract.extract_numbers_from_text(text_low)
+        for key in ["T3", "T4", "TSH", "Glucose", "Cholesterol"]:
+            if key in found:
+                continue
+            idx = text_low.find(key.lower())
+            if idx != -1:
+                nums = ocr_extract.extract_numbers_from_text(text_low[idx:idx + 120])
+                if nums:
+                    try:
+                        found[key] = ocr_extract.safe_float(nums[0])
+                    except Exception:
+                        pass
+        if len(found) < 3 and numbers:
+            j = 0
+            for k in ["T3", "T4", "TSH", "Glucose", "Cholesterol"]:
+                if k in found:
+                    continue
+                if j < len(numbers):
+                    try:
+                        found[k] = ocr_extract.safe_float(numbers[j])
+                    except Exception:
+                        pass
+                    j += 1
+    return found
+
+
+def per_key_extract(text, analytes=None):
+    # the legacy strategy stretched to the full dictionary: one search per key
+    text_low = text.lower()
+    found = {}
+    for key, pat in _per_key_patterns(analytes or ocr_extract.ANALYTES).items():
+        m = pat.search(text_low)
+        if m:
+            try:
+                found[key] = ocr_extract.safe_float(m.group(1))
+            except Exception:
+                pass
+    return found
+
+
+_pattern_cache = {}
+
+
+def _per_key_patterns(analytes):
+    cache_key = id(analytes)
+    if cache_key not in _pattern_cache:
+        _pattern_cache[cache_key] = {
+            key: re.compile("(?:" + "|".join(re.escape(l) for l in labels) + r")[^0-9]{0,40}?([0-9]+(?:[\.,][0-9]+)?)")
+            for key, labels in analytes.items()
+        }
+    return _pattern_cache[cache_key]
+
+
+def with_extra_analytes(n):
+    """ANALYTES plus ``n`` made-up analytes that never occur in the corpus."""
+    rng = random.Random(7)
+    extra = dict(ocr_extract.ANALYTES)
+    for i in range(n):
+        name = "".join(rng.choice("bcdfghjklmnpqrsvwxz") for _ in range(rng.randint(4, 9)))
+        extra[f"X{i}"] = [name, f"serum {name}"]
+    return extra
+
+
+def make_report(rng, pages):
+    truth = {}
+    lines = []
+    for page in range(pages):
+        lines.append(f"PATHOLOGY REPORT  Age/Sex : {rng.randint(18, 90)} Y / {rng.choice('MF')}")
+        for label, key, lo, hi, dec, unit, ref in rng.sample(ROWS, rng.randint(4, len(ROWS))):
+            value = round(rng.uniform(lo, hi), dec)
+            if key not in truth:
+                truth[key] = float(value)
+            shown = label.upper() if rng.random() < 0.3 else label
+            sep = rng.choice([" : ", ": ", " - ", "   ", " "])
+            lines.append(f"{shown}{sep}{value} {unit} {ref}")
+            if rng.random() < 0.3:
+                lines.append(rng.choice(FILLER).format(rng.randint(0, 59)))
+        lines.append(FILLER[2].format(page + 1))
+    return "\n".join(lines), truth
+
+
+def recall(extract, corpus):
+    hit = total = 0
+    for text, truth in corpus:
+        got = extract(text)
+        for key, value in truth.items():
+            total += 1
+            hit += abs(got.get(key, float("nan")) - value) < 1e-9
+    return hit / total if total else 0.0
+
+
+def per_report_ms(extract, corpus, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in corpus:
+            extract(text)
+    return (time.perf_counter() - t0) / (repeat * len(corpus)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR value extraction benchmark")
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dump", help="write the synthetic corpus to this directory")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [make_report(rng, args.pages) for _ in range(args.reports)]
+    if args.dump:
+        os.makedirs(args.dump, exist_ok=True)
+        for i, (text, _) in enumerate(corpus):
+            with open(os.path.join(args.dump, f"report_{i:04d}.txt"), "w") as f:
+                f.write(text)
+
+    legacy_keys = set(LEGACY_PATTERNS)
+    legacy_corpus = [(t, {k: v for k, v in truth.items() if k in legacy_keys}) for t, truth in corpus]
+    print(f"{args.reports} reports x {args.pages} pages")
+    print(f"{'extractor':<12}{'ms/report':>12}{'recall (5 legacy keys)':>25}{'recall (all)':>15}")
+    for name, fn in (("legacy", legacy_extract),
+                     ("per-key", per_key_extract),
+                     ("single-pass", ocr_extract.extract_named_values)):
+        print(f"{name:<12}{per_report_ms(fn, corpus, args.repeat):>12.3f}"
+              f"{recall(fn, legacy_corpus):>25.3f}{recall(fn, corpus):>15.3f}")
+
+    # scaling with dictionary size: per-key search vs the single trie pass
+    print()
+    print(f"{'analytes':>9}{'per-key ms':>12}{'single-pass ms':>16}")
+    saved = ocr_extract._LABELS, ocr_extract._LABEL_TO_KEY
+    try:
+        for n_extra in (0, 50, 200, 800):
+            analytes = with_extra_analytes(n_extra)
+            ocr_extract._LABELS, ocr_extract._LABEL_TO_KEY = ocr_extract._build_matcher(analytes)
+            per_key = per_report_ms(lambda t: per_key_extract(t, analytes), corpus, 1)
+            single = per_report_ms(ocr_extract.scan, corpus, 1)
+            print(f"{len(analytes):>9}{per_key:>12.3f}{single:>16.3f}")
+    finally:
+        ocr_extract._LABELS, ocr_extract._LABEL_TO_KEY = saved
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# bench_ocr_layout.py - full-page OCR + text extraction vs layout-aware OCR
+#
+#   python benchmarks/bench_ocr_layout.py [--images 20] [--backend cli] [--scale 0.6]
+#
+# Fixtures are rendered lab-report tables: analyte labels in one column,
+# values, units and reference ranges in columns further right, with a few
+# labels left without a value. Tesseract often reads such a table column
+# by column, so the flat text puts values far from their labels. For each
+# fixture, both paths in ocr_cache.run_ocr_page (OCR_LAYOUT off / on) are
+# timed, and the extracted values are scored against the truth:
+#   correct  value found and equal
+#   wrong    a value assigned that differs from the truth or to an empty row
+#   missed   value present on the page but not found
+# The layout path is run without re-OCR (threshold 0) and at the
+# LAYOUT_REOCR_CONF threshold; "re-OCR ms" is the share of the time spent
+# re-reading low-confidence values.
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+import ocr_cache
+import ocr_layout
+from bench_ocr_extract import ROWS
+from bench_ocr_preprocess import _font
+
+
+def render_table(rng):
+    font = _font(28)
+    rows = rng.sample(ROWS, 9)
+    page = Image.new("L", (1700, 140 + 46 * len(rows)), 255)
+    draw = ImageDraw.Draw(page)
+    draw.text((40, 30), f"Lab No. {rng.randint(0, 999999):06d}   Ref. by Dr. Sharma", fill=0, font=font)
+    truth, empty = {}, set()
+    for i, (label, key, lo, hi, decimals, unit, ref) in enumerate(rows):
+        y = 110 + 46 * i
+        draw.text((40, y), label, fill=0, font=font)
+        if rng.random() < 0.15:
+            empty.add(key)
+            continue
+        value = round(rng.uniform(lo, hi), decimals)
+        truth[key] = value
+        draw.text((700, y), f"{value:.{decimals}f}", fill=0, font=font)
+        draw.text((950, y), unit, fill=0, font=font)
+        draw.text((1200, y), ref, fill=0, font=font)
+    buf = io.BytesIO()
+    page.save(buf, format="PNG")
+    return buf.getvalue(), truth, empty
+
+
+def score(values, truth, empty):
+    correct = sum(abs(values.get(k, float("nan")) - v) < 1e-6 for k, v in truth.items())
+    wrong = sum(k in values and abs(values[k] - v) >= 1e-6 for k, v in truth.items())
+    wrong += sum(k in values for k in empty)
+    return correct, wrong, sum(k not in values for k in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layout-aware OCR vs full-page OCR")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--backend", default=None, help="ocr_engine backend (default: OCR_ENGINE)")
+    parser.add_argument("--scale", type=float, default=None, help="detection scale (default: LAYOUT_DETECT_SCALE)")
+    args = parser.parse_args()
+    if args.scale is not None:
+        ocr_layout.DETECT_SCALE = args.scale
+
+    rng = random.Random(11)
+    fixtures = [render_table(rng) for _ in range(args.images)]
+    print(f"{len(fixtures)} table images, detect scale {ocr_layout.DETECT_SCALE}")
+    print(f"{'path':<22}{'ms/image':>10}{'re-OCR ms':>11}{'correct':>9}{'wrong':>7}{'missed':>8}")
+    runs = (("full-page", False, 0.0), ("layout, no re-OCR", True, 0.0),
+            (f"layout, re-OCR <{ocr_layout.REOCR_CONF:g}", True, ocr_layout.REOCR_CONF))
+    for name, layout, conf in runs:
+        ocr_layout.REOCR_CONF = conf
+        settings = dict(ocr_cache.OCR_SETTINGS, layout=layout)
+        if args.backend:
+            settings["engine"] = args.backend
+        totals = [0, 0, 0]
+        reocr_ms = 0.0
+        t0 = time.perf_counter()
+        for data, truth, empty in fixtures:
+            result = ocr_cache.run_ocr_page(data, settings)
+            reocr_ms += result["timings"].get("layout_reocr", 0.0)
+            totals = [a + b for a, b in zip(totals, score(result["values"], truth, empty))]
+        ms = (time.perf_counter() - t0) * 1000.0 / len(fixtures)
+        print(f"{name:<22}{ms:>10.1f}{reocr_ms / len(fixtures):>11.1f}{totals[0]:>9}{totals[1]:>7}{totals[2]:>8}")
+
+if __name__ == "__main__":
+    main()
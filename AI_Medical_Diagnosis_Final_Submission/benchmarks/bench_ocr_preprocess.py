@@ -0,0 +1,124 @@
+# bench_ocr_preprocess.py - OCR wall time and analyte recall with/without preprocessing
+#
+#   python benchmarks/bench_ocr_preprocess.py [--images 12] [--fixtures DIR] [--write-fixtures DIR]
+#
+# Fixture images are synthetic "phone photos" of lab reports: the text from
+# bench_ocr_extract's corpus rendered large, rotated a few degrees, unevenly
+# lit and JPEG-compressed. Pass --fixtures DIR to use a directory of images
+# plus a truth.json ({"file.png": {"Glucose": 132, ...}}) instead.
+# Requires the tesseract binary.
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import ocr_cache
+import ocr_preprocess
+from bench_ocr_extract import make_report
+from ocr_extract import extract_named_values
+
+
+def _font(size):
+    for name in ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def render_photo(text, rng):
+    font = _font(44)
+    lines = text.splitlines()
+    page = Image.new("L", (2600, 80 + 62 * len(lines)), 255)
+    draw = ImageDraw.Draw(page)
+    for i, line in enumerate(lines):
+        draw.text((90, 40 + 62 * i), line, fill=0, font=font)
+    page = page.rotate(rng.uniform(-3.5, 3.5), resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    # uneven lighting + sensor noise, then back to a colour JPEG
+    a = np.asarray(page, dtype=np.float64)
+    ramp = np.linspace(0.65, 1.0, a.shape[1])[None, :]
+    a = a * ramp + np.random.default_rng(rng.randint(0, 1 << 30)).normal(0, 8, a.shape)
+    photo = Image.fromarray(np.clip(a, 0, 255).astype(np.uint8)).convert("RGB")
+    buf = io.BytesIO()
+    photo.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def synthetic_fixtures(n, seed=3):
+    rng = random.Random(seed)
+    fixtures = []
+    for i in range(n):
+        text, truth = make_report(rng, pages=1)
+        fixtures.append((f"report_{i:03d}.jpg", render_photo(text, rng), truth))
+    return fixtures
+
+
+def load_fixtures(directory):
+    with open(os.path.join(directory, "truth.json"), "r", encoding="utf-8") as f:
+        truth = json.load(f)
+    out = []
+    for name, values in sorted(truth.items()):
+        with open(os.path.join(directory, name), "rb") as f:
+            out.append((name, f.read(), values))
+    return out
+
+
+def run(fixtures, preprocess_config):
+    settings = dict(ocr_cache.OCR_SETTINGS, preprocess=preprocess_config)
+    hit = total = 0
+    stage_ms = {}
+    t0 = time.perf_counter()
+    for _, data, truth in fixtures:
+        text, timings = ocr_cache.run_ocr_timed(data, settings)
+        for stage, ms in timings.items():
+            stage_ms[stage] = stage_ms.get(stage, 0.0) + ms
+        got = extract_named_values(text)
+        for key, value in truth.items():
+            total += 1
+            hit += abs(got.get(key, float("nan")) - float(value)) < 1e-6
+    wall = (time.perf_counter() - t0) / len(fixtures)
+    return wall, hit / total if total else 0.0, {k: v / len(fixtures) for k, v in stage_ms.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR preprocessing benchmark")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--fixtures", help="directory with images + truth.json")
+    parser.add_argument("--write-fixtures", help="save the synthetic fixtures here and exit")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.images)
+    if args.write_fixtures:
+        os.makedirs(args.write_fixtures, exist_ok=True)
+        for name, data, _ in fixtures:
+            with open(os.path.join(args.write_fixtures, name), "wb") as f:
+                f.write(data)
+        with open(os.path.join(args.write_fixtures, "truth.json"), "w", encoding="utf-8") as f:
+            json.dump({name: truth for name, _, truth in fixtures}, f, indent=1)
+        return
+
+    configs = {
+        "raw": dict(ocr_preprocess.DEFAULT_CONFIG, enabled=False),
+        "grayscale+downscale": dict(ocr_preprocess.DEFAULT_CONFIG, deskew=False, binarize=False),
+        "full pipeline": dict(ocr_preprocess.CONFIG),
+    }
+    print(f"{len(fixtures)} images")
+    print(f"{'config':<22}{'s/image':>10}{'recall':>9}  per-stage ms")
+    for name, config in configs.items():
+        wall, rec, stages = run(fixtures, config)
+        detail = ", ".join(f"{k} {v:.0f}" for k, v in stages.items())
+        print(f"{name:<22}{wall:>10.2f}{rec:>9.3f}  {detail}")
+
+
+if __name__ == "__main__":
+    main()
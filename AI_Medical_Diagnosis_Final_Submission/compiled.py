@@ -0,0 +1,119 @@
+# compiled.py - fused NumPy scoring for the linear .sav models
+#
+# Every shipped model is linear (LogisticRegression or SVC(kernel="linear")),
+# so scoring is X @ coef + intercept. sklearn adds input validation and, for
+# SVC, a pass over every stored support vector on each call. Compiling pulls
+# coef_/intercept_ out once per model and scores a batch with one
+# matrix-vector product (+ sigmoid for the LogisticRegression ones). Each
+# shipped model reads its own feature schema, so there is nothing to stack.
+#
+# Enable with INFERENCE_MODE=compiled. Each model is checked against its
+# sklearn outputs when compiled and left uncompiled if they disagree.
+import numpy as np
+
+import inference
+
+PARITY_ROWS = 64
+PARITY_TOL = 1e-6
+
+_cache = {}   # sorted model keys -> (model ids, (compiled, skipped))
+
+
+def extract_linear(model):
+    """Return (coef, intercept, classes, kind) for a binary linear model, else None."""
+    if getattr(model, "kernel", "linear") != "linear":
+        return None
+    try:
+        coef = np.asarray(model.coef_, dtype=float)
+        intercept = np.asarray(model.intercept_, dtype=float).ravel()
+        classes = np.asarray(model.classes_)
+    except (AttributeError, ValueError):
+        return None
+    if hasattr(coef, "toarray"):
+        coef = coef.toarray()
+    if coef.ndim != 2 or coef.shape[0] != 1 or len(classes) != 2 or intercept.shape != (1,):
+        return None
+    return coef[0], float(intercept[0]), classes, inference.score_kind(model)
+
+
+class CompiledModel:
+    """Drop-in stand-in for one sklearn estimator: its coefficients and a matmul."""
+
+    def __init__(self, key, coef, intercept, classes, kind, source):
+        self.key = key
+        self.coef = np.ascontiguousarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.classes_ = classes
+        self.kind = kind
+        self.source = source
+        self.n_features_in_ = self.coef.shape[0]
+
+    def margins(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef + self.intercept
+
+    def score_batch(self, X):
+        margin = self.margins(X)
+        return self.classes_[(margin > 0).astype(int)], inference.linear_scores(margin, self.kind), self.kind
+
+    def __repr__(self):
+        return f"CompiledModel({self.key!r}, kind={self.kind!r}, source={self.source!r})"
+
+
+def check_parity(model, compiled_model, X):
+    """True when the compiled scores match sklearn's own outputs on ``X``."""
+    labels, scores, _ = compiled_model.score_batch(X)
+    if not np.array_equal(labels, model.predict(X)):
+        return False
+    margin = np.asarray(model.decision_function(X), dtype=float).ravel()
+    compiled_margin = compiled_model.margins(X)
+    if not np.allclose(margin, compiled_margin, rtol=PARITY_TOL, atol=PARITY_TOL):
+        return False
+    if compiled_model.kind == inference.KIND_PROBA:
+        proba = model.predict_proba(X)[:, -1]
+        if not np.allclose(proba, scores, rtol=PARITY_TOL, atol=PARITY_TOL):
+            return False
+    return True
+
+
+def _parity_rows(n_features, seed=0):
+    return np.random.default_rng(seed).normal(scale=50.0, size=(PARITY_ROWS, n_features))
+
+
+def compile_models(models):
+    """Return ``(compiled, skipped)``.
+
+    ``compiled`` has the same keys as ``models``; linear models that pass the
+    parity check are replaced by CompiledModel views, the rest are returned
+    unchanged and listed in ``skipped`` with a reason. Results are cached
+    per set of keys for as long as the registry hands back the same model
+    objects.
+    """
+    names = tuple(sorted(models))
+    cache_key = tuple(id(models[k]) for k in names)
+    hit = _cache.get(names)
+    if hit is not None and hit[0] == cache_key:
+        return hit[1]
+
+    compiled = dict(models)
+    skipped = {}
+    for key, model in models.items():
+        linear = extract_linear(model)
+        if linear is None:
+            skipped[key] = "not a binary linear model"
+            continue
+        view = CompiledModel(key, *linear, model)
+        try:
+            ok = check_parity(model, view, _parity_rows(view.n_features_in_))
+        except Exception as e:
+            ok = False
+            skipped[key] = f"parity check failed: {e}"
+        if ok:
+            compiled[key] = view
+        else:
+            skipped.setdefault(key, "parity check failed")
+
+    _cache[names] = (cache_key, (compiled, skipped))
+    return compiled, skipped
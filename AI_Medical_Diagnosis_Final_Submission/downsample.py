@@ -0,0 +1,43 @@
+# downsample.py - Largest-Triangle-Three-Buckets downsampling for charts
+#
+# A line chart of 100k points costs the browser far more than the query
+# behind it and shows nothing a few hundred well-chosen points would not.
+# LTTB (Steinarsson, 2013) keeps the first and last point and, from each of
+# threshold-2 equal buckets in between, the point forming the largest
+# triangle with the previously kept point and the mean of the next bucket,
+# which preserves peaks and troughs that plain striding would drop.
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points LTTB keeps (all of them if ``len(x) <= threshold``)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # bucket edges over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # twice the triangle area; the constant factor does not change argmax
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(x, y, threshold):
+    """Downsample a series to at most ``threshold`` points; return ``(x, y)``."""
+    idx = lttb_indices(x, y, threshold)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -0,0 +1,70 @@
+# health_tips.py - static health-tips catalogue
+#
+# The tips used to be a large dict literal rebuilt on every call. They now
+# live in health_tips.json, are read once per process into read-only
+# mappings of tuples, and each disease's sections are rendered to markdown
+# once and reused on every rerun.
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import model_registry
+
+TIPS_PATH = os.path.join(model_registry.BASE_DIR, "health_tips.json")
+DISEASES = ("diabetes", "heart", "parkinsons", "lungs", "thyroid")
+
+# (expander title, [(sub-heading or None, catalogue key), ...]) in display order
+SECTIONS = (
+    ("🧘 Yoga Asanas (Recommended)", ((None, "Yoga_Asanas"),)),
+    ("⚠️ Precautions to Follow", ((None, "Precautions"),)),
+    ("🥗 Diet Recommendations & 🚫 Foods to Avoid",
+     (("**✅ Recommended Diet:**", "Diet"), ("**🚫 Avoid:**", "Avoid"))),
+    ("🏠 Daily Home Remedies", ((None, "Home_Remedies_daily"),)),
+    ("🚨 Emergency Home Remedies", ((None, "Home_Remedies_emergency"),)),
+    ("💊 Emergency Medicines (For Knowledge Only)", ((None, "Medication_Emergency"),)),
+    ("🆘 Emergency Precautions", ((None, "Emergency_Precautions"),)),
+    ("💊 Medication & Treatment Precautions", ((None, "Medication_Precautions"),)),
+)
+
+
+def _freeze(raw):
+    return MappingProxyType({
+        disease.lower(): MappingProxyType({k: tuple(v) for k, v in sections.items()})
+        for disease, sections in raw.items()
+    })
+
+
+@lru_cache(maxsize=1)
+def catalogue(path=TIPS_PATH):
+    """Read-only ``{disease: {section: (tip, ...)}}``, loaded once."""
+    with open(path, "r", encoding="utf-8") as f:
+        return _freeze(json.load(f))
+
+
+def get(disease):
+    return catalogue().get(str(disease).lower())
+
+
+def _bullets(items):
+    return "\n".join("- " + item.strip().replace("\n", " ") for item in items)
+
+
+@lru_cache(maxsize=None)
+def rendered(disease):
+    """``((title, markdown), ...)`` for one disease, or None if unknown."""
+    info = get(disease)
+    if info is None:
+        return None
+    out = []
+    for title, parts in SECTIONS:
+        blocks = []
+        for heading, key in parts:
+            items = info.get(key, ())
+            if not items:
+                continue
+            if heading:
+                blocks.append(heading)
+            blocks.append(_bullets(items))
+        out.append((title, "\n\n".join(blocks)))
+    return tuple(out)
@@ -0,0 +1,440 @@
+# history_store.py - persistent, append-only prediction history (SQLite, WAL)
+#
+# Predictions used to live in a per-session Python list that was rebuilt into
+# a DataFrame on every rerun and lost when the session ended. Records are now
+# queued and written by a background thread in batches, and the history page
+# reads them back one page at a time through indexed queries.
+#
+# Per-model and per-patient aggregates (count, positives, mean and
+# exponentially weighted probability) live in their own table and are kept
+# current by INSERT triggers, so each new record costs one upsert per scope
+# and the history page never rescans the table for its summary. The same
+# totals are kept per session ("session_model", "session_patient"), which
+# is what the history page shows: a visitor only sees their own session.
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+
+import model_registry
+
+DB_PATH = os.environ.get("HISTORY_DB", os.path.join(model_registry.BASE_DIR, "prediction_history.sqlite3"))
+WRITE_BATCH = 256
+EXPORT_CHUNK = 10000
+EXPORT_FORMATS = {"csv.gz": "text/csv", "csv": "text/csv", "parquet": "application/octet-stream"}
+EWMA_ALPHA = 0.1          # rolling mean probability weights roughly the last 2/alpha records
+CHART_POINTS = 500
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    time        TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    patient_id  TEXT,
+    session_id  TEXT,
+    inputs      TEXT,
+    prediction  INTEGER,
+    prob        REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_time ON predictions(time);
+CREATE INDEX IF NOT EXISTS idx_predictions_model_time ON predictions(model, time);
+CREATE INDEX IF NOT EXISTS idx_predictions_patient_time ON predictions(patient_id, time);
+CREATE INDEX IF NOT EXISTS idx_predictions_session_time ON predictions(session_id, time);
+CREATE TABLE IF NOT EXISTS aggregates (
+    scope       TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    n           INTEGER NOT NULL,
+    positives   INTEGER NOT NULL,
+    prob_n      INTEGER NOT NULL,
+    prob_sum    REAL NOT NULL,
+    prob_ewma   REAL,
+    first_time  TEXT,
+    last_time   TEXT,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+"""
+
+# scope -> SQL expression for its key (NULL keys are skipped)
+AGGREGATE_SCOPES = {
+    "all": "''",
+    "model": "NEW.model",
+    "patient": "NEW.patient_id",
+    "session_model": "NEW.session_id || '|' || NEW.model",
+    "session_patient": "NEW.session_id || '|' || NEW.patient_id",
+}
+
+_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS trg_aggregate_{scope} AFTER INSERT ON predictions
+WHEN {key} IS NOT NULL BEGIN
+    INSERT INTO aggregates (scope, key, n, positives, prob_n, prob_sum, prob_ewma, first_time, last_time)
+    VALUES ('{scope}', {key}, 1, COALESCE(NEW.prediction = 1, 0), NEW.prob IS NOT NULL,
+            COALESCE(NEW.prob, 0), NEW.prob, NEW.time, NEW.time)
+    ON CONFLICT(scope, key) DO UPDATE SET
+        n = n + 1,
+        positives = positives + excluded.positives,
+        prob_n = prob_n + excluded.prob_n,
+        prob_sum = prob_sum + excluded.prob_sum,
+        prob_ewma = CASE
+            WHEN excluded.prob_ewma IS NULL THEN prob_ewma
+            WHEN prob_ewma IS NULL THEN excluded.prob_ewma
+            ELSE prob_ewma + {alpha} * (excluded.prob_ewma - prob_ewma) END,
+        first_time = MIN(first_time, excluded.first_time),
+        last_time = MAX(last_time, excluded.last_time);
+END;
+"""
+TRIGGERS = "".join(_TRIGGER.format(scope=s, key=k, alpha=EWMA_ALPHA) for s, k in AGGREGATE_SCOPES.items())
+
+COLUMNS = ["time", "model", "patient_id", "session_id", "inputs", "prediction", "prob"]
+
+_local = threading.local()
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+_schema_ready = set()
+_series_cache = {}
+_series_lock = threading.Lock()
+
+
+def connect(path=None):
+    """Per-thread connection (sqlite3 connections are not shared across threads)."""
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if path not in _schema_ready:
+            conn.executescript(SCHEMA + TRIGGERS)
+            if _aggregates_stale(conn):
+                rebuild_aggregates(conn)
+            _schema_ready.add(path)
+        conns[path] = conn
+    return conn
+
+
+def _row(record):
+    inputs = record.get("inputs")
+    if inputs is not None and not isinstance(inputs, str):
+        inputs = json.dumps([float(v) for v in inputs])
+    return (
+        record["time"], record["model"], record.get("patient_id") or None,
+        record.get("session_id"), inputs, record.get("prediction"), record.get("prob"),
+    )
+
+
+_INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+def _write(rows):
+    conn = connect()
+    try:
+        with conn:
+            conn.executemany(_INSERT, rows)
+        return
+    except Exception:
+        if len(rows) == 1:
+            log.exception("history: could not write record %r", rows[0])
+            return
+    # one bad row (or a transient error) should not cost the whole batch
+    for row in rows:
+        _write([row])
+
+
+def _write_loop():
+    # Never lets an exception out: a dead writer would leave flush() (and the
+    # history page that calls it) waiting on _queue.join() forever.
+    while True:
+        records = [_queue.get()]
+        while len(records) < WRITE_BATCH:
+            try:
+                records.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            rows = []
+            for record in records:
+                try:
+                    rows.append(_row(record))
+                except Exception:
+                    log.exception("history: skipping malformed record %r", record)
+            if rows:
+                _write(rows)
+        except Exception:
+            log.exception("history: failed to write %d records", len(records))
+        finally:
+            for _ in records:
+                _queue.task_done()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_loop, name="history-writer", daemon=True)
+            _writer.start()
+
+
+def append(record):
+    """Queue one prediction record; returns immediately."""
+    _ensure_writer()
+    _queue.put(record)
+
+
+def flush():
+    """Block until every queued record has been written."""
+    _queue.join()
+
+
+def _aggregates_stale(conn):
+    # history written before the aggregates table, or its session scopes, existed
+    def first(sql):
+        return conn.execute(sql).fetchone() is not None
+
+    if first("SELECT 1 FROM predictions LIMIT 1") and not first("SELECT 1 FROM aggregates WHERE scope = 'all'"):
+        return True
+    return first("SELECT 1 FROM predictions WHERE session_id IS NOT NULL LIMIT 1") and \
+        not first("SELECT 1 FROM aggregates WHERE scope = 'session_model' LIMIT 1")
+
+
+def _where(model=None, patient_id=None, session_id=None):
+    clauses, params = [], []
+    for column, value in (("model", model), ("patient_id", patient_id), ("session_id", session_id)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count(**filters):
+    where, params = _where(**filters)
+    return connect().execute(f"SELECT COUNT(*) FROM predictions{where}", params).fetchone()[0]
+
+
+def query(limit=50, offset=0, newest_first=True, **filters):
+    """One page of records as dicts, filtered by model/patient_id/session_id."""
+    where, params = _where(**filters)
+    order = "DESC" if newest_first else "ASC"
+    rows = connect().execute(
+        f"SELECT id, {', '.join(COLUMNS)} FROM predictions{where} "
+        f"ORDER BY time {order}, id {order} LIMIT ? OFFSET ?",
+        params + [int(limit), int(offset)],
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def models(**filters):
+    where, params = _where(**filters)
+    return [r[0] for r in connect().execute(
+        f"SELECT DISTINCT model FROM predictions{where} ORDER BY model", params)]
+
+
+def clear(**filters):
+    flush()
+    where, params = _where(**filters)
+    conn = connect()
+    with conn:
+        conn.execute(f"DELETE FROM predictions{where}", params)
+    # the EWMA cannot be un-applied, so deletes recompute from what is left
+    rebuild_aggregates(conn)
+
+
+# ---------------------------
+# Aggregates and trends
+# ---------------------------
+def _fold(state, prediction, prob, time):
+    # same update as the INSERT triggers, for rebuilds
+    if state is None:
+        state = {"n": 0, "positives": 0, "prob_n": 0, "prob_sum": 0.0, "prob_ewma": None,
+                 "first_time": time, "last_time": time}
+    state["n"] += 1
+    state["positives"] += int(prediction == 1)
+    if prob is not None:
+        state["prob_n"] += 1
+        state["prob_sum"] += prob
+        ewma = state["prob_ewma"]
+        state["prob_ewma"] = prob if ewma is None else ewma + EWMA_ALPHA * (prob - ewma)
+    state["first_time"] = min(state["first_time"], time)
+    state["last_time"] = max(state["last_time"], time)
+    return state
+
+
+def rebuild_aggregates(conn=None):
+    """Recompute the aggregates table from the predictions table (one pass)."""
+    conn = conn or connect()
+    states = {}
+    cur = conn.execute("SELECT model, patient_id, session_id, prediction, prob, time FROM predictions ORDER BY id")
+    for model, patient_id, session_id, prediction, prob, time in cur:
+        keys = (("all", ""), ("model", model), ("patient", patient_id),
+                ("session_model", _session_key(session_id, model)),
+                ("session_patient", _session_key(session_id, patient_id)))
+        for scope, key in keys:
+            if key is not None:
+                states[scope, key] = _fold(states.get((scope, key)), prediction, prob, time)
+    with conn:
+        conn.execute("DELETE FROM aggregates")
+        conn.executemany(
+            "INSERT INTO aggregates (scope, key, n, positives, prob_n, prob_sum, prob_ewma, first_time, last_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(scope, key, s["n"], s["positives"], s["prob_n"], s["prob_sum"], s["prob_ewma"],
+              s["first_time"], s["last_time"]) for (scope, key), s in states.items()])
+
+
+def _session_key(session_id, key):
+    return None if session_id is None or key is None else f"{session_id}|{key}"
+
+
+def aggregates(scope="model", keys=None, conn=None):
+    """Running totals per model/patient (or scope="all") as dicts, largest first."""
+    sql = "SELECT * FROM aggregates WHERE scope = ?"
+    params = [scope]
+    if keys:
+        sql += f" AND key IN ({', '.join('?' * len(keys))})"
+        params += list(keys)
+    out = []
+    for r in (conn or connect()).execute(sql + " ORDER BY n DESC, key", params):
+        out.append({
+            "key": r["key"],
+            "count": r["n"],
+            "positives": r["positives"],
+            "positive_rate": r["positives"] / r["n"] if r["n"] else None,
+            "mean_prob": r["prob_sum"] / r["prob_n"] if r["prob_n"] else None,
+            "rolling_prob": r["prob_ewma"],
+            "first_time": r["first_time"],
+            "last_time": r["last_time"],
+        })
+    return out
+
+
+def session_aggregates(session_id, scope="model", keys=None, conn=None):
+    """``aggregates`` restricted to one session's records (scope "model" or "patient")."""
+    conn = conn or connect()
+    if keys is None:
+        keys = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT {'model' if scope == 'model' else 'patient_id'} FROM predictions "
+            "WHERE session_id = ?", [session_id]) if r[0] is not None]
+    rows = aggregates("session_" + scope, [_session_key(session_id, k) for k in keys], conn) if keys else []
+    return [dict(r, key=r["key"][len(session_id) + 1:]) for r in rows]
+
+
+def series(max_points=CHART_POINTS, conn=None, **filters):
+    """``{model: (epoch_seconds, prob)}`` for the filtered history, each series
+    LTTB-downsampled to ``max_points``.
+
+    Cached until the history changes (new max id or a different total in the
+    aggregates, both O(1) to read), so reruns of the history page do not
+    re-read the table.
+    """
+    import numpy as np
+    import downsample
+
+    where, params = _where(**filters)
+    cache_key = (tuple(sorted(filters.items())), max_points, None if conn is None else id(conn))
+    conn = conn or connect()
+    version = tuple(conn.execute(
+        "SELECT (SELECT MAX(id) FROM predictions), (SELECT n FROM aggregates WHERE scope = 'all')").fetchone())
+    with _series_lock:
+        cached = _series_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    cond = where + (" AND " if where else " WHERE ") + "prob IS NOT NULL"
+    out = {}
+    models = [filters["model"]] if filters.get("model") else [r["key"] for r in aggregates("model", conn=conn)]
+    for model in models:
+        rows = conn.execute(
+            f"SELECT (julianday(time) - 2440587.5) * 86400.0, prob FROM predictions{cond} AND model = ? "
+            "ORDER BY time, id", params + [model]).fetchall()
+        if not rows:
+            continue
+        arr = np.asarray(rows, dtype=float).reshape(-1, 2)
+        out[model] = downsample.lttb(arr[:, 0], arr[:, 1], max_points)
+
+    with _series_lock:
+        if len(_series_cache) >= 64:
+            _series_cache.clear()
+        _series_cache[cache_key] = (version, out)
+    return out
+
+
+# ---------------------------
+# Streaming export
+# ---------------------------
+def iter_chunks(chunk_size=EXPORT_CHUNK, conn=None, **filters):
+    """Yield lists of row tuples (``id`` + COLUMNS), oldest first.
+
+    Rows come straight off a cursor with fetchmany, so memory stays
+    proportional to ``chunk_size`` rather than to the history size.
+    """
+    where, params = _where(**filters)
+    cur = (conn or connect()).execute(
+        f"SELECT id, {', '.join(COLUMNS)} FROM predictions{where} ORDER BY time, id", params)
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield [tuple(r) for r in rows]
+
+
+def _export_csv(fileobj, chunks, compress):
+    raw = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(["id"] + COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()
+
+
+def _export_parquet(fileobj, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("time", pa.string()), ("model", pa.string()),
+        ("patient_id", pa.string()), ("session_id", pa.string()), ("inputs", pa.string()),
+        ("prediction", pa.int64()), ("prob", pa.float64()),
+    ])
+    with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+
+
+def export(fileobj, fmt="csv.gz", chunk_size=EXPORT_CHUNK, conn=None, **filters):
+    """Stream the (filtered) history into a binary file object."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    flush()
+    chunks = iter_chunks(chunk_size, conn=conn, **filters)
+    if fmt == "parquet":
+        _export_parquet(fileobj, chunks)
+    else:
+        _export_csv(fileobj, chunks, compress=(fmt == "csv.gz"))
+
+
+def export_to_tempfile(fmt="csv.gz", **filters):
+    """Export into a temporary file and return its path (caller deletes it)."""
+    fd, path = tempfile.mkstemp(prefix="pred_history_", suffix="." + fmt)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            export(f, fmt, **filters)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
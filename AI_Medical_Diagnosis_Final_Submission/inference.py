@@ -0,0 +1,89 @@
+# inference.py - one forward pass per batch for every model type
+#
+# predict() followed by predict_proba() runs the estimator twice. Here the
+# label is derived from the same output that produces the score:
+#   * predict_proba    -> label = classes_[argmax], score = P(class 1)
+#   * decision_function -> label = classes_[margin > 0], score = the margin
+# SVC models (the Parkinson's and diabetes .sav files) expose predict_proba
+# only when trained with probability=True, and then route it through libsvm's
+# Platt scaling, so they always take the decision_function path. Their
+# margin is not calibrated (the diabetes SVC sees unscaled features), so it
+# is never reported as a probability: probability() is None for them.
+import numpy as np
+
+KIND_PROBA = "proba"
+KIND_DECISION = "decision"
+KIND_LABEL = "label"
+
+
+def _uses_platt(model):
+    return hasattr(model, "probability") and hasattr(model, "decision_function")
+
+
+def score_kind(model):
+    """Which single call ``predict_batch`` will make for ``model``."""
+    if hasattr(model, "score_batch"):
+        return model.kind
+    if not _uses_platt(model) and hasattr(model, "predict_proba"):
+        return KIND_PROBA
+    if hasattr(model, "decision_function"):
+        return KIND_DECISION
+    return KIND_LABEL
+
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def linear_scores(margin, kind):
+    """Scores as predict_batch reports them for a linear model's margins."""
+    return sigmoid(margin) if kind == KIND_PROBA else margin
+
+
+def probability(score, kind):
+    """``score`` if it is a positive-class probability, else None."""
+    return score if kind == KIND_PROBA else None
+
+
+def margin(score, kind):
+    """``score`` if it is a decision-function margin, else None."""
+    return score if kind == KIND_DECISION else None
+
+
+def predict_batch(model, X):
+    """Score a 2-D batch; return ``(labels, scores, kind)``.
+
+    ``scores`` is the positive-class probability per row when ``kind`` is
+    KIND_PROBA, the raw decision margin when it is KIND_DECISION, and None
+    when the model only supports ``predict``.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if hasattr(model, "score_batch"):
+        # compiled.CompiledModel: one fused matmul, no sklearn call at all
+        return model.score_batch(X)
+    classes = np.asarray(getattr(model, "classes_", [0, 1]))
+    kind = score_kind(model)
+
+    if kind == KIND_PROBA:
+        try:
+            proba = model.predict_proba(X)
+            return classes[proba.argmax(axis=1)], proba[:, -1], kind
+        except Exception:
+            kind = KIND_DECISION if hasattr(model, "decision_function") else KIND_LABEL
+
+    if kind == KIND_DECISION and len(classes) == 2:
+        try:
+            margins = np.asarray(model.decision_function(X), dtype=float).ravel()
+            return classes[(margins > 0).astype(int)], margins, kind
+        except Exception:
+            pass
+
+    return np.asarray(model.predict(X)), None, KIND_LABEL
+
+
+def predict_one(model, row):
+    """Score a single feature vector; return ``(label, probability_or_None)``."""
+    labels, scores, kind = predict_batch(model, [row])
+    return labels[0], (None if scores is None else probability(float(scores[0]), kind))
@@ -0,0 +1,250 @@
+# metrics.py - process-wide counters and latency histograms for the hot paths
+#
+#   METRICS=1 streamlit run app.py            # collect (off by default)
+#   METRICS_FILE=/var/lib/node_exporter/mdx.prom METRICS=1 uvicorn api:app
+#
+# Instrumented: predictions per model (app and API), batched inference calls,
+# OCR stages (decode, preprocessing steps, tesseract, value extraction) and
+# API requests per route. Each histogram keeps fixed Prometheus buckets plus
+# the most recent RESERVOIR samples, from which p50/p95/p99 are computed for
+# the admin page. Exposed as Prometheus text by api.py (GET /metrics) and, if
+# METRICS_FILE is set, rewritten every METRICS_FLUSH_SECONDS in that file
+# (.json for a JSON snapshot, anything else gets Prometheus text, e.g. for
+# node_exporter's textfile collector).
+#
+# When disabled, timed() returns a shared no-op context manager and inc() /
+# observe() return immediately, so the instrumented code pays one call.
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("METRICS", "").lower() in ("1", "true", "yes", "on")
+FILE = os.environ.get("METRICS_FILE") or None
+FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "15"))
+RESERVOIR = int(os.environ.get("METRICS_RESERVOIR", "2048"))
+PREFIX = "mdx_"
+
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+HELP = {
+    "predictions_total": "Predictions served, by model and outcome.",
+    "predict_seconds": "End-to-end single prediction latency, by model.",
+    "inference_batch_seconds": "Vectorized inference call latency, by model.",
+    "inference_rows_total": "Rows scored by vectorized inference calls, by model.",
+    "ocr_stage_seconds": "OCR time per page and stage.",
+    "ocr_documents_total": "Uploaded documents OCR'd, by cache result.",
+    "ocr_job_documents_total": "Documents finished by background OCR jobs, by status.",
+    "http_request_seconds": "API request latency, by route.",
+    "http_requests_total": "API requests, by route and status.",
+}
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(SECONDS_BUCKETS) + 1)   # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+        self.recent = deque(maxlen=RESERVOIR)
+
+    def observe(self, value):
+        i = 0
+        while i < len(SECONDS_BUCKETS) and value > SECONDS_BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.n += 1
+        self.recent.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: None for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class _Noop:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+_lock = threading.Lock()
+_counters = {}     # (name, labels) -> float
+_histograms = {}   # (name, labels) -> _Histogram
+_sink = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# ---------------------------
+# Recording
+# ---------------------------
+def enable(on=True):
+    """Turn collection on/off at runtime (starts the file sink if configured)."""
+    global ENABLED
+    ENABLED = bool(on)
+    if ENABLED and FILE:
+        _start_sink()
+
+
+def inc(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = _Histogram()
+        hist.observe(seconds)
+
+
+def observe_stages(name, stage_ms, **labels):
+    """Record a ``{stage: milliseconds}`` dict (as the OCR code returns it)."""
+    if not ENABLED:
+        return
+    for stage, ms in stage_ms.items():
+        observe(name, ms / 1000.0, stage=stage, **labels)
+
+
+def timed(name, **labels):
+    """``with timed("predict_seconds", model=key):`` - no-op when disabled."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(name, labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def snapshot():
+    """Counters and histogram summaries (with p50/p95/p99 in ms) as plain data."""
+    with _lock:
+        counters = [(name, dict(labels), value) for (name, labels), value in _counters.items()]
+        hists = []
+        for (name, labels), h in _histograms.items():
+            q = h.quantiles()
+            hists.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": h.n,
+                "mean_ms": h.total / h.n * 1000.0 if h.n else None,
+                **{f"p{int(k * 100)}_ms": None if v is None else v * 1000.0 for k, v in q.items()},
+            })
+    return {
+        "enabled": ENABLED,
+        "time": time.time(),
+        "counters": [{"name": n, "labels": l, "value": v} for n, l, v in sorted(counters, key=str)],
+        "histograms": sorted(hists, key=lambda h: (h["name"], sorted(h["labels"].items()))),
+    }
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in items)
+    return "{" + body + "}"
+
+
+def render_prometheus():
+    """Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters = sorted(_counters.items())
+        hists = sorted((k, list(h.counts), h.total, h.n) for k, h in _histograms.items())
+
+    lines = []
+    typed = set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {PREFIX}{name} {HELP[name]}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{PREFIX}{name}{_fmt_labels(labels)} {value:g}")
+    for (name, labels), counts, total, n in hists:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, c in zip(list(SECONDS_BUCKETS) + ["+Inf"], counts):
+            cumulative += c
+            lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_fmt_labels(labels)} {total:.6f}")
+        lines.append(f"{PREFIX}{name}_count{_fmt_labels(labels)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path=None):
+    """Atomically rewrite the sink file with the current metrics."""
+    path = path or FILE
+    body = json.dumps(snapshot(), indent=2) if path.endswith(".json") else render_prometheus()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        if ENABLED:
+            try:
+                write_file()
+            except OSError:
+                pass
+
+
+def _start_sink():
+    global _sink
+    with _lock:
+        if _sink is not None:
+            return
+        _sink = threading.Thread(target=_flush_loop, name="metrics-sink", daemon=True)
+        _sink.start()
+
+
+if ENABLED and FILE:
+    _start_sink()
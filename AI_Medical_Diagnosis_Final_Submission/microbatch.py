@@ -0,0 +1,191 @@
+# microbatch.py - coalesce concurrent single-row predictions into batches
+#
+# Every Streamlit session runs its script in its own thread, and the API
+# serves requests concurrently, so many single-row predictions for the same
+# model can be in flight at once. Each model key gets a lane: the first
+# request opens a window of BATCH_MAX_WAIT_MS (or until BATCH_MAX_ROWS rows
+# are queued), then one vectorized inference call scores the whole group and
+# the results are handed back to the waiting callers.
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+import inference
+import metrics
+import model_registry
+
+MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", "64"))
+MAX_WAIT_SECONDS = float(os.environ.get("BATCH_MAX_WAIT_MS", "2")) / 1000.0
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.n += 1
+
+    def snapshot(self):
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.n,
+            "mean": self.total / self.n if self.n else 0.0,
+        }
+
+
+class _Lane:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.items = []          # (row, future, enqueued_at)
+        self.thread = None
+        self.max_depth = 0
+        self.batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = _Histogram(WAIT_MS_BUCKETS)
+        self.requests = 0
+        self.batches = 0
+
+
+def _resolve(fut, result=None, exception=None):
+    # one caller's future must never take the lane thread down with it
+    try:
+        if exception is not None:
+            fut.set_exception(exception)
+        else:
+            fut.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class Coalescer:
+    """Group single-row requests per model key into batched calls.
+
+    ``score_fn(key, X)`` must return ``(labels, scores_or_None, kind)`` for a
+    2-D array, i.e. the signature of ``inference.predict_batch`` with the
+    model already resolved.
+    """
+
+    def __init__(self, score_fn, max_rows=MAX_ROWS, max_wait=MAX_WAIT_SECONDS):
+        self.score_fn = score_fn
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, key):
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _Lane()
+            if lane.thread is None or not lane.thread.is_alive():
+                lane.thread = threading.Thread(
+                    target=self._run, args=(key, lane), name=f"microbatch-{key}", daemon=True)
+                lane.thread.start()
+            return lane
+
+    def submit(self, key, row):
+        """Queue one feature vector; the Future resolves to (label, score, kind)."""
+        fut = Future()
+        lane = self._lane(key)
+        with lane.cond:
+            lane.items.append((row, fut, time.perf_counter()))
+            lane.requests += 1
+            lane.max_depth = max(lane.max_depth, len(lane.items))
+            lane.cond.notify()
+        return fut
+
+    def predict(self, key, row, timeout=None):
+        return self.submit(key, row).result(timeout)
+
+    def _run(self, key, lane):
+        while True:
+            with lane.cond:
+                while not lane.items:
+                    lane.cond.wait()
+                deadline = lane.items[0][2] + self.max_wait
+                while len(lane.items) < self.max_rows:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    lane.cond.wait(remaining)
+                group = lane.items[:self.max_rows]
+                del lane.items[:self.max_rows]
+
+            # callers that gave up (e.g. a disconnected API client) are dropped;
+            # the rest can no longer be cancelled once marked running
+            group = [item for item in group if item[1].set_running_or_notify_cancel()]
+            if not group:
+                continue
+
+            started = time.perf_counter()
+            try:
+                X = np.asarray([row for row, _, _ in group], dtype=float)
+                labels, scores, kind = self.score_fn(key, X)
+                metrics.observe("inference_batch_seconds", time.perf_counter() - started, model=key)
+                metrics.inc("inference_rows_total", len(group), model=key)
+            except Exception as e:
+                for _, fut, _ in group:
+                    _resolve(fut, exception=e)
+                labels = None
+
+            with lane.cond:
+                lane.batches += 1
+                lane.batch_sizes.observe(len(group))
+                for _, _, enqueued in group:
+                    lane.wait_ms.observe((started - enqueued) * 1000.0)
+
+            if labels is not None:
+                for i, (_, fut, _) in enumerate(group):
+                    try:
+                        result = (labels[i], None if scores is None else float(scores[i]), kind)
+                    except Exception as e:
+                        _resolve(fut, exception=e)
+                    else:
+                        _resolve(fut, result)
+
+    def metrics(self):
+        """Per-key queue depth, batch-size and wait-time histograms."""
+        out = {}
+        with self._lock:
+            lanes = dict(self._lanes)
+        for key, lane in lanes.items():
+            with lane.cond:
+                out[key] = {
+                    "queue_depth": len(lane.items),
+                    "max_queue_depth": lane.max_depth,
+                    "requests": lane.requests,
+                    "batches": lane.batches,
+                    "batch_size": lane.batch_sizes.snapshot(),
+                    "wait_ms": lane.wait_ms.snapshot(),
+                }
+        return out
+
+
+def _score_with_registry(key, X):
+    models, _, _, _ = model_registry.serving_models()
+    if key not in models:
+        raise KeyError(f"{key} model not available.")
+    return inference.predict_batch(models[key], X)
+
+
+default = Coalescer(_score_with_registry)
+
+
+def predict(key, row, timeout=None):
+    """Score one row through the shared coalescer; return (label, probability or None)."""
+    label, score, kind = default.predict(key, row, timeout)
+    return label, inference.probability(score, kind)
@@ -0,0 +1,293 @@
+# model_registry.py - process-wide cache for the pickled .sav models
+#
+# Streamlit re-executes app.py on every widget interaction, but imported
+# modules stay alive for the whole server process. Keeping the loaded models
+# here means every session shares one copy and a model is only unpickled
+# again when its file on disk actually changes. Models are loaded lazily,
+# so a cold start only pays for the model the first page actually uses.
+import os
+import pickle
+import hashlib
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = "Models"
+EXPECTED_MODELS = {
+    "diabetes": os.path.join(MODELS_DIR, "diabetes_model.sav"),
+    "heart_disease": os.path.join(MODELS_DIR, "heart_disease_model.sav"),
+    "parkinsons": os.path.join(MODELS_DIR, "parkinsons_model.sav"),
+    "lung_cancer": os.path.join(MODELS_DIR, "lungs_disease_model.sav"),
+    "thyroid": os.path.join(MODELS_DIR, "Thyroid_model.sav"),
+}
+
+# "sklearn" scores through the pickled estimators, "compiled" through the
+# per-model NumPy scoring in compiled.py
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "sklearn").lower()
+
+# "pickle" reads Models/*.sav, "artifacts" the manifest-checked export in
+# Models/artifacts/ (see artifacts.py)
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "pickle").lower()
+
+# how often a served model's file is stat'ed for changes
+RECHECK_SECONDS = float(os.environ.get("MODEL_RECHECK_SECONDS", "2"))
+
+_lock = threading.Lock()
+_entries = {}   # absolute path -> cache entry (see _load_entry)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_entry(path, stat):
+    t0 = time.perf_counter()
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+    return {
+        "model": model,
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_sha256(path),
+        "load_seconds": time.perf_counter() - t0,
+        "loaded_at": datetime.utcnow().isoformat(),
+        "hits": 0,
+    }
+
+
+def get_model(path):
+    """Return (model, info) for an absolute path, loading it at most once.
+
+    The file is re-read only when its mtime/size changes *and* its SHA-256
+    differs from the cached copy, so touching a file does not force an
+    unpickle.
+    """
+    stat = os.stat(path)
+    with _lock:
+        entry = _entries.get(path)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            entry["hits"] += 1
+            return entry["model"], entry
+        if entry is not None and entry["sha256"] == file_sha256(path):
+            entry["mtime"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            entry["hits"] += 1
+            return entry["model"], entry
+        entry = _load_entry(path, stat)
+        _entries[path] = entry
+        return entry["model"], entry
+
+
+def _load_checked(key, path):
+    """get_model() plus the schema check; raises with a display-ready message."""
+    import schemas   # lazy: pulls in numpy
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Missing file: {path}")
+    try:
+        model, entry = get_model(path)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load: {e}")
+    problem = schemas.check_model(key, model)
+    if problem:
+        raise ValueError(f"Schema mismatch: {problem}")
+    return model, entry
+
+
+def load_models(expected=None, base_dir=BASE_DIR):
+    """Resolve every path in ``expected`` against ``base_dir`` and load it.
+
+    Returns ``(loaded, errors, info)`` where ``info`` maps each loaded key to
+    its cache entry metadata (load time, hash, cache hits). A model whose
+    ``n_features_in_`` disagrees with its schema is reported as an error
+    instead of being served.
+    """
+    if expected is None:
+        expected = EXPECTED_MODELS
+    loaded = {}
+    errors = {}
+    info = {}
+    for key, rel_path in expected.items():
+        try:
+            model, entry = _load_checked(key, os.path.abspath(os.path.join(base_dir, rel_path)))
+        except Exception as e:
+            errors[key] = str(e)
+            continue
+        loaded[key] = model
+        info[key] = {k: v for k, v in entry.items() if k != "model"}
+    return loaded, errors, info
+
+
+class ServingModels(Mapping):
+    """Read-only ``{key: model}`` that loads each model on first access.
+
+    Iterating lists the models that are on disk and have not failed to
+    load, without loading the ones not touched yet; ``key in models`` and
+    ``models[key]`` load (and, in compiled mode, compile) just that one
+    model. A model that fails to load is recorded in ``errors`` and drops
+    out of iteration, and ``items()`` / ``values()`` skip it, so walking the
+    mapping never raises. Loaded models are cached; the file is only
+    stat'ed again every RECHECK_SECONDS to pick up a replaced model.
+    ``errors``, ``info`` and ``compile_skipped`` fill in as models are
+    touched.
+    """
+
+    def __init__(self, fmt=MODEL_FORMAT, mode=INFERENCE_MODE):
+        self.fmt = fmt
+        self.mode = mode
+        self.errors = {}
+        self.info = {}
+        self.compile_skipped = {}
+        self._entries = {}   # key -> {"sig", "checked", "served", "error", "fresh"}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.abspath(os.path.join(BASE_DIR, EXPECTED_MODELS[key]))
+
+    def _signature(self, key):
+        """(mtime, size) of the file whose change means ``key`` must be reloaded."""
+        if self.fmt == "artifacts":
+            import artifacts
+
+            path = os.path.join(artifacts.ARTIFACTS_DIR, artifacts.MANIFEST)
+        else:
+            path = self._path(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _exists(self, key):
+        if self.fmt == "artifacts":
+            import artifacts
+
+            try:
+                manifest = artifacts.load_manifest()
+            except Exception as e:
+                self.errors[key] = f"Unreadable manifest: {e}"
+                return False
+            self.errors.pop(key, None)
+            return manifest is not None and key in manifest["models"]
+        return os.path.exists(self._path(key))
+
+    def _load(self, key):
+        if self.fmt == "artifacts":
+            import artifacts
+            import schemas
+
+            model, entry = artifacts.load(key)
+            problem = schemas.check_model(key, model)
+            if problem:
+                raise ValueError(f"Schema mismatch: {problem}")
+            return model, {"format": entry["format"], "sha256": entry["sha256"]}
+        model, entry = _load_checked(key, self._path(key))
+        return model, {"format": "pickle", "sha256": entry["sha256"]}
+
+    def _entry(self, key):
+        """Cached load state for ``key``; (re)loads when new or its file changed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["checked"] < RECHECK_SECONDS:
+                return entry
+        sig = self._signature(key)
+        if entry is not None and entry["sig"] == sig:
+            entry["checked"] = now
+            return entry
+
+        t0 = time.perf_counter()
+        entry = {"sig": sig, "checked": now, "served": None, "error": None, "fresh": True}
+        try:
+            model, meta = self._load(key)
+            served = model
+            if self.mode == "compiled":
+                import compiled
+
+                compiled_models, skipped = compiled.compile_models({key: model})
+                served = compiled_models[key]
+                if key in skipped:
+                    self.compile_skipped[key] = skipped[key]
+            entry["served"] = served
+        except Exception as e:
+            entry["error"] = str(e)
+        with self._lock:
+            self._entries[key] = entry
+            if entry["error"] is None:
+                self.errors.pop(key, None)
+                self.info[key] = dict(meta, load_seconds=time.perf_counter() - t0, hits=0)
+            else:
+                self.errors[key] = entry["error"]
+                self.info.pop(key, None)
+        return entry
+
+    def __getitem__(self, key):
+        if key not in EXPECTED_MODELS:
+            raise KeyError(key)
+        entry = self._entry(key)
+        if entry["error"] is not None:
+            raise KeyError(key)
+        info = self.info.get(key)
+        if info is not None and not entry.pop("fresh", False):
+            info["hits"] += 1
+        return entry["served"]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for key in EXPECTED_MODELS:
+            if key in self._entries:
+                # touched before: re-checked (cheaply) and skipped if it failed
+                if self._entry(key)["error"] is None:
+                    yield key
+            elif self._exists(key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def items(self):
+        """``[(key, model)]`` for the models that load; failures land in ``errors``."""
+        out = []
+        for key in list(self):
+            model = self.get(key)
+            if model is not None:
+                out.append((key, model))
+        return out
+
+    def values(self):
+        return [model for _, model in self.items()]
+
+
+_serving = None
+_serving_lock = threading.Lock()
+
+
+def serving_models():
+    """Models as the app and API should score them, honouring MODEL_FORMAT
+    and INFERENCE_MODE.
+
+    Returns ``(models, errors, info, compile_skipped)``; ``models`` is the
+    shared lazy ServingModels and the three dicts are its live views.
+    """
+    global _serving
+    with _serving_lock:
+        if _serving is None:
+            _serving = ServingModels()
+    return _serving, _serving.errors, _serving.info, _serving.compile_skipped
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,167 @@
+# ocr_cache.py - content-addressed cache for OCR results
+#
+# Tesseract takes seconds per image and the upload page used to re-run it on
+# every rerun (each button click). Results are keyed by the SHA-256 of the
+# uploaded bytes plus the OCR settings, kept in a process-wide LRU shared by
+# all sessions, and - when OCR_CACHE_DIR is set - spilled to disk as JSON
+# when evicted from memory.
+#
+# With OCR_LAYOUT on (the default) values come from ocr_layout, which pairs
+# labels and values by their position on the page; with it off, from the
+# full-page text as before.
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import ocr_engine
+import ocr_layout
+import ocr_preprocess
+from ocr_extract import extract_named_values
+
+MAX_ENTRIES = int(os.environ.get("OCR_CACHE_ENTRIES", "64"))
+DISK_DIR = os.environ.get("OCR_CACHE_DIR") or None
+
+# bump when extract_named_values changes so spilled entries are not reused
+EXTRACTOR_VERSION = 3
+
+OCR_SETTINGS = {
+    "lang": os.environ.get("OCR_LANG", "eng"),
+    "config": os.environ.get("OCR_CONFIG", ""),
+    # part of the cache key, so changing preprocessing invalidates old text
+    "preprocess": ocr_preprocess.CONFIG,
+    "engine": ocr_engine.BACKEND,
+    "layout": os.environ.get("OCR_LAYOUT", "1").lower() not in ("0", "false", "no", "off"),
+}
+
+
+class LRUCache:
+    def __init__(self, max_entries=MAX_ENTRIES, disk_dir=DISK_DIR):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self.put(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        evicted = []
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                evicted.append(self._data.popitem(last=False))
+        if self.disk_dir:
+            for old_key, old_value in evicted:
+                try:
+                    with open(self._disk_path(old_key), "w", encoding="utf-8") as f:
+                        json.dump(old_value, f)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        return {"entries": size, "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+cache = LRUCache()
+
+
+def cache_key(data, settings=None):
+    settings = dict(OCR_SETTINGS if settings is None else settings)
+    settings["extractor"] = EXTRACTOR_VERSION
+    h = hashlib.sha256(data)
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load(data, settings, timings):
+    from PIL import Image
+
+    t0 = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    timings["decode"] = (time.perf_counter() - t0) * 1000.0
+    img, stage_ms = ocr_preprocess.preprocess(img, settings.get("preprocess"))
+    timings.update(stage_ms)
+    if img.mode not in ("1", "L", "RGB"):
+        img = img.convert("RGB")
+    return img
+
+
+def run_ocr_timed(data, settings=None):
+    """OCR one image; return ``(text, {stage: ms})`` including preprocessing."""
+    settings = OCR_SETTINGS if settings is None else settings
+    timings = {}
+    img = _load(data, settings, timings)
+    t0 = time.perf_counter()
+    text = ocr_engine.image_to_string(img, settings["lang"], settings["config"], settings.get("engine"))
+    timings["tesseract"] = (time.perf_counter() - t0) * 1000.0
+    return text, timings
+
+
+def run_ocr(data, settings=None):
+    return run_ocr_timed(data, settings)[0]
+
+
+def run_ocr_page(data, settings=None):
+    """OCR one image and extract its values: ``{"text", "values", "timings"}``."""
+    settings = OCR_SETTINGS if settings is None else settings
+    if not settings.get("layout"):
+        text, timings = run_ocr_timed(data, settings)
+        t0 = time.perf_counter()
+        values = extract_named_values(text)
+        timings["extract"] = (time.perf_counter() - t0) * 1000.0
+        return {"text": text, "values": values, "timings": timings}
+    timings = {}
+    img = _load(data, settings, timings)
+    text, values, layout_ms = ocr_layout.read_page(img, settings["lang"], settings["config"], settings.get("engine"))
+    timings.update(layout_ms)
+    return {"text": text, "values": values, "timings": timings}
+
+
+def ocr_image_bytes(data, settings=None):
+    """Return ``({"text", "values"}, cached)`` for an uploaded image.
+
+    OCR failures propagate and are not cached.
+    """
+    key = cache_key(data, settings)
+    hit = cache.get(key)
+    if hit is not None:
+        metrics.inc("ocr_documents_total", cache="hit")
+        return hit, True
+    metrics.inc("ocr_documents_total", cache="miss")
+    result = run_ocr_page(data, settings)
+    metrics.observe_stages("ocr_stage_seconds", result["timings"])
+    cache.put(key, result)
+    return result, False
@@ -0,0 +1,221 @@
+# ocr_engine.py - Tesseract calls without a process spawn + temp files per image
+#
+# pytesseract.image_to_string writes the image to a temp file, starts a new
+# `tesseract` process, which loads the language model, and reads the result
+# back from another temp file. For small lab-report images that start-up is
+# most of the cost. Backends, picked by OCR_ENGINE (default "auto"):
+#
+#   tesserocr    libtesseract in-process through the tesserocr bindings.
+#                Engines, with their language data loaded, live in a
+#                process-wide pool: a call checks one out and hands it back,
+#                so any thread reuses them - including Streamlit's script
+#                threads, which are new on every rerun. In the OCR page pool
+#                (ocr_pages) each worker process warms an engine at start-up,
+#                so the pool is a set of long-lived OCR workers.
+#   cli          one `tesseract stdin stdout` process per image, with the
+#                image piped in as PNM and the text read from the pipe.
+#                Still a spawn, but no temp files and no PNG encode.
+#   pytesseract  the original path.
+#
+# "auto" uses tesserocr when it is installed and cli otherwise.
+# image_to_data returns word boxes (for ocr_layout) from the same backends.
+import contextlib
+import importlib.util
+import io
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+
+ENGINE = os.environ.get("OCR_ENGINE", "auto").lower()
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "tesseract")
+BACKENDS = ("tesserocr", "cli", "pytesseract")
+MAX_IDLE = os.cpu_count() or 1   # idle engines kept per (lang, config)
+
+_idle = {}                       # (lang, config) -> [idle tesserocr engines]
+_idle_lock = threading.Lock()
+
+
+def _resolve(engine):
+    if engine == "auto":
+        return "tesserocr" if importlib.util.find_spec("tesserocr") is not None else "cli"
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown OCR_ENGINE {engine!r}; expected auto or one of {', '.join(BACKENDS)}")
+    return engine
+
+
+BACKEND = _resolve(ENGINE)
+
+
+def parse_config(config):
+    """pytesseract-style config ("--psm 6 --oem 1 -c key=value") -> (psm, oem, {var: value})."""
+    psm = oem = None
+    variables = {}
+    args = shlex.split(config or "")
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ("--psm", "--oem") and i + 1 < len(args):
+            if arg == "--psm":
+                psm = int(args[i + 1])
+            else:
+                oem = int(args[i + 1])
+            i += 2
+        elif arg == "-c" and i + 1 < len(args) and "=" in args[i + 1]:
+            key, value = args[i + 1].split("=", 1)
+            variables[key] = value
+            i += 2
+        else:
+            i += 1
+    return psm, oem, variables
+
+
+# ---------------------------
+# tesserocr (persistent, in-process)
+# ---------------------------
+def _create(lang, config):
+    import tesserocr
+
+    psm, oem, variables = parse_config(config)
+    kwargs = {"lang": lang}
+    if oem is not None:
+        kwargs["oem"] = oem
+    api = tesserocr.PyTessBaseAPI(**kwargs)
+    if psm is not None:
+        api.SetPageSegMode(psm)
+    for key, value in variables.items():
+        api.SetVariable(key, value)
+    return api
+
+
+@contextlib.contextmanager
+def _engine(lang, config):
+    """Check an engine for (lang, config) out of the pool; created only if none is idle."""
+    key = (lang, config)
+    with _idle_lock:
+        idle = _idle.get(key)
+        api = idle.pop() if idle else None
+    if api is None:
+        api = _create(lang, config)
+    try:
+        yield api
+    finally:
+        api.Clear()
+        with _idle_lock:
+            idle = _idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE:
+                idle.append(api)
+                api = None
+        if api is not None:
+            api.End()
+
+
+def _tesserocr_text(img, lang, config):
+    with _engine(lang, config) as api:
+        api.SetImage(img)
+        return api.GetUTF8Text()
+
+
+def _tesserocr_words(img, lang, config):
+    import tesserocr
+
+    with _engine(lang, config) as api:
+        api.SetImage(img)
+        api.Recognize()
+        level = tesserocr.RIL.WORD
+        words = []
+        for r in tesserocr.iterate_level(api.GetIterator(), level):
+            text = r.GetUTF8Text(level)
+            box = r.BoundingBox(level)
+            if text and text.strip() and box:
+                words.append(_word(text, r.Confidence(level), *box))
+        return words
+
+
+# ---------------------------
+# tesseract CLI over pipes
+# ---------------------------
+def _pnm_bytes(img):
+    if img.mode not in ("1", "L", "RGB"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="PPM")     # PBM/PGM/PPM by mode; no compression to pay for
+    return buf.getvalue()
+
+
+def _cli(img, lang, config, extra=()):
+    if shutil.which(TESSERACT_CMD) is None:
+        raise RuntimeError(f"{TESSERACT_CMD} not found; install Tesseract or set TESSERACT_CMD")
+    cmd = [TESSERACT_CMD, "stdin", "stdout", "-l", lang] + shlex.split(config or "") + list(extra)
+    proc = subprocess.run(cmd, input=_pnm_bytes(img), capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip() or f"tesseract exited {proc.returncode}")
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def _cli_text(img, lang, config):
+    return _cli(img, lang, config)
+
+
+def _tsv_words(columns):
+    # level page block par line word left top width height conf text
+    words = []
+    for i, text in enumerate(columns["text"]):
+        if str(columns["level"][i]) != "5" or not str(text).strip():
+            continue
+        left, top = int(columns["left"][i]), int(columns["top"][i])
+        words.append(_word(str(text), float(columns["conf"][i]), left, top,
+                           left + int(columns["width"][i]), top + int(columns["height"][i])))
+    return words
+
+
+def _cli_words(img, lang, config):
+    lines = _cli(img, lang, config, ["tsv"]).splitlines()
+    if not lines:
+        return []
+    header = lines[0].split("\t")
+    rows = [line.split("\t") for line in lines[1:]]
+    rows = [r + [""] * (len(header) - len(r)) for r in rows]
+    return _tsv_words({name: [r[i] for r in rows] for i, name in enumerate(header)})
+
+
+def _pytesseract_text(img, lang, config):
+    import pytesseract
+
+    return pytesseract.image_to_string(img, lang=lang, config=config)
+
+
+def _pytesseract_words(img, lang, config):
+    import pytesseract
+
+    return _tsv_words(pytesseract.image_to_data(img, lang=lang, config=config,
+                                                output_type=pytesseract.Output.DICT))
+
+
+def _word(text, conf, left, top, right, bottom):
+    return {"text": text.strip(), "conf": float(conf), "left": left, "top": top, "right": right, "bottom": bottom}
+
+
+_TEXT = {"tesserocr": _tesserocr_text, "cli": _cli_text, "pytesseract": _pytesseract_text}
+_WORDS = {"tesserocr": _tesserocr_words, "cli": _cli_words, "pytesseract": _pytesseract_words}
+
+
+def image_to_string(img, lang="eng", config="", backend=None):
+    """OCR a PIL image with the configured backend."""
+    return _TEXT[backend or BACKEND](img, lang, config)
+
+
+def image_to_data(img, lang="eng", config="", backend=None):
+    """Word boxes ``[{"text", "conf", "left", "top", "right", "bottom"}]`` in pixel coordinates."""
+    return _WORDS[backend or BACKEND](img, lang, config)
+
+
+def warm(lang="eng", config=""):
+    """Load this process's engine up front (ProcessPoolExecutor initializer)."""
+    if BACKEND == "tesserocr":
+        try:
+            with _engine(lang, config):
+                pass
+        except Exception:
+            pass   # surfaces on the first real call instead
@@ -0,0 +1,137 @@
+# ocr_extract.py - single-pass analyte/value extraction from OCR text
+#
+# Every analyte label spelling is compiled once, at import, into a single
+# prefix-factored (trie) regex. One finditer() over the lower-cased report
+# finds all labels in reading order and each label takes the nearest number
+# that follows it (before the next label, within VALUE_WINDOW characters).
+# Adding analytes grows the trie, not the number of passes over the text.
+import re
+
+VALUE_WINDOW = 120
+
+# analyte key -> label spellings as they appear on lab reports (lower case)
+ANALYTES = {
+    "Glucose": ["fasting blood glucose", "fasting glucose", "blood glucose", "glucose",
+                "fbg", "fbs", "blood sugar"],
+    "HbA1c": ["hba1c", "hb a1c", "glycated haemoglobin", "glycated hemoglobin",
+              "glycosylated hemoglobin", "a1c"],
+    "Cholesterol": ["total cholesterol", "serum cholesterol", "cholesterol", "chol"],
+    "LDL": ["ldl cholesterol", "ldl-c", "ldl"],
+    "HDL": ["hdl cholesterol", "hdl-c", "hdl"],
+    "Triglycerides": ["triglycerides", "triglyceride", "tgl", "tg"],
+    "TSH": ["thyroid stimulating hormone", "thyroid-stimulating hormone", "tsh"],
+    "T3": ["t3, total", "t3 total", "t3, serum", "t3 serum", "total t3", "t3"],
+    "T4": ["t4, total", "t4 total", "t4, serum", "t4 serum", "t4, mcg", "total t4", "tt4", "t4"],
+    "FT3": ["free t3", "ft3"],
+    "FT4": ["free t4", "ft4"],
+    "Creatinine": ["serum creatinine", "creatinine"],
+    "Hemoglobin": ["haemoglobin", "hemoglobin", "hb"],
+    "Insulin": ["fasting insulin", "insulin"],
+    "BMI": ["body mass index", "bmi"],
+    "BloodPressure": ["blood pressure", "bp"],
+    "Age": ["age"],
+}
+
+_NUMBER = r"\d+(?:[\.,]\d+)?"
+
+
+def _trie_regex(labels):
+    """Prefix-factored alternation of ``labels``.
+
+    The engine follows one branch per character instead of retrying every
+    label at every position; longer continuations come first so
+    "ldl cholesterol" wins over "ldl" and "t3, total" over "t3".
+    """
+    trie = {}
+    for label in labels:
+        node = trie
+        for ch in label:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        branches = []
+        for ch in sorted(k for k in node if k):
+            piece = r"\s*" if ch == " " else re.escape(ch)
+            branches.append(piece + emit(node[ch]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+
+def _squash(label):
+    return re.sub(r"\s+", "", label)
+
+
+def _build_matcher(analytes):
+    label_to_key = {}   # whitespace-free spelling -> analyte key
+    for key, spellings in analytes.items():
+        for label in spellings:
+            label_to_key.setdefault(_squash(label), key)
+    labels = [l for spellings in analytes.values() for l in spellings]
+    pattern = rf"(?<![a-z0-9])(?:{_trie_regex(labels)})(?![a-z])"
+    return re.compile(pattern), label_to_key
+
+
+_LABELS, _LABEL_TO_KEY = _build_matcher(ANALYTES)
+_NUMBER_RE = re.compile(_NUMBER)
+
+
+def safe_float(s):
+    if s is None:
+        raise ValueError("None")
+    s = str(s).strip()
+    s = s.replace(",", ".")
+    s = re.sub(r"[^\d\.\-eE]", "", s)
+    if s in ["", ".", "-", "--", "..."]:
+        raise ValueError("invalid")
+    return float(s)
+
+
+def extract_numbers_from_text(text):
+    raw = _NUMBER_RE.findall(text)
+    cleaned = []
+    for token in raw:
+        tok = token.strip()
+        if tok in ["", ".", ","]:
+            continue
+        cleaned.append(tok)
+    return cleaned
+
+
+def find_labels(text_low):
+    """``(analyte key, start, end)`` for every label in lower-cased text, in order."""
+    return [(_LABEL_TO_KEY[_squash(m.group())], m.start(), m.end()) for m in _LABELS.finditer(text_low)]
+
+
+def scan(text):
+    """One pass over ``text``: return {analyte key: value}.
+
+    Each label takes the first number after it, as long as that number comes
+    before the next label and within VALUE_WINDOW characters.
+    """
+    text_low = text.lower()
+    found = {}
+    labels = find_labels(text_low)
+    for i, (key, _, end) in enumerate(labels):
+        if key in found:
+            continue
+        stop = end + VALUE_WINDOW
+        if i + 1 < len(labels):
+            stop = min(stop, labels[i + 1][1])
+        num = _NUMBER_RE.search(text_low, end, stop)
+        if num is not None:
+            try:
+                found[key] = safe_float(num.group())
+            except ValueError:
+                pass
+    return found
+
+
+def extract_named_values(text):
+    # Only labelled values: the old last resort that handed the first loose
+    # numbers to T3/T4/TSH/Glucose/Cholesterol produced wrong assignments.
+    return scan(text)
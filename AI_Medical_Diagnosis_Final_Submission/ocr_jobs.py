@@ -0,0 +1,296 @@
+# ocr_jobs.py - background OCR jobs for bulk report uploads
+#
+# A job is a set of documents (many uploaded files, or the contents of a
+# ZIP) OCR'd off the Streamlit script thread. Documents run concurrently on
+# a thread pool sized like the OCR page pool (OCR_JOB_WORKERS, default CPU
+# count); each one goes through ocr_pages.ocr_document, so multi-page files
+# still fan out to the page process pool and repeats are served from
+# ocr_cache. The script thread only submits and polls, so the page stays
+# responsive and shows progress while the job runs.
+#
+# Submitting a job for a session cancels that session's previous job:
+# queued documents are dropped and running ones are discarded when they
+# finish, so stale uploads stop competing for CPU. Jobs and per-document
+# results (extracted values, page count, timing, errors) are persisted in
+# SQLite (OCR_JOBS_DB) and can be read back after a rerun or restart.
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import metrics
+import model_registry
+import ocr_pages
+
+DB_PATH = os.environ.get("OCR_JOBS_DB", os.path.join(model_registry.BASE_DIR, "ocr_jobs.sqlite3"))
+MAX_WORKERS = int(os.environ.get("OCR_JOB_WORKERS", "0")) or (os.cpu_count() or 1)
+MAX_DOCUMENTS = int(os.environ.get("OCR_JOB_MAX_DOCUMENTS", "500"))
+MAX_ZIP_BYTES = int(float(os.environ.get("OCR_JOB_MAX_ZIP_MB", "512")) * 1024 * 1024)
+KEEP_FINISHED = 64         # finished jobs kept in memory; older ones are read from SQLite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    session_id  TEXT,
+    created     TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    total       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs(session_id, created);
+CREATE TABLE IF NOT EXISTS documents (
+    job_id      TEXT NOT NULL,
+    idx         INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    pages       INTEGER,
+    seconds     REAL,
+    cached      INTEGER,
+    "values"    TEXT,
+    error       TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+# job and document states
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+_local = threading.local()
+_schema_ready = set()
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}                 # job id -> Job (live ones and recently finished)
+_active = {}               # session id -> job id, while that job is running
+_lock = threading.Lock()
+
+
+def connect(path=None):
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        if path not in _schema_ready:
+            conn.executescript(SCHEMA)
+            _schema_ready.add(path)
+        conns[path] = conn
+    return conn
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ocr-job")
+        return _executor
+
+
+# ---------------------------
+# Input expansion
+# ---------------------------
+def _supported(name):
+    return os.path.splitext(name)[1].lower().lstrip(".") in ocr_pages.UPLOAD_TYPES
+
+
+def expand_uploads(files):
+    """``[(name, bytes)]`` with ZIP archives replaced by their supported members."""
+    out = []
+    for name, data in files:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                members = [m for m in zf.infolist()
+                           if not m.is_dir() and _supported(m.filename)
+                           and not os.path.basename(m.filename).startswith(".")]
+                if sum(m.file_size for m in members) > MAX_ZIP_BYTES:
+                    raise ValueError(f"{name}: more than {MAX_ZIP_BYTES // (1024 * 1024)} MB uncompressed")
+                for m in sorted(members, key=lambda m: m.filename):
+                    out.append((f"{name}/{m.filename}", zf.read(m)))
+        elif _supported(name):
+            out.append((name, data))
+        if len(out) > MAX_DOCUMENTS:
+            raise ValueError(f"Too many documents (limit {MAX_DOCUMENTS})")
+    return out
+
+
+# ---------------------------
+# Jobs
+# ---------------------------
+class Job:
+    def __init__(self, session_id, documents):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.created = datetime.utcnow().isoformat()
+        self.names = [name for name, _ in documents]
+        self.docs = [{"name": name, "status": QUEUED, "pages": None, "seconds": None,
+                      "cached": None, "values": None, "error": None} for name in self.names]
+        self.cancelled = threading.Event()
+        self.futures = []
+        self.lock = threading.Lock()
+        self.status = QUEUED
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "id": self.id,
+                "session_id": self.session_id,
+                "created": self.created,
+                "status": self.status,
+                "total": len(self.docs),
+                "finished": sum(d["status"] in (DONE, FAILED, CANCELLED) for d in self.docs),
+                "documents": [dict(d) for d in self.docs],
+            }
+
+
+def _save_document(job, idx):
+    d = job.docs[idx]
+    conn = connect()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO documents (job_id, idx, name, status, pages, seconds, cached, "values", error) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.id, idx, d["name"], d["status"], d["pages"], d["seconds"], d["cached"],
+             None if d["values"] is None else json.dumps(d["values"]), d["error"]))
+
+
+def _save_job(job):
+    conn = connect()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO jobs (id, session_id, created, status, total) VALUES (?, ?, ?, ?, ?)",
+                     (job.id, job.session_id, job.created, job.status, len(job.docs)))
+
+
+def _finish_if_complete(job):
+    with job.lock:
+        if any(d["status"] in (QUEUED, RUNNING) for d in job.docs):
+            return
+        if job.cancelled.is_set():
+            job.status = CANCELLED
+        elif any(d["status"] == FAILED for d in job.docs):
+            job.status = FAILED if all(d["status"] == FAILED for d in job.docs) else DONE
+        else:
+            job.status = DONE
+        # finished jobs are read back through _jobs / SQLite; keep _active to live ones
+        with _lock:
+            if _active.get(job.session_id) == job.id:
+                del _active[job.session_id]
+    _save_job(job)
+
+
+def _run_document(job, idx, name, data):
+    if job.cancelled.is_set():
+        with job.lock:
+            job.docs[idx]["status"] = CANCELLED
+        _save_document(job, idx)
+        _finish_if_complete(job)
+        return
+    with job.lock:
+        job.docs[idx]["status"] = RUNNING
+        if job.status == QUEUED:
+            job.status = RUNNING
+    t0 = time.perf_counter()
+    try:
+        result, cached = ocr_pages.ocr_document(data, name)
+        update = {"status": DONE, "pages": result.get("pages", 1), "cached": int(cached),
+                  "values": dict(result["values"])}
+    except Exception as e:
+        update = {"status": FAILED, "error": str(e)}
+    update["seconds"] = round(time.perf_counter() - t0, 3)
+    if job.cancelled.is_set():
+        update = {"status": CANCELLED, "values": None, "seconds": update["seconds"]}
+    with job.lock:
+        job.docs[idx].update(update)
+    metrics.inc("ocr_job_documents_total", status=update["status"])
+    _save_document(job, idx)
+    _finish_if_complete(job)
+
+
+def submit(session_id, files):
+    """Start a job for ``[(name, bytes)]`` (ZIPs expanded); return its id.
+
+    The session's previous job, if still running, is cancelled first.
+    """
+    documents = expand_uploads(files)
+    if not documents:
+        raise ValueError("No supported documents (" + ", ".join(ocr_pages.UPLOAD_TYPES) + ", zip)")
+    job = Job(session_id, documents)
+    with _lock:
+        finished = [j for j in _jobs.values() if j.status in (DONE, FAILED, CANCELLED)]
+        for old in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del _jobs[old.id]
+        previous = _active.get(session_id)
+        _active[session_id] = job.id
+        _jobs[job.id] = job
+    if previous:
+        cancel(previous)
+    _save_job(job)
+    for idx, d in enumerate(job.docs):
+        _save_document(job, idx)
+
+    pool = _get_executor()
+    job.futures = [pool.submit(_run_document, job, idx, name, data)
+                   for idx, (name, data) in enumerate(documents)]
+    return job.id
+
+
+def cancel(job_id):
+    """Cancel a job: drop its queued documents, discard running ones when they finish."""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return False
+    job.cancelled.set()
+    for idx, fut in enumerate(job.futures):
+        if fut.cancel():
+            with job.lock:
+                job.docs[idx]["status"] = CANCELLED
+            _save_document(job, idx)
+    _finish_if_complete(job)
+    return True
+
+
+def get(job_id):
+    """Live snapshot of a job, or its persisted state if this process did not run it."""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.snapshot()
+    conn = connect()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    docs = []
+    for d in conn.execute("SELECT * FROM documents WHERE job_id = ? ORDER BY idx", (job_id,)):
+        d = dict(d)
+        d.pop("job_id")
+        d.pop("idx")
+        d["values"] = None if d["values"] is None else json.loads(d["values"])
+        # a job interrupted by a restart never finishes
+        if d["status"] in (QUEUED, RUNNING):
+            d["status"] = CANCELLED
+        docs.append(d)
+    return {
+        "id": row["id"], "session_id": row["session_id"], "created": row["created"],
+        "status": row["status"] if row["status"] not in (QUEUED, RUNNING) else CANCELLED,
+        "total": row["total"],
+        "finished": sum(d["status"] in (DONE, FAILED, CANCELLED) for d in docs),
+        "documents": docs,
+    }
+
+
+def latest(session_id):
+    """The session's most recent job id (live or persisted), or None."""
+    with _lock:
+        if session_id in _active:
+            return _active[session_id]
+    row = connect().execute(
+        "SELECT id FROM jobs WHERE session_id = ? ORDER BY created DESC LIMIT 1", (session_id,)).fetchone()
+    return row["id"] if row else None
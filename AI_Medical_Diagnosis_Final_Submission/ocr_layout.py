@@ -0,0 +1,182 @@
+# ocr_layout.py - pair lab-value labels with the value in the same table row
+#
+# Full-page OCR reads a report table column by column as often as row by
+# row, so in the flat text a label is not reliably followed by its own
+# value. Instead:
+#
+#   1. detect   one word-box pass (ocr_engine.image_to_data) over the page
+#               scaled by LAYOUT_DETECT_SCALE - enough to read labels.
+#   2. index    words are bucketed into horizontal bands of about one text
+#               height, and rows are grown from neighbouring bands by
+#               vertical overlap. Labels and values in different columns or
+#               blocks still end up in the same row.
+#   3. pair     analyte labels are found in each row's text with the same
+#               matcher as ocr_extract. Each takes the first numeric word to
+#               its right, before the next label in that row, skipping
+#               reference ranges such as "(<100)" or "0.9-1.7". A label with
+#               no value in its row gets nothing, never a number from
+#               elsewhere on the page.
+#   4. re-OCR   value boxes read with confidence below LAYOUT_REOCR_CONF are
+#               cropped from the full-resolution page, stacked one above the
+#               other with blank gaps into a single sheet and read again in
+#               one call restricted to digits. One call per page, not one
+#               per value: on the cli backend every call is a process spawn.
+#
+# Returns the values plus the page text rebuilt row by row for display.
+import os
+import re
+import time
+from collections import defaultdict
+
+from PIL import Image
+
+import ocr_engine
+from ocr_extract import _NUMBER_RE, find_labels, safe_float
+
+DETECT_SCALE = float(os.environ.get("LAYOUT_DETECT_SCALE", "0.8"))
+REOCR_CONF = float(os.environ.get("LAYOUT_REOCR_CONF", "60"))
+VALUE_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789.,"
+
+_RANGE_RE = re.compile(r"^[(\[<>]|\d\s*-\s*\d")
+
+
+# ---------------------------
+# Spatial index
+# ---------------------------
+def _overlap(a, b):
+    """Vertical overlap of two boxes as a fraction of the shorter one."""
+    inter = min(a["bottom"], b["bottom"]) - max(a["top"], b["top"])
+    return inter / float(max(1, min(a["bottom"] - a["top"], b["bottom"] - b["top"])))
+
+
+def build_rows(words):
+    """Group word boxes into rows (lists of words, left to right), top to bottom."""
+    if not words:
+        return []
+    heights = sorted(w["bottom"] - w["top"] for w in words)
+    band = max(1, heights[len(heights) // 2])
+    bands = defaultdict(list)              # band index -> word indices
+    for i, w in enumerate(words):
+        bands[(w["top"] + w["bottom"]) // 2 // band].append(i)
+
+    row_of = {}
+    rows = []
+    for i in sorted(range(len(words)), key=lambda i: (words[i]["top"], words[i]["left"])):
+        if i in row_of:
+            continue
+        row = [i]
+        row_of[i] = len(rows)
+        seed = words[i]
+        centre = (seed["top"] + seed["bottom"]) // 2 // band
+        for b in (centre - 1, centre, centre + 1):
+            for j in bands.get(b, ()):
+                if j not in row_of and _overlap(seed, words[j]) >= 0.5:
+                    row_of[j] = len(rows)
+                    row.append(j)
+        rows.append(sorted(row, key=lambda j: words[j]["left"]))
+    return [[words[j] for j in row] for row in rows]
+
+
+def _row_text(row):
+    spans, parts, pos = [], [], 0
+    for w in row:
+        spans.append((pos, pos + len(w["text"])))
+        parts.append(w["text"])
+        pos += len(w["text"]) + 1
+    return " ".join(parts), spans
+
+
+def pair_row(row):
+    """``[(analyte key, value word)]`` for the labels in one row."""
+    text, spans = _row_text(row)
+    labels = find_labels(text.lower())
+    pairs = []
+    for n, (key, start, end) in enumerate(labels):
+        stop = labels[n + 1][1] if n + 1 < len(labels) else len(text)
+        for w, (s, e) in zip(row, spans):
+            if s >= end and e <= stop and _NUMBER_RE.search(w["text"]) and not _RANGE_RE.search(w["text"]):
+                pairs.append((key, w))
+                break
+    return pairs
+
+
+# ---------------------------
+# OCR
+# ---------------------------
+def _crop(img, w, pad):
+    return img.crop((max(0, w["left"] - pad), max(0, w["top"] - pad),
+                     min(img.width, w["right"] + pad), min(img.height, w["bottom"] + pad)))
+
+
+def _number(text):
+    m = _NUMBER_RE.search(text or "")
+    if m is None:
+        return None
+    try:
+        return safe_float(m.group())
+    except ValueError:
+        return None
+
+
+def reocr(img, words, lang="eng", backend=None):
+    """Read the value boxes ``words`` again in one OCR call; one string per box."""
+    crops = [_crop(img, w, max(2, (w["bottom"] - w["top"]) // 3)) for w in words]
+    gap = max(c.height for c in crops)
+    sheet = Image.new(img.mode, (max(c.width for c in crops) + 2 * gap,
+                                 sum(c.height for c in crops) + gap * (len(crops) + 1)), "white")
+    slots, y = [], gap
+    for c in crops:
+        sheet.paste(c, (gap, y))
+        slots.append((y - gap // 2, y + c.height + gap // 2))
+        y += c.height + gap
+    found = [[] for _ in crops]
+    for w in ocr_engine.image_to_data(sheet, lang, VALUE_CONFIG, backend):
+        centre = (w["top"] + w["bottom"]) / 2.0
+        for i, (top, bottom) in enumerate(slots):
+            if top <= centre < bottom:
+                found[i].append(w)
+                break
+    return ["".join(w["text"] for w in sorted(ws, key=lambda w: w["left"])) for ws in found]
+
+
+def read_page(img, lang="eng", config="", backend=None):
+    """Layout-aware OCR of one preprocessed page: ``(text, values, {stage: ms})``."""
+    timings = {}
+    t0 = time.perf_counter()
+    scale = DETECT_SCALE if 0 < DETECT_SCALE < 1 else 1.0
+    small = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale)))) if scale < 1 else img
+    words = ocr_engine.image_to_data(small, lang, config, backend)
+    for w in words:
+        for k in ("left", "top", "right", "bottom"):
+            w[k] = int(round(w[k] / scale))
+    timings["layout_detect"] = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    rows = build_rows(words)
+    timings["layout_index"] = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    values, pending, seen = {}, [], set()
+    for row in rows:
+        for key, w in pair_row(row):
+            if key in seen:
+                continue
+            seen.add(key)
+            value = _number(w["text"])
+            if w["conf"] < REOCR_CONF or value is None:
+                pending.append((key, w))
+            else:
+                values[key] = value
+    if pending:
+        texts = reocr(img, [w for _, w in pending], lang, backend)
+        for (key, w), text in zip(pending, texts):
+            m = _NUMBER_RE.search(text)
+            if m is not None and _number(m.group()) is not None:
+                w["text"] = m.group()
+            value = _number(w["text"])
+            if value is not None:
+                values[key] = value
+    timings["layout_reocr"] = (time.perf_counter() - t0) * 1000.0
+
+    text = "\n".join(" ".join(w["text"] for w in row) for row in rows)
+    return text, values, timings
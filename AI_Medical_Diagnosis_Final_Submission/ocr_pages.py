@@ -0,0 +1,212 @@
+# ocr_pages.py - multi-page report ingestion (PDF, multi-frame TIFF, images)
+#
+# Documents are split into one PNG per page and the pages are OCR'd in
+# parallel in a process pool bounded by the CPU count. Pages are reported
+# back as they finish so the UI can stream partial text. Values are read per
+# page (ocr_cache.run_ocr_page) and merged in page order, the first page
+# that has an analyte wins. Whole documents and individual pages
+# are both cached in ocr_cache by content hash. Pool workers live for the
+# whole process and load their OCR engine once at start-up (ocr_engine.warm).
+# They are started by a forkserver (spawn where that is unavailable), not
+# forked from Streamlit's multithreaded process with its locks held. If a
+# worker dies (a Tesseract crash, the OOM killer) the broken pool is dropped,
+# a new one is started and the unfinished pages are retried once.
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+import ocr_cache
+import ocr_engine
+
+PDF_DPI = int(os.environ.get("OCR_PDF_DPI", "300"))
+MAX_WORKERS = int(os.environ.get("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+PAGE_SEPARATOR = "\n\f\n"
+
+UPLOAD_TYPES = ["png", "jpg", "jpeg", "pdf", "tif", "tiff"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context(method),
+                initializer=ocr_engine.warm,
+                initargs=(ocr_cache.OCR_SETTINGS["lang"], ocr_cache.OCR_SETTINGS["config"]))
+        return _pool
+
+
+def _drop_pool(pool):
+    """Forget a broken pool so the next _get_pool() starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _map_pages(pages, todo, settings, on_result):
+    """OCR ``pages[i]`` for each i in ``todo`` in the pool; ``on_result(i, page)`` as each finishes."""
+    remaining = set(todo)
+    for attempt in (1, 2):
+        pool = _get_pool()
+        try:
+            futures = {pool.submit(_ocr_page, pages[i], settings): i for i in sorted(remaining)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                on_result(i, fut.result())
+                remaining.discard(i)
+            return
+        except BrokenProcessPool:
+            _drop_pool(pool)
+            if attempt == 2:
+                raise
+
+
+def _ext(filename):
+    return os.path.splitext(str(filename or ""))[1].lower().lstrip(".")
+
+
+def _png_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def split_pages(data, filename, limit=None):
+    """Return a list of page images (bytes) for an uploaded document.
+
+    Single-frame images are returned unchanged so their cache key matches a
+    plain image upload.
+    """
+    ext = _ext(filename)
+    if ext == "pdf":
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(data)
+        try:
+            count = len(pdf) if limit is None else min(limit, len(pdf))
+            return [
+                _png_bytes(pdf[i].render(scale=PDF_DPI / 72.0).to_pil().convert("L"))
+                for i in range(count)
+            ]
+        finally:
+            pdf.close()
+
+    if ext in ("tif", "tiff"):
+        from PIL import Image, ImageSequence
+
+        img = Image.open(io.BytesIO(data))
+        frames = []
+        for frame in ImageSequence.Iterator(img):
+            frames.append(_png_bytes(frame.convert("RGB")))
+            if limit is not None and len(frames) >= limit:
+                break
+        return frames
+
+    return [data]
+
+
+def preview_image(data, filename):
+    """Bytes suitable for st.image: the upload itself or its first page."""
+    if _ext(filename) in ("pdf", "tif", "tiff"):
+        return split_pages(data, filename, limit=1)[0]
+    return data
+
+
+def _ocr_page(page_bytes, settings):
+    # runs in a worker process
+    return ocr_cache.run_ocr_page(page_bytes, settings)
+
+
+def _add_timings(total, timings):
+    for stage, ms in timings.items():
+        total[stage] = total.get(stage, 0.0) + ms
+
+
+def ocr_document(data, filename, settings=None, on_page=None):
+    """OCR every page of an upload; return ``(result, cached)``.
+
+    ``result`` is ``{"text", "values", "pages", "timings"}``. ``on_page(texts, done,
+    total)`` is called after each page finishes with the per-page texts so
+    far (None for pages still running).
+    """
+    doc_key = ocr_cache.cache_key(data, settings)
+    hit = ocr_cache.cache.get(doc_key)
+    if hit is not None:
+        metrics.inc("ocr_documents_total", cache="hit")
+        return hit, True
+    metrics.inc("ocr_documents_total", cache="miss")
+
+    pages = split_pages(data, filename)
+    texts = [None] * len(pages)
+    page_values = [None] * len(pages)
+    todo = []
+    for i, page in enumerate(pages):
+        page_hit = ocr_cache.cache.get(ocr_cache.cache_key(page, settings))
+        if page_hit is not None:
+            texts[i] = page_hit["text"]
+            page_values[i] = page_hit["values"]
+        else:
+            todo.append(i)
+
+    fresh = list(todo)
+    done = len(pages) - len(todo)
+    if on_page is not None and done:
+        on_page(list(texts), done, len(pages))
+
+    timings = {}
+    if len(todo) == 1:
+        i = todo[0]
+        page = ocr_cache.run_ocr_page(pages[i], settings)
+        texts[i], page_values[i] = page["text"], page["values"]
+        _add_timings(timings, page["timings"])
+        metrics.observe_stages("ocr_stage_seconds", page["timings"])
+        todo = []
+        done += 1
+        if on_page is not None:
+            on_page(list(texts), done, len(pages))
+    elif todo:
+        def on_result(i, page):
+            nonlocal done
+            texts[i], page_values[i] = page["text"], page["values"]
+            _add_timings(timings, page["timings"])
+            metrics.observe_stages("ocr_stage_seconds", page["timings"])
+            done += 1
+            if on_page is not None:
+                on_page(list(texts), done, len(pages))
+
+        _map_pages(pages, todo, settings, on_result)
+
+    if len(pages) > 1:
+        for i in fresh:
+            ocr_cache.cache.put(ocr_cache.cache_key(pages[i], settings),
+                                {"text": texts[i], "values": page_values[i]})
+
+    full_text = PAGE_SEPARATOR.join(texts)
+    values = {}
+    for v in page_values:
+        for key, value in v.items():
+            values.setdefault(key, value)
+    result = {
+        "text": full_text,
+        "values": values,
+        "pages": len(pages),
+        "timings": timings,   # summed over freshly OCR'd pages, ms per stage
+    }
+    ocr_cache.cache.put(doc_key, result)
+    return result, False
+
+
+def partial_text(texts):
+    return PAGE_SEPARATOR.join(
+        t if t is not None else f"[page {i + 1}: OCR running…]" for i, t in enumerate(texts)
+    )
@@ -0,0 +1,216 @@
+# schemas.py - one declarative input schema per model
+#
+# Feature order, dtypes, valid ranges, defaults and the column aliases seen
+# in Datasets/ and OCR output are declared here once. The prediction forms,
+# the OCR quick-predict buttons, batch screening and the REST API all build
+# their input arrays through this module, and model_registry checks each
+# pickled model's n_features_in_ against its schema when it is loaded.
+import re
+from collections import namedtuple
+
+import numpy as np
+
+Feature = namedtuple("Feature", "name label dtype lo hi default step aliases options")
+
+YES_NO = ((1, "No"), (2, "Yes"))   # survey lung cancer.csv encoding
+NO_YES = ((0, "No"), (1, "Yes"))
+
+
+def _f(name, label, dtype, lo, hi, default, step=None, aliases=(), options=None):
+    return Feature(name, label, dtype, lo, hi, default, step, tuple(aliases), options)
+
+
+def _voice(name, lo, hi, default):
+    return _f(name, name, "float", lo, hi, default)
+
+
+SCHEMAS = {
+    "diabetes": (
+        _f("Pregnancies", "Number of Pregnancies", "int", 0, 50, 0),
+        _f("Glucose", "Glucose Level", "float", 0.0, 1000.0, 100.0),
+        _f("BloodPressure", "Blood Pressure", "float", 0.0, 300.0, 70.0),
+        _f("SkinThickness", "Skin Thickness", "float", 0.0, 100.0, 20.0),
+        _f("Insulin", "Insulin Level", "float", 0.0, 2000.0, 80.0),
+        _f("BMI", "BMI", "float", 0.0, 100.0, 28.0),
+        _f("DiabetesPedigreeFunction", "Diabetes Pedigree Function", "float", 0.0, 10.0, 0.5),
+        _f("Age", "Age", "int", 0, 120, 30),
+    ),
+    "heart_disease": (
+        _f("age", "Age", "int", 0, 120, 45),
+        _f("sex", "Sex", "int", 0, 1, 1, options=((1, "Male"), (0, "Female"))),
+        _f("cp", "Chest Pain Type (0–3)", "int", 0, 3, 0, aliases=("chest pain type",)),
+        _f("trestbps", "Resting Blood Pressure (mm Hg)", "float", 0.0, 300.0, 120.0, step=1.0,
+           aliases=("BloodPressure", "resting blood pressure")),
+        _f("chol", "Serum Cholesterol (mg/dL)", "float", 0.0, 1000.0, 200.0, step=1.0,
+           aliases=("Cholesterol", "serum cholesterol")),
+        _f("fbs", "Fasting Blood Sugar > 120 mg/dL", "int", 0, 1, 0, options=NO_YES),
+        _f("restecg", "Resting ECG Results (0–2)", "int", 0, 2, 0),
+        _f("thalach", "Max Heart Rate Achieved", "int", 0, 300, 140, aliases=("max heart rate",)),
+        _f("exang", "Exercise Induced Angina", "int", 0, 1, 0, options=NO_YES),
+        _f("oldpeak", "ST Depression Induced by Exercise", "float", 0.0, 10.0, 1.0, step=0.1),
+        _f("slope", "Slope of ST Segment (0–2)", "int", 0, 2, 1),
+        _f("ca", "Major Vessels Colored by Fluoroscopy (0–4)", "int", 0, 4, 0),
+        _f("thal", "Thal (0 = Normal, 1 = Fixed Defect, 2 = Reversible Defect)", "int", 0, 3, 1),
+    ),
+    "parkinsons": (
+        _voice("MDVP:Fo(Hz)", 0.0, 1000.0, 150.0),
+        _voice("MDVP:Fhi(Hz)", 0.0, 1000.0, 200.0),
+        _voice("MDVP:Flo(Hz)", 0.0, 1000.0, 100.0),
+        _voice("MDVP:Jitter(%)", 0.0, 1.0, 0.005),
+        _voice("MDVP:Jitter(Abs)", 0.0, 1.0, 0.00006),
+        _voice("MDVP:RAP", 0.0, 1.0, 0.003),
+        _voice("MDVP:PPQ", 0.0, 1.0, 0.004),
+        _voice("Jitter:DDP", 0.0, 1.0, 0.009),
+        _voice("MDVP:Shimmer", 0.0, 1.0, 0.03),
+        _voice("MDVP:Shimmer(dB)", 0.0, 10.0, 0.3),
+        _voice("Shimmer:APQ3", 0.0, 1.0, 0.02),
+        _voice("Shimmer:APQ5", 0.0, 1.0, 0.03),
+        _voice("MDVP:APQ", 0.0, 1.0, 0.03),
+        _voice("Shimmer:DDA", 0.0, 1.0, 0.09),
+        _voice("NHR", 0.0, 1.0, 0.02),
+        _voice("HNR", 0.0, 100.0, 20.0),
+        _voice("RPDE", 0.0, 1.0, 0.5),
+        _voice("DFA", 0.0, 1.0, 0.65),
+        _voice("spread1", -20.0, 0.0, -5.0),
+        _voice("spread2", 0.0, 1.0, 0.5),
+        _voice("D2", 0.0, 10.0, 2.36),
+        _voice("PPE", 0.0, 1.0, 0.2),
+    ),
+    "lung_cancer": (
+        _f("GENDER", "Gender", "int", 0, 1, 1, options=((1, "Male"), (0, "Female"))),
+        _f("AGE", "Age", "int", 0, 120, 40),
+        _f("SMOKING", "Smoking", "int", 1, 2, 1, options=YES_NO),
+        _f("YELLOW_FINGERS", "Yellow Fingers", "int", 1, 2, 1, options=YES_NO),
+        _f("ANXIETY", "Anxiety", "int", 1, 2, 1, options=YES_NO),
+        _f("PEER_PRESSURE", "Peer Pressure", "int", 1, 2, 1, options=YES_NO),
+        _f("CHRONIC DISEASE", "Chronic Disease", "int", 1, 2, 1, options=YES_NO),
+        _f("FATIGUE", "Fatigue", "int", 1, 2, 1, options=YES_NO),
+        _f("ALLERGY", "Allergy", "int", 1, 2, 1, options=YES_NO),
+        _f("WHEEZING", "Wheezing", "int", 1, 2, 1, options=YES_NO),
+        _f("ALCOHOL CONSUMING", "Alcohol Consumption", "int", 1, 2, 1, options=YES_NO),
+        _f("COUGHING", "Coughing", "int", 1, 2, 1, options=YES_NO),
+        _f("SHORTNESS OF BREATH", "Shortness of Breath", "int", 1, 2, 1, options=YES_NO),
+        _f("SWALLOWING DIFFICULTY", "Swallowing Difficulty", "int", 1, 2, 1, options=YES_NO),
+        _f("CHEST PAIN", "Chest Pain", "int", 1, 2, 1, options=YES_NO),
+    ),
+    "thyroid": (
+        _f("age", "Age", "int", 0, 120, 40),
+        # prepocessed_hypothyroid.csv encodes F as 1
+        _f("sex", "Sex", "int", 0, 1, 0, options=((0, "Male"), (1, "Female"))),
+        _f("on thyroxine", "On Thyroxine", "int", 0, 1, 0, options=NO_YES),
+        _f("TSH", "TSH Level (mU/L)", "float", 0.0, 600.0, 1.6, step=0.1),
+        _f("T3 measured", "T3 Measured", "int", 0, 1, 1, options=NO_YES),
+        _f("T3", "T3 Level (nmol/L)", "float", 0.0, 20.0, 2.0, step=0.1),
+        _f("TT4", "Total T4 Level (nmol/L)", "float", 0.0, 1000.0, 106.0, step=0.1,
+           aliases=("T4", "total T4")),
+    ),
+}
+
+# Column order each pickled model was trained on
+FEATURES = {key: [f.name for f in schema] for key, schema in SCHEMAS.items()}
+DEFAULTS = {key: np.array([f.default for f in schema], dtype=float) for key, schema in SCHEMAS.items()}
+_LO = {key: np.array([f.lo for f in schema], dtype=float) for key, schema in SCHEMAS.items()}
+_HI = {key: np.array([f.hi for f in schema], dtype=float) for key, schema in SCHEMAS.items()}
+
+
+def _norm(name):
+    # "CHRONIC DISEASE", "chronic_disease" and "FATIGUE " all compare equal
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+# normalized name or alias -> feature index
+_LOOKUP = {
+    key: {_norm(alias): i for i, f in enumerate(schema) for alias in (f.name,) + f.aliases}
+    for key, schema in SCHEMAS.items()
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def resolve_columns(columns, key):
+    """Map each of ``key``'s features to a column; return (mapping, missing).
+
+    Exact (normalized) feature names win over aliases.
+    """
+    lookup = _LOOKUP[key]
+    exact = {_norm(f.name) for f in SCHEMAS[key]}
+    mapping = {}
+    for c in sorted(columns, key=lambda c: _norm(c) not in exact):
+        i = lookup.get(_norm(c))
+        if i is not None:
+            mapping.setdefault(FEATURES[key][i], c)
+    missing = [f for f in FEATURES[key] if f not in mapping]
+    return mapping, missing
+
+
+def applicable_models(columns, keys):
+    """Keys whose full feature set is present in ``columns``."""
+    return [k for k in keys if k in SCHEMAS and not resolve_columns(columns, k)[1]]
+
+
+def frame_matrix(key, df):
+    """Float matrix of ``key``'s features from a DataFrame, in training order."""
+    mapping, missing = resolve_columns(df.columns, key)
+    if missing:
+        raise SchemaError(f"{key}: missing columns {missing}")
+    return df[[mapping[f] for f in FEATURES[key]]].to_numpy(dtype=float)
+
+
+def to_matrix(key, rows):
+    """Float matrix from feature dicts and/or raw vectors in training order."""
+    features = FEATURES[key]
+    ordered = []
+    for row in rows:
+        if isinstance(row, dict):
+            mapping, missing = resolve_columns(row.keys(), key)
+            if missing:
+                raise SchemaError(f"{key}: missing features {missing}")
+            row = [row[mapping[f]] for f in features]
+        elif len(row) != len(features):
+            raise SchemaError(f"{key}: expected {len(features)} values, got {len(row)}")
+        ordered.append(row)
+    try:
+        return np.array(ordered, dtype=float).reshape(len(ordered), len(features))
+    except (TypeError, ValueError) as e:
+        raise SchemaError(f"{key}: non-numeric feature value ({e})")
+
+
+def out_of_range(key, X):
+    """``[(row, feature, value), ...]`` for cells outside the schema range or not finite."""
+    X = np.asarray(X, dtype=float).reshape(-1, len(FEATURES[key]))
+    bad = ~np.isfinite(X) | (X < _LO[key]) | (X > _HI[key])
+    return [(int(r), FEATURES[key][c], float(X[r, c])) for r, c in zip(*np.nonzero(bad))]
+
+
+def fill(key, values):
+    """Vector of defaults with any known ``values`` (names or aliases) filled in."""
+    vec = DEFAULTS[key].copy()
+    lookup = _LOOKUP[key]
+    for name, value in (values or {}).items():
+        i = lookup.get(_norm(name))
+        if i is None:
+            continue
+        try:
+            vec[i] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return vec
+
+
+def matched(key, values):
+    """Feature names of ``key`` that ``values`` supplies (by name or alias)."""
+    lookup = _LOOKUP[key]
+    hits = {lookup[_norm(n)] for n in (values or {}) if _norm(n) in lookup}
+    return [FEATURES[key][i] for i in sorted(hits)]
+
+
+def check_model(key, model):
+    """Error message if ``model`` was fitted on a different feature count."""
+    if key not in SCHEMAS:
+        return None
+    n = getattr(model, "n_features_in_", None)
+    if n is not None and int(n) != len(FEATURES[key]):
+        return f"{key}: model expects {n} features, schema has {len(FEATURES[key])}"
+    return None
@@ -0,0 +1,49 @@
+# screening.py - score every condition from one shared set of values
+#
+# The OCR page used to offer one button per model, each costing a full
+# script rerun. A risk panel builds every model's vector from the same
+# values (schema defaults where a value is missing), submits them all to
+# the coalescer at once - each model has its own lane thread, so they are
+# scored concurrently - and collects the results in one pass.
+import inference
+import microbatch
+import schemas
+
+
+def risk_panel(values, keys, coalescer=None, timeout=30):
+    """One result dict per model key, highest probability first.
+
+    Each entry has ``model``, ``inputs``, ``prediction``, ``probability``
+    (None for margin-only models), ``margin``, ``score_kind``, ``matched``
+    (features taken from ``values``), ``n_features`` and ``error``. Models
+    without a probability sort last.
+    """
+    coalescer = coalescer or microbatch.default
+    pending = []
+    for key in keys:
+        vec = schemas.fill(key, values)
+        pending.append((key, vec, coalescer.submit(key, vec)))
+
+    panel = []
+    for key, vec, fut in pending:
+        entry = {
+            "model": key,
+            "inputs": vec,
+            "prediction": None,
+            "probability": None,
+            "margin": None,
+            "score_kind": None,
+            "matched": schemas.matched(key, values),
+            "n_features": len(schemas.FEATURES[key]),
+            "error": None,
+        }
+        try:
+            label, score, kind = fut.result(timeout)
+        except Exception as e:
+            entry["error"] = str(e)
+        else:
+            entry.update(prediction=int(label), probability=inference.probability(score, kind),
+                         margin=inference.margin(score, kind), score_kind=kind)
+        panel.append(entry)
+    panel.sort(key=lambda e: -1.0 if e["probability"] is None else e["probability"], reverse=True)
+    return panel
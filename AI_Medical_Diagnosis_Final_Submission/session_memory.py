@@ -0,0 +1,276 @@
+# session_memory.py - per-session state with a memory budget, spill and expiry
+#
+# st.session_state lives as long as the browser tab's session and is never
+# trimmed, so idle sessions holding OCR results, previews and export files
+# kept their memory (and temp files) until the worker restarted. Large
+# per-session objects are kept here instead, keyed by the app's session id:
+#
+#   SESSION_BUDGET_MB     per-session in-memory budget (default 32)
+#   GLOBAL_BUDGET_MB      all sessions together (default 512)
+#   SESSION_IDLE_SECONDS  drop sessions not seen for this long (default 1800)
+#   SESSION_SPILL_DIR     where evicted entries are pickled (default: a temp dir)
+#
+# Over budget, the least recently used entries are spilled to disk and read
+# back transparently on the next get(); entries put with spill=False are
+# dropped instead. Expired sessions lose their entries and spill files, and
+# each entry's on_drop callback runs (e.g. to delete an export file).
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MB = 1024 * 1024
+SESSION_BUDGET = int(float(os.environ.get("SESSION_BUDGET_MB", "32")) * MB)
+GLOBAL_BUDGET = int(float(os.environ.get("GLOBAL_BUDGET_MB", "512")) * MB)
+IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", "1800"))
+SPILL_DIR = os.environ.get("SESSION_SPILL_DIR") or None
+JANITOR_SECONDS = 60
+
+
+def approx_size(obj, _seen=None):
+    """Rough in-memory size of ``obj`` in bytes (containers are walked)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)          # numpy arrays
+    if isinstance(nbytes, int):
+        return nbytes + 128
+    if hasattr(obj, "size") and hasattr(obj, "mode") and hasattr(obj, "getbands"):
+        w, h = obj.size                             # PIL images
+        return w * h * len(obj.getbands()) + 256
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, _seen) for v in obj)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "size", "path", "spill", "on_drop")
+
+    def __init__(self, value, size, spill, on_drop):
+        self.value = value
+        self.size = size
+        self.path = None          # set while spilled
+        self.spill = spill
+        self.on_drop = on_drop
+
+
+class _Session:
+    def __init__(self):
+        self.entries = OrderedDict()   # name -> _Entry, least recently used first
+        self.last_seen = time.time()
+        self.spills = 0
+        self.drops = 0
+
+    def in_memory(self):
+        return sum(e.size for e in self.entries.values() if e.path is None)
+
+
+class SessionMemory:
+    def __init__(self, session_budget=SESSION_BUDGET, global_budget=GLOBAL_BUDGET,
+                 idle_seconds=IDLE_SECONDS, spill_dir=SPILL_DIR):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.idle_seconds = idle_seconds
+        self._spill_dir = spill_dir
+        self._sessions = {}
+        self._lock = threading.RLock()
+        self._janitor = None
+        self.expired = 0
+
+    # ---------------------------
+    # Entries
+    # ---------------------------
+    def touch(self, sid):
+        """Mark a session active (call once per rerun); returns its record."""
+        self._ensure_janitor()
+        with self._lock:
+            s = self._sessions.get(sid)
+            if s is None:
+                s = self._sessions[sid] = _Session()
+            s.last_seen = time.time()
+            return s
+
+    def put(self, sid, name, value, spill=True, on_drop=None):
+        """Store ``value``; ``on_drop(value)`` runs when it is replaced or expires."""
+        entry = _Entry(value, approx_size(value), spill, on_drop)
+        with self._lock:
+            s = self.touch(sid)
+            old = s.entries.pop(name, None)
+            s.entries[name] = entry
+            if old is not None:
+                self._release(old, run_hook=old.value is not value)
+            self._enforce(sid, s)
+        return value
+
+    def get(self, sid, name, default=None):
+        with self._lock:
+            s = self.touch(sid)
+            entry = s.entries.get(name)
+            if entry is None:
+                return default
+            s.entries.move_to_end(name)
+            if entry.path is None:
+                return entry.value
+            path = entry.path
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            with self._lock:
+                s.entries.pop(name, None)
+            return default
+        with self._lock:
+            if s.entries.get(name) is entry and entry.path == path:
+                entry.value, entry.path = value, None
+                _remove(path)
+                self._enforce(sid, s, keep=name)
+        return value
+
+    def pop(self, sid, name, default=None):
+        value = self.get(sid, name, default)
+        with self._lock:
+            s = self._sessions.get(sid)
+            entry = s.entries.pop(name, None) if s is not None else None
+        if entry is not None:
+            self._release(entry, run_hook=False)
+        return value
+
+    # ---------------------------
+    # Budgets
+    # ---------------------------
+    def _spill_path(self, sid, name):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="mdx-sessions-")
+        d = os.path.join(self._spill_dir, sid)
+        os.makedirs(d, mode=0o700, exist_ok=True)
+        return os.path.join(d, hashlib.sha1(name.encode("utf-8")).hexdigest()[:16] + ".pkl")
+
+    def _evict(self, sid, s, name, entry):
+        if entry.spill:
+            try:
+                path = self._spill_path(sid, name)
+                with open(path, "wb") as f:
+                    pickle.dump(entry.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                entry.value, entry.path = None, path
+                s.spills += 1
+                return
+            except (OSError, pickle.PickleError, TypeError, AttributeError):
+                pass
+        s.entries.pop(name, None)
+        s.drops += 1
+        self._release(entry, run_hook=True)
+
+    def _enforce(self, sid, s, keep=None):
+        for name, entry in list(s.entries.items()):
+            if s.in_memory() <= self.session_budget:
+                break
+            if entry.path is None and name != keep:
+                self._evict(sid, s, name, entry)
+        if self.total_in_memory() > self.global_budget:
+            # least recently seen sessions give memory back first
+            for other_sid, other in sorted(self._sessions.items(), key=lambda kv: kv[1].last_seen):
+                for name, entry in list(other.entries.items()):
+                    if self.total_in_memory() <= self.global_budget:
+                        return
+                    if entry.path is None and not (other is s and name == keep):
+                        self._evict(other_sid, other, name, entry)
+
+    def total_in_memory(self):
+        with self._lock:
+            return sum(s.in_memory() for s in self._sessions.values())
+
+    def _release(self, entry, run_hook):
+        if entry.path is not None:
+            _remove(entry.path)
+            entry.path = None
+        if run_hook and entry.on_drop is not None:
+            try:
+                entry.on_drop(entry.value)
+            except Exception:
+                pass
+
+    # ---------------------------
+    # Expiry
+    # ---------------------------
+    def expire_idle(self, now=None):
+        """Drop sessions idle for longer than idle_seconds; return how many."""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_seconds]
+            dropped = [(sid, self._sessions.pop(sid)) for sid in idle]
+            self.expired += len(dropped)
+        for sid, s in dropped:
+            for entry in s.entries.values():
+                if entry.path is not None and entry.on_drop is not None:
+                    try:
+                        with open(entry.path, "rb") as f:
+                            entry.value = pickle.load(f)
+                    except Exception:
+                        pass
+                self._release(entry, run_hook=True)
+            if self._spill_dir:
+                shutil.rmtree(os.path.join(self._spill_dir, sid), ignore_errors=True)
+        return len(dropped)
+
+    def _janitor_loop(self):
+        while True:
+            time.sleep(JANITOR_SECONDS)
+            self.expire_idle()
+
+    def _ensure_janitor(self):
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+        with self._lock:
+            if self._janitor is None or not self._janitor.is_alive():
+                self._janitor = threading.Thread(target=self._janitor_loop, name="session-janitor", daemon=True)
+                self._janitor.start()
+
+    # ---------------------------
+    # Reporting
+    # ---------------------------
+    def report(self):
+        """Per-session memory and spill usage, largest first, plus totals."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for sid, s in self._sessions.items():
+                rows.append({
+                    "session": sid,
+                    "entries": len(s.entries),
+                    "memory_bytes": s.in_memory(),
+                    "spilled_bytes": sum(e.size for e in s.entries.values() if e.path is not None),
+                    "spills": s.spills,
+                    "drops": s.drops,
+                    "idle_seconds": now - s.last_seen,
+                })
+            expired = self.expired
+        rows.sort(key=lambda r: -r["memory_bytes"])
+        return {
+            "sessions": rows,
+            "memory_bytes": sum(r["memory_bytes"] for r in rows),
+            "spilled_bytes": sum(r["spilled_bytes"] for r in rows),
+            "session_budget": self.session_budget,
+            "global_budget": self.global_budget,
+            "idle_seconds": self.idle_seconds,
+            "expired": expired,
+        }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+default = SessionMemory()
@@ -0,0 +1,108 @@
+# startup.py - opt-in cold-start profile for app.py
+#
+#   STARTUP_PROFILE=1 streamlit run app.py                  # print to stderr
+#   STARTUP_PROFILE=startup.jsonl streamlit run app.py      # append JSON lines
+#
+# app.py calls begin() at the top of every script run, mark() after each
+# startup phase (imports, page config, CSS, model registry, sidebar, page
+# body) and finish() at the end of the script. Only the first run in the
+# process is a cold start, so only that one is reported. A run that ends
+# early (st.rerun(), an exception) never reaches finish(); the next run's
+# begin() drops its phases and that run is reported instead, with
+# "discarded_runs" saying how many were dropped. The report also lists which heavy optional modules were already
+# imported by then, to catch a page pulling in pandas/PIL/OCR it does not use.
+import json
+import os
+import sys
+import threading
+import time
+
+PROFILE = os.environ.get("STARTUP_PROFILE", "").strip()
+HEAVY_MODULES = ("numpy", "pandas", "PIL", "sklearn", "pytesseract", "pyarrow", "pypdfium2")
+
+T0 = time.perf_counter()
+
+_lock = threading.Lock()
+_phases = []
+_last = T0
+_run_start = T0
+_runs = 0
+_done = False
+
+
+def _process_age():
+    """Seconds since the interpreter started (Linux only), else None."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# time spent before this module was imported (interpreter + streamlit boot)
+BOOT_SECONDS = _process_age()
+
+
+def begin():
+    """Start of a script run; phases left by an unfinished earlier run are dropped."""
+    global _last, _run_start, _runs
+    if _done:
+        return
+    with _lock:
+        _runs += 1
+        if _runs > 1:
+            _phases.clear()
+            _last = _run_start = time.perf_counter()
+
+
+def mark(phase):
+    """Record the time since the previous mark as ``phase``."""
+    global _last
+    if _done:
+        return
+    now = time.perf_counter()
+    with _lock:
+        _phases.append((phase, now - _last))
+        _last = now
+
+
+def report(**extra):
+    """The phases recorded so far as a dict (milliseconds)."""
+    with _lock:
+        phases = {name: round(s * 1000.0, 2) for name, s in _phases}
+        total = _last - _run_start
+        discarded = max(0, _runs - 1)
+    out = {
+        "time": time.time(),
+        "pid": os.getpid(),
+        "boot_ms": None if BOOT_SECONDS is None else round(BOOT_SECONDS * 1000.0, 1),
+        "phases_ms": phases,
+        "total_ms": round(total * 1000.0, 2),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+        "modules_loaded": len(sys.modules),
+        "discarded_runs": discarded,
+    }
+    out.update(extra)
+    return out
+
+
+def finish(**extra):
+    """Emit the cold-start report once per process; later reruns are ignored."""
+    global _done
+    with _lock:
+        if _done:
+            return None
+        _done = True
+    result = report(**extra)
+    if not PROFILE or PROFILE.lower() in ("0", "false", "no"):
+        return result
+    line = json.dumps(result, default=str)
+    if PROFILE.lower() in ("1", "true", "yes", "stderr"):
+        print("startup profile:", line, file=sys.stderr)
+    else:
+        with open(PROFILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return result
@@ -0,0 +1,117 @@
+# test_api.py - the REST service, in process through FastAPI's TestClient
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import api
+import model_registry
+import schemas
+
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(api.app)
+
+
+def defaults(key):
+    return dict(zip(schemas.FEATURES[key], schemas.DEFAULTS[key].tolist()))
+
+
+def test_health_reports_loaded_models(client):
+    body = client.get("/health").json()
+    assert body["status"] == "ok"
+    assert body["models"] == sorted(schemas.SCHEMAS)
+    assert body["errors"] == {}
+
+
+def test_health_reports_models_that_fail_to_load(client, monkeypatch):
+    models = model_registry.ServingModels()
+    load = models._load
+
+    def broken(key):
+        if key == "parkinsons":
+            raise RuntimeError("Failed to load: bad pickle")
+        return load(key)
+
+    monkeypatch.setattr(models, "_load", broken)
+    monkeypatch.setattr(model_registry, "serving_models",
+                        lambda: (models, models.errors, models.info, models.compile_skipped))
+    body = client.get("/health").json()
+    assert body["status"] == "degraded"
+    assert "parkinsons" not in body["models"]
+    assert "bad pickle" in body["errors"]["parkinsons"]
+    assert client.post("/predict/parkinsons", json={"values": [0.0]}).status_code == 404
+
+
+def test_predict_probability_model(client):
+    r = client.post("/predict/heart_disease", json={"features": defaults("heart_disease")})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["score_kind"] == "proba"
+    assert 0.0 <= body["probability"] <= 1.0
+    assert body["margin"] is None
+
+
+def test_predict_margin_model_has_no_probability(client):
+    r = client.post("/predict/diabetes", json={"values": schemas.DEFAULTS["diabetes"].tolist()})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["score_kind"] == "decision"
+    assert body["probability"] is None
+    assert isinstance(body["margin"], float)
+
+
+def test_batch_accepts_dicts_and_vectors(client):
+    rows = [defaults("thyroid"), schemas.DEFAULTS["thyroid"].tolist()]
+    r = client.post("/predict/batch", json={"model": "thyroid", "rows": rows})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == 2
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("rows", [
+    [1, 2],                      # rows that are not lists
+    "not a list",
+    [["a", "b"]],                # non-numeric values
+    [[1.0, 2.0]],                # wrong length
+    [{"Glucose": 120}],          # missing features
+])
+def test_batch_bad_rows_are_422(client, rows):
+    r = client.post("/predict/batch", json={"model": "diabetes", "rows": rows})
+    assert r.status_code == 422
+
+
+def test_batch_row_cap(client):
+    rows = [[0.0]] * (api.MAX_BATCH_ROWS + 1)
+    r = client.post("/predict/batch", json={"model": "diabetes", "rows": rows})
+    assert r.status_code == 422
+
+
+def test_out_of_range_is_422(client):
+    row = defaults("heart_disease")
+    row["age"] = -5
+    assert client.post("/predict/heart_disease", json={"features": row}).status_code == 422
+
+
+def test_unknown_model_is_404(client):
+    assert client.post("/predict/nope", json={"values": [1.0]}).status_code == 404
+
+
+def test_screen_scores_every_model(client):
+    r = client.post("/screen", json={"features": {"Glucose": 130, "Age": 52}})
+    assert r.status_code == 200
+    body = r.json()
+    assert sorted(e["model"] for e in body["results"]) == sorted(schemas.SCHEMAS)
+    assert body["unavailable"] == {}
+
+
+def test_screen_out_of_range_is_422(client):
+    r = client.post("/screen", json={"features": {"Glucose": 130, "Age": -5}})
+    assert r.status_code == 422
+    assert "Age=-5" in r.json()["detail"]
@@ -0,0 +1,68 @@
+# test_compiled.py - compiled models must agree with the sklearn models
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pd = pytest.importorskip("pandas")
+
+import compiled
+import inference
+import model_registry
+import schemas
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = {
+    "diabetes": "diabetes_data.csv",
+    "heart_disease": "heart_disease_data.csv",
+    "parkinsons": "parkinson_data.csv",
+    "lung_cancer": "prepocessed_lungs_data.csv",
+    "thyroid": "prepocessed_hypothyroid.csv",
+}
+TOL = 1e-6
+
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+
+@pytest.fixture(scope="module")
+def models():
+    loaded, errors, _ = model_registry.load_models()
+    assert not errors
+    return loaded
+
+
+def rows(key):
+    X = schemas.frame_matrix(key, pd.read_csv(os.path.join(BASE, "Datasets", DATASETS[key])))
+    noise = np.random.default_rng(0).normal(scale=50.0, size=(64, X.shape[1]))
+    return np.vstack([X, noise])
+
+
+@pytest.mark.parametrize("key", sorted(DATASETS))
+def test_compiled_matches_sklearn(models, key):
+    fast, skipped = compiled.compile_models(models)
+    assert key not in skipped, skipped.get(key)
+    model, X = models[key], rows(key)
+
+    labels, scores, kind = inference.predict_batch(fast[key], X)
+    assert np.array_equal(labels, model.predict(X))
+    assert kind == inference.score_kind(model)
+    if kind == inference.KIND_PROBA:
+        expected = model.predict_proba(X)[:, -1]
+    else:
+        expected = np.asarray(model.decision_function(X), dtype=float).ravel()
+    np.testing.assert_allclose(scores, expected, rtol=TOL, atol=TOL)
+
+
+def test_parity_check_rejects_wrong_coefficients(models):
+    key = "heart_disease"
+    coef, intercept, classes, kind = compiled.extract_linear(models[key])
+    view = compiled.CompiledModel(key, coef * 1.01, intercept, classes, kind, models[key])
+    assert not compiled.check_parity(models[key], view, rows(key))
+
+
+def test_import_does_not_load_pandas():
+    code = "import sys, compiled; sys.exit('pandas' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=BASE).returncode == 0
@@ -0,0 +1,114 @@
+# test_history_store.py - the background writer and the streaming export
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+import pytest
+
+import history_store
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.sqlite3")
+    monkeypatch.setattr(history_store, "DB_PATH", path)
+    return path
+
+
+def record(i, **extra):
+    rec = {"time": f"2024-01-01T00:00:{i % 60:02d}.{i:06d}", "model": "diabetes",
+           "inputs": [1.0, 2.0, float(i)], "prediction": i % 2, "prob": None}
+    rec.update(extra)
+    return rec
+
+
+def flush(timeout=10):
+    done = threading.Event()
+    threading.Thread(target=lambda: (history_store.flush(), done.set()), daemon=True).start()
+    assert done.wait(timeout), "flush() did not return: the writer thread stopped"
+
+
+def test_bad_records_are_skipped_and_flush_returns(db):
+    history_store.append(record(1, inputs=[None, 2.0]))     # float(None) fails in _row
+    history_store.append(record(2, prob=object()))          # sqlite cannot bind it
+    history_store.append(record(3))
+    flush()
+    assert history_store.count() == 1
+
+    # the writer is still running
+    history_store.append(record(4))
+    flush()
+    assert history_store.count() == 2
+
+
+def populate(n, start=0):
+    conn = history_store.connect()
+    rows = [history_store._row(record(i, prob=0.5, patient_id=f"P{i % 50}")) for i in range(start, start + n)]
+    with conn:
+        conn.executemany(history_store._INSERT, rows)
+    return conn
+
+
+def export_peak(conn, fmt, chunk_size=250):
+    tracemalloc.start()
+    try:
+        with tempfile.TemporaryFile() as out:
+            history_store.export(out, fmt, chunk_size=chunk_size, conn=conn)
+            assert out.tell() > 0
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("fmt", ["csv.gz", "csv", "parquet"])
+def test_export_memory_does_not_grow_with_history(db, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    conn = populate(2000)
+    export_peak(conn, fmt)                    # warm-up: lazy imports, codec state
+    small = export_peak(conn, fmt)
+
+    populate(8000, start=2000)                # 5x the history
+    large = export_peak(conn, fmt)
+
+    # streaming keeps the peak at a few chunks; materializing the extra 8000
+    # rows would add several MB
+    assert large < small * 1.5 + 256 * 1024, (small, large)
+
+
+EXPORT_RSS_RECORDS = int(os.environ.get("HISTORY_EXPORT_RSS_RECORDS", "100000"))
+EXPORT_RSS_BUDGET_MB = 64
+
+
+def test_export_rss_stays_under_budget():
+    # the real ceiling: benchmarks/bench_history_export.py fills a history and
+    # exports it from a fresh process, failing if peak RSS grows past the
+    # budget. 100k records by default; HISTORY_EXPORT_RSS_RECORDS=1000000
+    # runs the full-size check (about 2.5 minutes, most of it filling the DB).
+    bench = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "benchmarks", "bench_history_export.py")
+    proc = subprocess.run(
+        [sys.executable, bench, "--records", str(EXPORT_RSS_RECORDS),
+         "--budget-mb", str(EXPORT_RSS_BUDGET_MB), "--formats", "csv.gz,csv"],
+        capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert "skipped" not in proc.stdout, proc.stdout
+
+
+def test_session_aggregates_only_count_that_session(db):
+    history_store.append(record(1, session_id="a", patient_id="p1", prob=0.2))
+    history_store.append(record(2, session_id="a", model="heart", prob=0.4))
+    history_store.append(record(3, session_id="b", patient_id="p1", prob=0.9))
+    flush()
+    rows = {r["key"]: r["count"] for r in history_store.session_aggregates("a")}
+    assert rows == {"diabetes": 1, "heart": 1}
+    assert [r["count"] for r in history_store.session_aggregates("a", "patient", ["p1"])] == [1]
+    assert history_store.session_aggregates("c") == []
+    assert {r["key"]: r["count"] for r in history_store.aggregates("model")} == {"diabetes": 2, "heart": 1}
+
+    history_store.clear(session_id="a")
+    assert history_store.session_aggregates("a") == []
+    assert [r["count"] for r in history_store.session_aggregates("b", "patient", ["p1"])] == [1]
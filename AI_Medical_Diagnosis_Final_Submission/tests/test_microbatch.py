@@ -0,0 +1,57 @@
+# test_microbatch.py - the coalescer survives callers that give up
+import threading
+
+import numpy as np
+
+import microbatch
+
+
+def _scores(key, X):
+    return np.ones(len(X), dtype=int), X[:, 0], "proba"
+
+
+def test_cancelled_future_does_not_kill_the_lane():
+    release = threading.Event()
+
+    def slow(key, X):
+        release.wait(5)
+        return _scores(key, X)
+
+    coalescer = microbatch.Coalescer(slow, max_rows=8, max_wait=0.05)
+    cancelled = coalescer.submit("m", [0.2])
+    first = coalescer.submit("m", [0.1])     # same group, after the cancelled one
+    cancelled.cancel()
+    release.set()
+    assert first.result(5)[1] == 0.1
+
+    # the lane thread is still alive and keeps serving
+    assert coalescer.predict("m", [0.3], timeout=5)[1] == 0.3
+    assert coalescer._lanes["m"].thread.is_alive()
+
+
+def test_cancel_after_batch_started_is_ignored():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(key, X):
+        started.set()
+        release.wait(5)
+        return _scores(key, X)
+
+    coalescer = microbatch.Coalescer(slow, max_rows=8, max_wait=0.0)
+    running = coalescer.submit("m", [0.4])
+    started.wait(5)
+    assert not running.cancel()      # already running: cannot be cancelled
+    release.set()
+    assert running.result(5)[1] == 0.4
+
+
+def test_scoring_error_reaches_every_caller():
+    def broken(key, X):
+        raise RuntimeError("model exploded")
+
+    coalescer = microbatch.Coalescer(broken, max_rows=8, max_wait=0.01)
+    futures = [coalescer.submit("m", [float(i)]) for i in range(3)]
+    for fut in futures:
+        assert isinstance(fut.exception(5), RuntimeError)
+    assert coalescer._lanes["m"].thread.is_alive()
@@ -0,0 +1,88 @@
+# test_model_registry.py - ServingModels: lazy, cached, never raises on iteration
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+import model_registry
+
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+
+def counting(models, fail=()):
+    calls = []
+    load = models._load
+
+    def _load(key):
+        calls.append(key)
+        if key in fail:
+            raise RuntimeError("Failed to load: incompatible pickle")
+        return load(key)
+
+    models._load = _load
+    return calls
+
+
+def test_failed_model_is_skipped_not_raised():
+    models = model_registry.ServingModels(fmt="pickle", mode="sklearn")
+    counting(models, fail={"parkinsons"})
+    assert "parkinsons" in list(models)          # not touched yet: listed lazily
+
+    items = dict(models.items())                 # the Model Info page
+    assert "parkinsons" not in items
+    assert sorted(items) == sorted(k for k in model_registry.EXPECTED_MODELS if k != "parkinsons")
+    assert "incompatible pickle" in models.errors["parkinsons"]
+
+    # from now on iteration and lookup agree
+    assert "parkinsons" not in list(models)
+    assert "parkinsons" not in models
+    assert len(models) == len(items)
+
+
+def test_loaded_model_is_cached(monkeypatch):
+    monkeypatch.setattr(model_registry, "RECHECK_SECONDS", 3600)
+    models = model_registry.ServingModels(fmt="pickle", mode="sklearn")
+    calls = counting(models)
+    first = models["heart_disease"]
+
+    def no_stat(key):
+        raise AssertionError("file stat'ed on a cached access")
+
+    models._signature = no_stat
+    for _ in range(5):
+        assert models["heart_disease"] is first
+    assert calls == ["heart_disease"]
+    assert models.info["heart_disease"]["hits"] == 5
+
+
+def test_replaced_file_is_reloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "RECHECK_SECONDS", 0)
+    path = tmp_path / "thyroid.sav"
+    shutil.copy(os.path.join(model_registry.BASE_DIR, model_registry.EXPECTED_MODELS["thyroid"]), path)
+    models = model_registry.ServingModels(fmt="pickle", mode="sklearn")
+    monkeypatch.setattr(models, "_path", lambda key: str(path))
+    calls = counting(models)
+
+    models["thyroid"]
+    models["thyroid"]
+    assert calls == ["thyroid"]                  # unchanged file: stat only
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    models["thyroid"]
+    assert calls == ["thyroid", "thyroid"]
+
+
+def test_unreadable_manifest_does_not_raise(monkeypatch):
+    import artifacts
+
+    def broken(*a, **k):
+        raise ValueError("Unsupported artifact format_version 99")
+
+    monkeypatch.setattr(artifacts, "load_manifest", broken)
+    models = model_registry.ServingModels(fmt="artifacts", mode="sklearn")
+    assert list(models) == []
+    assert dict(models.items()) == {}
+    assert "format_version" in models.errors["diabetes"]
@@ -0,0 +1,55 @@
+# test_ocr_engine.py - config parsing and the process-wide engine pool
+import threading
+
+import ocr_engine
+
+
+def test_parse_config():
+    assert ocr_engine.parse_config("--psm 7 --oem 1 -c tessedit_char_whitelist=0123456789.") == (
+        7, 1, {"tessedit_char_whitelist": "0123456789."})
+    assert ocr_engine.parse_config("") == (None, None, {})
+
+
+class FakeAPI:
+    def __init__(self):
+        self.ended = False
+
+    def Clear(self):
+        pass
+
+    def End(self):
+        self.ended = True
+
+
+def test_engines_are_reused_across_threads(monkeypatch):
+    created = []
+
+    def create(lang, config):
+        created.append(FakeAPI())
+        return created[-1]
+
+    monkeypatch.setattr(ocr_engine, "_create", create)
+    monkeypatch.setattr(ocr_engine, "_idle", {})
+
+    def use():
+        with ocr_engine._engine("eng", "--psm 6"):
+            pass
+
+    for _ in range(10):          # a new thread per call, like Streamlit reruns
+        t = threading.Thread(target=use)
+        t.start()
+        t.join()
+    assert len(created) == 1
+
+
+def test_idle_engines_are_capped(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "_create", lambda lang, config: FakeAPI())
+    monkeypatch.setattr(ocr_engine, "_idle", {})
+    monkeypatch.setattr(ocr_engine, "MAX_IDLE", 2)
+
+    contexts = [ocr_engine._engine("eng", "") for _ in range(3)]
+    apis = [c.__enter__() for c in contexts]      # three in use at once
+    for c in contexts:
+        c.__exit__(None, None, None)
+    assert len(ocr_engine._idle[("eng", "")]) == 2
+    assert [a.ended for a in apis].count(True) == 1
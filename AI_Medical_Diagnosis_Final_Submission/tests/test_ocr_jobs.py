@@ -0,0 +1,57 @@
+# test_ocr_jobs.py - background jobs: results, cancellation, bookkeeping
+import time
+
+import pytest
+
+import ocr_jobs
+import ocr_pages
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_jobs, "DB_PATH", str(tmp_path / "jobs.sqlite3"))
+
+    def fake_ocr(data, name):
+        if data == b"slow":
+            time.sleep(0.3)
+        return {"text": data.decode(), "values": {"Glucose": float(len(data))}, "pages": 1}, False
+
+    monkeypatch.setattr(ocr_pages, "ocr_document", fake_ocr)
+    return ocr_jobs
+
+
+def wait(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = ocr_jobs.get(job_id)
+        if job["status"] not in (ocr_jobs.QUEUED, ocr_jobs.RUNNING):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_finished_job_leaves_active_and_is_still_found(jobs):
+    job_id = jobs.submit("s1", [("a.png", b"abc"), ("b.png", b"de")])
+    job = wait(job_id)
+    assert job["status"] == jobs.DONE
+    assert [d["values"] for d in job["documents"]] == [{"Glucose": 3.0}, {"Glucose": 2.0}]
+
+    assert "s1" not in jobs._active
+    assert jobs.latest("s1") == job_id               # read back from SQLite
+
+
+def test_resubmit_cancels_previous_job(jobs):
+    first = jobs.submit("s2", [("slow.png", b"slow")] * (jobs.MAX_WORKERS + 2))
+    second = jobs.submit("s2", [("a.png", b"x")])
+    assert jobs.latest("s2") == second
+    assert wait(first)["status"] == jobs.CANCELLED
+    assert wait(second)["status"] == jobs.DONE
+    assert "s2" not in jobs._active
+    assert jobs.latest("s2") == second
+
+
+def test_active_does_not_grow_with_sessions(jobs):
+    ids = [jobs.submit(f"session-{i}", [("a.png", b"abc")]) for i in range(20)]
+    for job_id in ids:
+        wait(job_id)
+    assert not any(k.startswith("session-") for k in jobs._active)
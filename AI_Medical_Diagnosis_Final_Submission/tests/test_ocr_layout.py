@@ -0,0 +1,62 @@
+# test_ocr_layout.py - row pairing and the batched re-OCR of low-confidence values
+import numpy as np
+from PIL import Image, ImageDraw
+
+import ocr_layout
+
+
+def _w(text, left, top, conf=95.0, width=60, height=20):
+    return {"text": text, "conf": conf, "left": left, "top": top, "right": left + width, "bottom": top + height}
+
+
+def test_pair_row_skips_reference_ranges():
+    row = [_w("LDL", 40, 100), _w("(<100)", 700, 100), _w("mg/dL", 900, 100)]
+    assert ocr_layout.pair_row(row) == []
+    row = [_w("TSH", 40, 100), _w("(0.4-4.0)", 500, 100), _w("2.5", 700, 100)]
+    assert [(k, w["text"]) for k, w in ocr_layout.pair_row(row)] == [("TSH", "2.5")]
+
+
+def _dark_runs(img):
+    """(top, bottom) of each horizontal run of rows that contain ink."""
+    ink = (np.asarray(img.convert("L")) < 128).any(axis=1)
+    runs, start = [], None
+    for y, on in enumerate(list(ink) + [False]):
+        if on and start is None:
+            start = y
+        elif not on and start is not None:
+            runs.append((start, y))
+            start = None
+    return runs
+
+
+def test_low_confidence_values_are_reread_in_one_call(monkeypatch):
+    page = Image.new("L", (1000, 300), 255)
+    draw = ImageDraw.Draw(page)
+    for top in (100, 160, 220):
+        draw.rectangle((700, top + 4, 740, top + 16), fill=0)   # stand-ins for the value glyphs
+    detected = [
+        _w("Glucose", 40, 100), _w("1O5", 700, 100, conf=30.0),
+        _w("TSH", 40, 160), _w("2.5", 700, 160, conf=96.0),
+        _w("HbA1c", 40, 220), _w("6,?", 700, 220, conf=40.0),
+    ]
+    calls = []
+
+    def image_to_data(img, lang, config, backend):
+        calls.append(config)
+        if config != ocr_layout.VALUE_CONFIG:
+            return [dict(w) for w in detected]
+        texts = iter(["105", "6.1"])
+        return [_w(next(texts), 40, top, width=40, height=bottom - top) for top, bottom in _dark_runs(img)]
+
+    monkeypatch.setattr(ocr_layout, "DETECT_SCALE", 1.0)
+    monkeypatch.setattr(ocr_layout, "REOCR_CONF", 60.0)
+    monkeypatch.setattr(ocr_layout.ocr_engine, "image_to_data", image_to_data)
+    _, values, _ = ocr_layout.read_page(page)
+    assert calls == ["", ocr_layout.VALUE_CONFIG]
+    assert values == {"Glucose": 105.0, "TSH": 2.5, "HbA1c": 6.1}
+
+
+def test_reocr_keeps_boxes_it_cannot_read_empty(monkeypatch):
+    page = Image.new("L", (200, 100), 255)
+    monkeypatch.setattr(ocr_layout.ocr_engine, "image_to_data", lambda *a: [])
+    assert ocr_layout.reocr(page, [_w("1", 10, 10), _w("2", 10, 50)]) == ["", ""]
@@ -0,0 +1,69 @@
+# test_ocr_pages.py - the page pool recovers from a worker that died
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import ocr_pages
+
+
+class FakePool:
+    def __init__(self, broken):
+        self.broken = broken
+        self.submitted = []
+        self.shut_down = False
+
+    def submit(self, fn, page, settings):
+        self.submitted.append(page)
+        fut = Future()
+        if self.broken:
+            fut.set_exception(BrokenProcessPool("a worker died"))
+        else:
+            fut.set_result({"text": page.decode(), "values": {}, "timings": {}})
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    created = []
+
+    def make(broken):
+        created.append(FakePool(broken))
+        return created[-1]
+
+    monkeypatch.setattr(ocr_pages, "_pool", None)
+    return created, make
+
+
+def test_broken_pool_is_replaced_and_pages_retried(pools, monkeypatch):
+    created, make = pools
+    outcomes = iter([True, False])
+    monkeypatch.setattr(ocr_pages, "_get_pool", lambda: make(next(outcomes)))
+    results = {}
+    ocr_pages._map_pages([b"p0", b"p1", b"p2"], [1, 2], {}, lambda i, page: results.__setitem__(i, page["text"]))
+    assert results == {1: "p1", 2: "p2"}
+    assert created[0].shut_down and created[1].submitted == [b"p1", b"p2"]
+
+
+def test_second_failure_is_raised(pools, monkeypatch):
+    created, make = pools
+    monkeypatch.setattr(ocr_pages, "_get_pool", lambda: make(True))
+    with pytest.raises(BrokenProcessPool):
+        ocr_pages._map_pages([b"p0", b"p1"], [0, 1], {}, lambda i, page: None)
+    assert len(created) == 2
+
+
+def test_dropped_pool_is_rebuilt(monkeypatch):
+    broken = FakePool(True)
+    monkeypatch.setattr(ocr_pages, "_pool", broken)
+    ocr_pages._drop_pool(broken)
+    assert ocr_pages._pool is None
+    pool = ocr_pages._get_pool()
+    try:
+        assert pool is not broken
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        ocr_pages._drop_pool(pool)
@@ -0,0 +1,54 @@
+# test_startup.py - the cold-start profile covers exactly one script run
+import ast
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import startup
+
+
+@pytest.fixture
+def profile(monkeypatch):
+    monkeypatch.setenv("STARTUP_PROFILE", "0")
+    return importlib.reload(startup)
+
+
+def test_run_that_ended_early_is_dropped(profile):
+    profile.begin()
+    profile.mark("imports")
+    profile.mark("page_config")     # st.rerun() here: finish() never runs
+
+    profile.begin()
+    for phase in ("imports", "page_config", "css", "page"):
+        profile.mark(phase)
+    result = profile.finish()
+    assert list(result["phases_ms"]) == ["imports", "page_config", "css", "page"]
+    assert result["discarded_runs"] == 1
+    assert result["total_ms"] == pytest.approx(sum(result["phases_ms"].values()), abs=0.1)
+
+
+def test_only_the_first_finished_run_is_reported(profile):
+    profile.begin()
+    profile.mark("imports")
+    assert profile.finish()["discarded_runs"] == 0
+
+    profile.begin()
+    profile.mark("imports")
+    assert profile.finish() is None
+    assert list(profile.report()["phases_ms"]) == ["imports"]
+
+
+def test_app_top_level_imports_do_not_load_numpy():
+    # only module-level imports run on the Home page; app modules among them
+    # must not pull in numpy (streamlit itself is not needed for the check)
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(base, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    local = [alias.name for node in tree.body if isinstance(node, ast.Import) for alias in node.names
+             if os.path.exists(os.path.join(base, alias.name + ".py"))]
+    assert "model_registry" in local
+    code = f"import sys; import {', '.join(local)}; sys.exit('numpy' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=base).returncode == 0, local
@@ -0,0 +1,226 @@
+# train.py - rebuild the Models/*.sav files from Datasets/ without the notebooks
+#
+#   python train.py                      # all five models, one process each
+#   python train.py heart_disease thyroid --workers 2
+#   python train.py --install            # also copy the new version into Models/
+#
+# Each model is loaded and preprocessed the way its notebook does it, split
+# with the notebook's test_size/stratify/random_state and fitted with the
+# same estimator. Every run writes a new version directory
+#
+#   Models/versions/<YYYYmmdd-HHMMSS>/<model file>.sav
+#   Models/versions/<YYYYmmdd-HHMMSS>/metadata.json
+#
+# where metadata.json records, per model, the feature list, train/test
+# metrics, training time and the SHA-256 of the dataset it was fitted on.
+# No network access is needed.
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+import schemas
+
+DATASETS_DIR = os.path.join(model_registry.BASE_DIR, "Datasets")
+VERSIONS_DIR = os.path.join(model_registry.BASE_DIR, model_registry.MODELS_DIR, "versions")
+
+
+# ---------------------------
+# Dataset loaders (mirror the notebooks' preprocessing)
+# ---------------------------
+def _read(name):
+    return pd.read_csv(os.path.join(DATASETS_DIR, name))
+
+
+def load_diabetes():
+    df = _read("diabetes_data.csv")
+    return df, df["Outcome"]
+
+
+def load_heart():
+    df = _read("heart_disease_data.csv")
+    return df, df["target"]
+
+
+def load_parkinsons():
+    df = _read("parkinson_data.csv")
+    return df, df["status"]
+
+
+def load_lungs():
+    # LabelEncoder in the notebook: F=0, M=1 and NO=0, YES=1
+    df = _read("survey lung cancer.csv")
+    df["GENDER"] = df["GENDER"].map({"F": 0, "M": 1})
+    return df, df["LUNG_CANCER"].map({"NO": 0, "YES": 1})
+
+
+def load_thyroid():
+    df = _read("hypothyroid.csv")
+    y = df["binaryClass"].map({"P": 0, "N": 1})
+    df = df.replace({"t": 1, "f": 0, "?": np.nan}).replace({"F": 1, "M": 0})
+    for col in ("age", "sex", "TSH", "T3", "TT4"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+        df[col] = df[col].fillna(df[col].mean())
+    return df, y
+
+
+def _logistic():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression()
+
+
+def _linear_svc():
+    from sklearn.svm import SVC
+    return SVC(kernel="linear")
+
+
+# key -> loader, dataset file(s) to hash, estimator factory, split kwargs
+SPECS = {
+    "diabetes": (load_diabetes, ["diabetes_data.csv"], _linear_svc,
+                 {"test_size": 0.2, "stratify": True, "random_state": 2}),
+    "heart_disease": (load_heart, ["heart_disease_data.csv"], _logistic,
+                      {"test_size": 0.2, "stratify": True, "random_state": 2}),
+    "parkinsons": (load_parkinsons, ["parkinson_data.csv"], _linear_svc,
+                   {"test_size": 0.2, "stratify": False, "random_state": 2}),
+    "lung_cancer": (load_lungs, ["survey lung cancer.csv"], _logistic,
+                    {"test_size": 0.2, "stratify": True, "random_state": 2}),
+    "thyroid": (load_thyroid, ["hypothyroid.csv"], _logistic,
+                {"test_size": 0.2, "stratify": False, "random_state": 42}),
+}
+
+
+# ---------------------------
+# Training
+# ---------------------------
+def _metrics(model, X, y):
+    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+    pred = model.predict(X)
+    out = {"accuracy": float(accuracy_score(y, pred)), "f1": float(f1_score(y, pred))}
+    try:
+        out["roc_auc"] = float(roc_auc_score(y, model.decision_function(X)))
+    except (AttributeError, ValueError):
+        pass
+    return out
+
+
+def load_split(key):
+    """``(X_train, X_test, y_train, y_test)`` exactly as the notebook splits it."""
+    from sklearn.model_selection import train_test_split
+
+    loader, _, _, split = SPECS[key]
+    df, y = loader()
+    X = schemas.frame_matrix(key, df)
+    y = np.asarray(y, dtype=int)
+    return train_test_split(
+        X, y, test_size=split["test_size"], random_state=split["random_state"],
+        stratify=y if split["stratify"] else None)
+
+
+def train_one(key, out_dir):
+    """Fit one model, write its .sav into ``out_dir`` and return its metadata."""
+    import sklearn
+
+    _, files, factory, split = SPECS[key]
+    t0 = time.perf_counter()
+    X_train, X_test, y_train, y_test = load_split(key)
+
+    model = factory()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        fit_t0 = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_t0
+
+    filename = os.path.basename(model_registry.EXPECTED_MODELS[key])
+    path = os.path.join(out_dir, filename)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+    return key, {
+        "file": filename,
+        "sha256": model_registry.file_sha256(path),
+        "estimator": repr(model),
+        "features": schemas.FEATURES[key],
+        "data": {name: model_registry.file_sha256(os.path.join(DATASETS_DIR, name)) for name in files},
+        "split": dict(split, n_train=int(len(y_train)), n_test=int(len(y_test))),
+        "metrics": {"train": _metrics(model, X_train, y_train), "test": _metrics(model, X_test, y_test)},
+        "fit_seconds": round(fit_seconds, 4),
+        "total_seconds": round(time.perf_counter() - t0, 4),
+        "warnings": sorted({str(w.message) for w in caught}),
+        "sklearn": sklearn.__version__,
+    }
+
+
+def train(keys=None, workers=None, out_root=VERSIONS_DIR):
+    """Train ``keys`` in a process pool; return (version_dir, metadata)."""
+    keys = list(keys or SPECS)
+    version = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    out_dir = os.path.join(out_root, version)
+    os.makedirs(out_dir)
+
+    t0 = time.perf_counter()
+    workers = min(len(keys), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = dict(pool.map(train_one, keys, [out_dir] * len(keys)))
+
+    metadata = {
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "wall_seconds": round(time.perf_counter() - t0, 3),
+        "workers": workers,
+        "python": platform.python_version(),
+        "models": {k: results[k] for k in keys},
+    }
+    with open(os.path.join(out_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    return out_dir, metadata
+
+
+def install(out_dir, metadata):
+    """Copy a trained version's .sav files over the ones the app serves."""
+    for key, meta in metadata["models"].items():
+        target = os.path.join(model_registry.BASE_DIR, model_registry.EXPECTED_MODELS[key])
+        shutil.copy2(os.path.join(out_dir, meta["file"]), target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the .sav models from Datasets/")
+    parser.add_argument("models", nargs="*", metavar="MODEL",
+                        help=f"subset of {', '.join(SPECS)} (default: all)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=VERSIONS_DIR, help="versions directory")
+    parser.add_argument("--install", action="store_true", help="copy the new models into Models/")
+    args = parser.parse_args()
+    unknown = [m for m in args.models if m not in SPECS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+
+    out_dir, metadata = train(args.models, args.workers, args.out)
+    print(f"version {metadata['version']} -> {out_dir} "
+          f"({metadata['wall_seconds']:.2f}s, {metadata['workers']} workers)")
+    print(f"{'model':<15}{'fit s':>8}{'train acc':>11}{'test acc':>10}{'test auc':>10}")
+    for key, meta in metadata["models"].items():
+        test = meta["metrics"]["test"]
+        print(f"{key:<15}{meta['fit_seconds']:>8.3f}{meta['metrics']['train']['accuracy']:>11.3f}"
+              f"{test['accuracy']:>10.3f}{test.get('roc_auc', float('nan')):>10.3f}")
+        for w in meta["warnings"]:
+            print(f"  warning: {w}")
+
+    if args.install:
+        install(out_dir, metadata)
+        print("installed into", os.path.join(model_registry.BASE_DIR, model_registry.MODELS_DIR))
+
+
+if __name__ == "__main__":
+    main()